@@ -0,0 +1,250 @@
+"""
+Motion plans: a robot sequence as a DAG of device steps.
+
+Each step runs once all steps it depends on have succeeded and its safety
+preconditions hold; independent steps run concurrently (asyncio.gather).
+A plan is built once and run many times: run parameters (velocity) and the
+results of finished steps reach the step actions through a context dict.
+Steps of the same device must be ordered by dependencies - the device
+command layers reject a second command while one is running.
+
+The report contains per-step timing, the wall time of the plan and its
+critical path (the chain of dependent steps that determined the wall time).
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from core.state import devices
+from models.api_types import IgusStatusResponse
+
+
+@dataclass
+class Precondition:
+    """Safety check evaluated right before a step starts."""
+    description: str
+    check: Callable[[], Awaitable[bool]]
+
+
+@dataclass
+class MotionStep:
+    name: str
+    device: str
+    action: Callable[[dict], Awaitable[dict]]
+    after: Tuple[str, ...] = ()
+    preconditions: Tuple[Precondition, ...] = ()
+
+
+@dataclass
+class StepReport:
+    success: bool = False
+    skipped: bool = False
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    started_s: Optional[float] = None
+    finished_s: Optional[float] = None
+
+    @property
+    def duration_s(self) -> float:
+        if self.started_s is None or self.finished_s is None:
+            return 0.0
+        return self.finished_s - self.started_s
+
+    def to_dict(self) -> dict:
+        return {
+            "success": self.success,
+            "skipped": self.skipped,
+            "error": self.error,
+            "started_s": None if self.started_s is None else round(self.started_s, 3),
+            "duration_s": round(self.duration_s, 3),
+        }
+
+
+@dataclass
+class PlanReport:
+    success: bool
+    steps: Dict[str, StepReport]
+    elapsed_s: float
+    critical_path: List[str] = field(default_factory=list)
+
+    @property
+    def failed_step(self) -> Optional[str]:
+        return next((name for name, step in self.steps.items() if not step.success and not step.skipped), None)
+
+    @property
+    def message(self) -> str:
+        name = self.failed_step
+        return "" if name is None else f"{name}: {self.steps[name].error}"
+
+    def result(self, name: str) -> Optional[dict]:
+        step = self.steps.get(name)
+        return None if step is None else step.result
+
+    def timing(self) -> dict:
+        durations = [step.duration_s for step in self.steps.values()]
+        return {
+            "elapsed_s": round(self.elapsed_s, 3),
+            "serial_s": round(sum(durations), 3),
+            "critical_path": self.critical_path,
+            "critical_path_s": round(sum(self.steps[name].duration_s for name in self.critical_path), 3),
+            "steps": {name: step.to_dict() for name, step in self.steps.items()},
+        }
+
+
+class MotionPlan:
+    def __init__(self, steps: List[MotionStep]):
+        self.steps: Dict[str, MotionStep] = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise ValueError(f"Duplicate step {step.name}")
+            self.steps[step.name] = step
+        self.order = self._validate()
+
+    def _validate(self) -> List[str]:
+        """Topological order; rejects unknown dependencies, cycles and unordered steps of one device."""
+        for step in self.steps.values():
+            for dep in step.after:
+                if dep not in self.steps:
+                    raise ValueError(f"Step {step.name} depends on unknown step {dep}")
+        order: List[str] = []
+        state: Dict[str, int] = {}
+
+        def visit(name: str):
+            if state.get(name) == 1:
+                raise ValueError(f"Cycle in motion plan at step {name}")
+            if state.get(name) == 2:
+                return
+            state[name] = 1
+            for dep in self.steps[name].after:
+                visit(dep)
+            state[name] = 2
+            order.append(name)
+
+        for name in self.steps:
+            visit(name)
+
+        ancestors: Dict[str, set] = {}
+        for name in order:
+            ancestors[name] = set()
+            for dep in self.steps[name].after:
+                ancestors[name] |= ancestors[dep] | {dep}
+        for i, a in enumerate(order):
+            for b in order[i + 1:]:
+                if self.steps[a].device == self.steps[b].device and a not in ancestors[b]:
+                    raise ValueError(f"Steps {a} and {b} use {self.steps[a].device} without an ordering dependency")
+        return order
+
+    async def run(self, context: Optional[dict] = None) -> PlanReport:
+        """context: run parameters for the step actions (e.g. {"velocity": 20}); step results are added under "results"."""
+        started = time.perf_counter()
+        context = {**(context or {}), "results": {}}
+        reports = {name: StepReport() for name in self.order}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: MotionStep) -> bool:
+            report = reports[step.name]
+            if step.after and not all(await asyncio.gather(*(tasks[dep] for dep in step.after))):
+                report.skipped = True
+                return False
+            try:
+                for precondition in step.preconditions:
+                    if not await precondition.check():
+                        raise RuntimeError(f"Precondition failed: {precondition.description}")
+                report.started_s = time.perf_counter() - started
+                report.result = context["results"][step.name] = await step.action(context)
+                report.success = bool(report.result is not None and report.result.get("success", False))
+                if not report.success:
+                    report.error = (report.result or {}).get("error", "Step failed")
+            except Exception as e:
+                report.error = str(e)
+            finally:
+                if report.started_s is not None:
+                    report.finished_s = time.perf_counter() - started
+            return report.success
+
+        for name in self.order:
+            tasks[name] = asyncio.create_task(run_step(self.steps[name]))
+        await asyncio.gather(*tasks.values())
+
+        success = all(report.success for report in reports.values())
+        return PlanReport(success, reports, time.perf_counter() - started, self._critical_path(reports))
+
+    def _critical_path(self, reports: Dict[str, StepReport]) -> List[str]:
+        """Chain of dependencies ending at the step that finished last (by measured times)."""
+        finished = [name for name in self.order if reports[name].finished_s is not None]
+        if not finished:
+            return []
+        name = max(finished, key=lambda n: reports[n].finished_s)
+        path = [name]
+        while True:
+            deps = [dep for dep in self.steps[name].after if reports[dep].finished_s is not None]
+            if not deps:
+                break
+            name = max(deps, key=lambda n: reports[n].finished_s)
+            path.append(name)
+        return path[::-1]
+
+
+# ------------- STEPS / PRECONDITIONS -------------
+async def _lift_position_cm() -> Optional[float]:
+    status = await devices.lift.get_status()
+    return status.position_cm if isinstance(status, IgusStatusResponse) else None
+
+
+def lift_at(position_cm: float, tolerance_cm: float) -> Precondition:
+    async def check() -> bool:
+        position = await _lift_position_cm()
+        return position is not None and abs(position - position_cm) < tolerance_cm
+    return Precondition(f"lift at {position_cm} ± {tolerance_cm} cm", check)
+
+
+def lift_above(position_cm: float) -> Precondition:
+    async def check() -> bool:
+        position = await _lift_position_cm()
+        return position is not None and position >= position_cm
+    return Precondition(f"lift above {position_cm} cm", check)
+
+
+def _velocity(context: dict, scale: float) -> float:
+    velocity = context["velocity"]
+    return velocity if scale == 1.0 else max(1, int(velocity * scale))
+
+
+def lift_move(name: str, position_cm: float, velocity_scale: float = 1.0, after: Tuple[str, ...] = (),
+              preconditions: Tuple[Precondition, ...] = ()) -> MotionStep:
+    async def action(context: dict) -> dict:
+        velocity = _velocity(context, velocity_scale)
+        return await devices.lift.move_to_position(position_cm, velocity, velocity, True)
+    return MotionStep(name, "lift", action, after, preconditions)
+
+
+def arm_pose(name: str) -> MotionStep:
+    """Reads the current arm pose (telemetry, does not conflict with arm motion commands)."""
+    async def action(context: dict) -> dict:
+        return {"success": True, **(await devices.manipulator.get_current_position() or {})}
+    return MotionStep(name, "arm_status", action)
+
+
+def arm_move(name: str, points: List[dict], velocity_scale: float = 1.0, after: Tuple[str, ...] = (),
+             preconditions: Tuple[Precondition, ...] = (), skip_if_at: Optional[str] = None) -> MotionStep:
+    """Joint move through points; skipped if an arm_pose dependency reports the pose skip_if_at."""
+    async def action(context: dict) -> dict:
+        if skip_if_at is not None:
+            poses = [context["results"][dep].get("pose_name") for dep in after if context["results"].get(dep)]
+            if skip_if_at in poses:
+                return {"success": True, "details": f"Already at {skip_if_at}"}
+        return await devices.manipulator.complex_move_with_joints_dict(
+            points=points, velocity=_velocity(context, velocity_scale), blocking=True, reset_faults=False
+        )
+    return MotionStep(name, "arm", action, after, preconditions)
+
+
+def check_step(name: str, precondition: Precondition, after: Tuple[str, ...] = ()) -> MotionStep:
+    """Gate step: evaluates a precondition once, so several steps can start from the same checked state."""
+    async def action(context: dict) -> dict:
+        if await precondition.check():
+            return {"success": True}
+        return {"success": False, "error": f"Precondition failed: {precondition.description}"}
+    return MotionStep(name, f"check:{name}", action, after)
@@ -1,314 +1,229 @@
 import asyncio
+import time
+from typing import Optional
 import drivers.xarm_driver.xarm_positions as xarm_positions
-from core.state import igus_client, xarm_client, symovo_client
-from models.api_types import IgusMoveParams,XarmStatusResponse,IgusStatusResponse,SymovoStatusResponse,ErrorStatus
+from core.state import devices, symovo_client, status_aggregator
+from services.symovo_transport_tracker import transport_progress
+from application.sequence_scripts import run_sequence
+from models.api_types import XarmStatusResponse,IgusStatusResponse,SymovoStatusResponse,ErrorStatus
+from core.configuration import (
+    product_preposition_lift, product_preposition_arm,
+    product_preposition_after_steps, product_preposition_max_lift_cm,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def move_robot_to_box_1(velocity: int) -> dict:
-    first_pos = 40
-    second_pos = 30
-    try:
-        async with igus_client as _igus_client:
-            param = {"position_cm":first_pos,
-                     "velocity_percent":velocity,
-                     "acceleration_percent":velocity,
-                     "blocking":True,
-                     }
-            igus_result = await _igus_client.move_to_position(param)
-            if not igus_result.get("success", False):
-                return {
-                    "success": False,
-                    "igus_result": igus_result,
-                    "message": igus_result.get("error", "Igus move failed")
-                }
+# Сценарии коробок и транспортного положения описаны в core/robot_sequences.json
 
-            igus_position = await igus_client.get_status()
-            igus_position = igus_position.get('position')
-            result = abs(igus_position - first_pos)
-            if result < 250:
-                async with xarm_client as _xarm_client:
-                    current_pose = await _xarm_client.get_current_position()
-                    igus_result2 = await _igus_client.move_to_position(
-                        int(second_pos), int(velocity / 2), int(velocity / 2), False
-                    )
-                    if not igus_result2.get('success', False):
-                        return {
-                            "success": False,
-                            "igus_result": igus_result2,
-                            "message": igus_result2.get('error', 'Igus move failed')
-                        }
-                    robot_result = await _xarm_client.complex_move_with_joints_dict(
-                        points=[
-                            xarm_positions.poses["TRANSPORT_STEP_1"],
-                            xarm_positions.poses["BOX_STEP_1"],
-                            xarm_positions.poses["BOX_1_STEP_2"]
-                        ],
-                        velocity=velocity,
-                        blocking=True,
-                        reset_faults=False
-                    )
-                    if not robot_result:
-                        return {
-                            "success": False,
-                            "igus_result": igus_result2,
-                            "manipulator_result": robot_result,
-                            "message": robot_result.get('error', 'Robot move failed') if robot_result else "Robot move failed"
-                        }
-                    return {
-                        "success": True,
-                        "igus_result": igus_result2,
-                        "manipulator_result": robot_result,
-                        "message": ""
-                    }
-            return {
-                "success": False,
-                "igus_result": igus_result,
-                "message": "Position tolerance exceeded"
-            }
+
+async def _move_robot_to_box(velocity: int, sequence: str) -> dict:
+    try:
+        report = await run_sequence(sequence, velocity)
     except Exception as e:
         return {
             "success": False,
             "message": str(e)
         }
+    return {
+        "success": report.success,
+        "igus_result": report.result("lift_down") or report.result("lift_up"),
+        "manipulator_result": report.result("arm_to_box"),
+        "message": report.message,
+        "timing": report.timing(),
+    }
+
+async def move_robot_to_box_1(velocity: int) -> dict:
+    return await _move_robot_to_box(velocity, "box_1")
 
 async def move_robot_to_box_2(velocity: int) -> dict:
-    first_pos = 40
-    second_pos = 30
-    try:
-        async with igus_client as _igus_client:
-            igus_result = await _igus_client.move_to_position(first_pos, velocity, velocity, True)
-            if not igus_result.get("success", False):
-                return {
-                    "success": False,
-                    "igus_result": igus_result,
-                    "message": igus_result.get("error", "Igus move failed")
-                }
+    return await _move_robot_to_box(velocity, "box_2")
 
-            igus_position = await igus_client.get_status()
-            igus_position = igus_position.get('position')
-            result = abs(igus_position - first_pos)
-            if result < 250:
-                async with xarm_client as _xarm_client:
-                    current_pose = await _xarm_client.get_current_position()
-                    igus_result2 = await _igus_client.move_to_position(
-                        int(second_pos), int(velocity / 2), int(velocity / 2), False
-                    )
-                    if not igus_result2.get('success', False):
-                        return {
-                            "success": False,
-                            "igus_result": igus_result2,
-                            "message": igus_result2.get('error', 'Igus move failed')
-                        }
-                    robot_result = await _xarm_client.complex_move_with_joints_dict(
-                        points=[
-                            xarm_positions.poses["TRANSPORT_STEP_1"],
-                            xarm_positions.poses["BOX_STEP_1"],
-                            xarm_positions.poses["BOX_2_STEP_2"]
-                        ],
-                        velocity=velocity,
-                        blocking=True,
-                        reset_faults=False
-                    )
-                    if not robot_result:
-                        return {
-                            "success": False,
-                            "igus_result": igus_result2,
-                            "manipulator_result": robot_result,
-                            "message": robot_result.get('error', 'Robot move failed') if robot_result else "Robot move failed"
-                        }
-                    return {
-                        "success": True,
-                        "igus_result": igus_result2,
-                        "manipulator_result": robot_result,
-                        "message": ""
-                    }
-            return {
-                "success": False,
-                "igus_result": igus_result,
-                "message": "Position tolerance exceeded"
-            }
-    except Exception as e:
-        return {
-            "success": False,
-            "message": str(e)
-        }
-    
 async def move_to_transport_position(velocity: int) -> dict:
     # Возвращает dict с результатом, бизнес-логика не знает ничего о FastAPI или TransportPositionResult!
     try:
-        async with igus_client as _igus_client:
-            igus_result = await _igus_client.move_to_position(20, velocity, velocity, True)
-            if not igus_result.get("success", False):
-                return {
-                    "success": False,
-                    "igus_result": igus_result,
-                    "message": igus_result.get("error", "Igus move failed")
-                }
-            manipulator_result = None
-            with xarm_client as client:
-                current_pose = await client.get_current_position()
-                if current_pose.get('pose_name') != "TRANSPORT_STEP_2":
-                    manipulator_result = await client.complex_move_with_joints_dict(
-                        points=[xarm_positions.poses["TRANSPORT_STEP_1"], xarm_positions.poses["TRANSPORT_STEP_2"]],
-                        velocity=velocity,
-                        blocking=True,
-                        reset_faults=False
-                    )
-                    if not manipulator_result or not manipulator_result.get('success', True):
-                        return {
-                            "success": False,
-                            "igus_result": igus_result,
-                            "manipulator_result": manipulator_result,
-                            "message": manipulator_result.get('error', 'Robot move failed') if manipulator_result else 'Manipulator move failed'
-                        }
-            igus_result2 = await _igus_client.move_to_position(0, velocity, velocity, True)
-            if not igus_result2.get("success", False):
-                return {
-                    "success": False,
-                    "igus_result": igus_result,
-                    "manipulator_result": manipulator_result,
-                    "igus_final_result": igus_result2,
-                    "message": igus_result2.get("error", "Igus move failed")
-                }
-            return {
-                "success": True,
-                "igus_result": igus_result,
-                "manipulator_result": manipulator_result,
-                "igus_final_result": igus_result2,
-                "message": ""
-            }
+        report = await run_sequence("transport", velocity)
     except Exception as e:
         return {"success": False, "message": f"Transport position failed: {e}"}
+    return {
+        "success": report.success,
+        "igus_result": report.result("lift_safe"),
+        "manipulator_result": report.result("arm_to_transport"),
+        "igus_final_result": report.result("lift_base"),
+        "message": report.message,
+        "timing": report.timing(),
+    }
+
+class _PhaseTimer:
+    """Start / duration of the phases of one coordinated move (s from the start of the move)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    async def run(self, name: str, coro):
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.phases[name] = {
+                "start_s": round(start - self.started, 3),
+                "duration_s": round(time.perf_counter() - start, 3),
+            }
+
+    def report(self, prepositioned: list) -> dict:
+        return {
+            "total_s": round(time.perf_counter() - self.started, 3),
+            "phases": self.phases,
+            "prepositioned": prepositioned,
+        }
+
+
+async def _agv_progress_gate(transport_id, after_steps: int) -> bool:
+    """True once the transport has after_steps finished steps (or arrived); False if it failed."""
+    async for event in symovo_client.transport_events(transport_id):
+        if event["failed"]:
+            return False
+        if event["finished"] or event["steps_finished"] >= after_steps:
+            return True
+    return False
+
+
+async def _preposition(params, transport_id, speed, timer: _PhaseTimer) -> dict:
+    """
+    Движения, разрешённые конфигурацией во время езды AGV: лифт (с ограничением
+    высоты) и манипулятор в READY_SECTION_CENTER. Возвращает результаты по устройствам.
+    """
+    if not await timer.run("preposition_gate", _agv_progress_gate(transport_id, product_preposition_after_steps)):
+        return {}
+    moves = {}
+    if product_preposition_lift and params.lift_position_mm is not None:
+        position_cm = params.lift_position_mm / 10
+        if product_preposition_max_lift_cm is not None:
+            position_cm = min(position_cm, product_preposition_max_lift_cm)
+        moves["lift"] = timer.run(
+            "preposition_lift", devices.lift.move_to_position(position_cm, speed, speed, True)
+        )
+    if product_preposition_arm and params.manipulator_offsets:
+        moves["arm"] = timer.run(
+            "preposition_arm",
+            changePosition(xarm_positions.poses["READY_SECTION_CENTER"], velocity=speed, reset_faults=params.reset_faults),
+        )
+    results = await asyncio.gather(*moves.values(), return_exceptions=True)
+    return dict(zip(moves, results))
+
 
 async def move_robot_to_product(params) -> dict:
     """
     Бизнес-логика координированного движения к продукту.
-    Возвращает dict с ключами: success, agv_result, lift_result, manipulator_result.
+    Возвращает dict с ключами: success, agv_result, lift_result, manipulator_result, timing.
+    С params.preposition лифт и/или манипулятор (что разрешено в robot_params)
+    начинают движение, пока AGV ещё едет, после события прогресса транспорта.
     Не использует типы и объекты FastAPI!
     """
-    speed = params.velocity or 20
+    speed = params.velocity_percent or 20
     igus_result = None
     robot_result = None
     agv_result = None
+    timer = _PhaseTimer()
+    prepositioned = []
+
+    def result(success: bool, message: str) -> dict:
+        return {
+            "success": success,
+            "agv_result": agv_result,
+            "lift_result": igus_result,
+            "manipulator_result": robot_result,
+            "message": message,
+            "timing": timer.report(prepositioned),
+        }
 
     try:
-        # 1. AGV (если координаты указаны)
-        if params.location.x != 0 and params.location.y != 0 and params.location.theta != 0:
-            agv_result = symovo_client.move_to(
-                params.location.x,
-                params.location.y,
-                params.location.theta,
-                params.location.map_id,
-                speed,
-                True
-            )
-        # 2. Лифт
-        if params.lift_position is not None:
-            async with igus_client as _igus_client:
-                igus_result = await _igus_client.move_to_position(
-                    int(params.lift_position), speed, speed, params.blocking
+        async with devices:
+            # 1. AGV (если координаты указаны); координаты продукта в мм, AGV - в метрах.
+            # speed - проценты для лифта и манипулятора, как max_speed AGV (м/с) не передаём
+            location = params.location
+            preposition = None
+            if location.x_mm != 0 and location.y_mm != 0 and location.theta_rad != 0:
+                transport = await symovo_client.start_transport_async(
+                    location.x_mm / 1000, location.y_mm / 1000, location.theta_rad, location.map_id
                 )
+                if params.preposition and (product_preposition_lift or product_preposition_arm):
+                    preposition = asyncio.create_task(_preposition(params, transport["id"], speed, timer))
+                try:
+                    arrived = await timer.run("agv", symovo_client.wait_transport_async(transport["id"]))
+                except BaseException:
+                    if preposition is not None:
+                        # Предпозиционирование не прерываем посреди движения (и при отмене),
+                        # но наружу уходит исходная ошибка ожидания AGV
+                        try:
+                            await asyncio.shield(preposition)
+                        except Exception:
+                            pass
+                    raise
+                early = await asyncio.shield(preposition) if preposition is not None else {}
+                if transport_progress(arrived)["failed"]:
+                    agv_result = {"success": False, "details": f"Transport {transport['id']} failed"}
+                    return result(False, "AGV transport failed")
+                agv_result = {"success": True, "details": f"Transport {transport['id']} finished"}
+                for device, device_result in early.items():
+                    if isinstance(device_result, Exception):
+                        return result(False, f"Pre-positioning {device} failed: {device_result}")
+                    if device == "lift" and not device_result.get("success", False):
+                        igus_result = device_result
+                        return result(False, device_result.get("error", "Igus move failed"))
+                    prepositioned.append(device)
+            # 2. Лифт (до цели, если предпозиционирование было ограничено по высоте)
+            if params.lift_position_mm is not None:
+                igus_result = await timer.run("lift", devices.lift.move_to_position(
+                    params.lift_position_mm / 10, speed, speed, params.blocking
+                ))
                 if not igus_result.get("success", False):
-                    error_msg = igus_result.get("error", "Igus move failed")
-                    return {
-                        "success": False,
-                        "agv_result": agv_result,
-                        "lift_result": igus_result,
-                        "message": error_msg
-                    }
-        # 3. Манипулятор
-        if params.manipulator_offsets:
-            async with xarm_client as client:
-                await changePosition(
-                    client,
-                    position=xarm_positions.poses["READY_SECTION_CENTER"],
-                    speed=speed,
-                    wait=True
-                )
-                robot_result = await client.move_tool_position(
-                    params.manipulator_offsets.x_offset,
-                    params.manipulator_offsets.y_offset,
-                    params.manipulator_offsets.z_offset,
+                    return result(False, igus_result.get("error", "Igus move failed"))
+            # 3. Манипулятор
+            if params.manipulator_offsets:
+                if "arm" not in prepositioned:
+                    await timer.run("arm_ready", changePosition(
+                        xarm_positions.poses["READY_SECTION_CENTER"],
+                        velocity=speed,
+                        reset_faults=params.reset_faults
+                    ))
+                offsets = params.manipulator_offsets
+                robot_result = await timer.run("arm_offsets", devices.manipulator.move_tool_position(
+                    offsets.x_offset_mm,
+                    offsets.y_offset_mm,
+                    offsets.z_offset_mm,
                     velocity=speed,
                     blocking=params.blocking
-                )
+                ))
                 if not robot_result.get('success', False):
-                    return {
-                        "success": False,
-                        "agv_result": agv_result,
-                        "lift_result": igus_result,
-                        "manipulator_result": robot_result,
-                        "message": "Robot movement failed"
-                    }
+                    return result(False, "Robot movement failed")
 
-        return {
-            "success": True,
-            "agv_result": agv_result,
-            "lift_result": igus_result,
-            "manipulator_result": robot_result,
-            "message": ""
-        }
+        return result(True, "")
     except Exception as e:
-        return {
-            "success": False,
-            "agv_result": agv_result,
-            "lift_result": igus_result,
-            "manipulator_result": robot_result,
-            "message": str(e)
-        }
+        return result(False, str(e))
     
-async def changePosition(params) -> dict:
+async def changePosition(position: dict, velocity: float, blocking: bool = True, reset_faults: bool = False) -> bool:
     """Move the xArm through ready poses to a target position."""
-    try:
-        robot_result = await xarm_client.complex_move_with_joints_dict(
-            points=[xarm_positions.poses["READY_STEP_1"], xarm_positions.poses["READY_STEP_2"], position],
-            velocity=params.speed,
-            blocking=params.wait,
-            reset_faults=params.reset_faults
-        )
-        if not robot_result.get('success', False):
-            raise Exception(f"Robot movement failed: {robot_result}")
-        return True
-    except Exception as e:
-        raise Exception("Robot movement failed")
-
-async def get_robot_system_status() -> dict:
-    xarm_state = {}
-    igus_state = {}
-    agv_state = {"online": symovo_client.online}
-
-    async def fetch_xarm_state():
-        async with xarm_client as client:
-            state = await client.get_status()
-            return state
-
-    async def fetch_igus_state():
-        async with igus_client as client:
-            state = await client.get_status()
-            return state
-
-    async def fetch_symovo_state():
-        state = symovo_client.get_status()
-        return state
-        
-    results = await asyncio.gather(
-        fetch_xarm_state(), fetch_igus_state(),fetch_symovo_state(), return_exceptions=True
+    robot_result = await devices.manipulator.complex_move_with_joints_dict(
+        points=[xarm_positions.poses["READY_STEP_1"], xarm_positions.poses["READY_STEP_2"], position],
+        velocity=velocity,
+        blocking=blocking,
+        reset_faults=reset_faults
     )
+    if not robot_result.get('success', False):
+        raise Exception(f"Robot movement failed: {robot_result.get('error', '')}")
+    return True
 
-    def exc_details(e):
-        return {
-            "type": type(e).__name__,
-            "msg": str(e.args[0]),
-        }
+async def get_robot_system_status(max_age: Optional[float] = None) -> dict:
+    """Merged subsystem statuses from the background aggregator; max_age forces a refresh of older ones."""
+    statuses = await status_aggregator.get(max_age)
+    results = [statuses["xarm"], statuses["igus"], statuses["symovo"]]
 
     symovo_ready = (
         isinstance(results[2], SymovoStatusResponse)
-        and results[2].connected
-        and not results[2].has_error
-        and not results[2].has_err_warn
-        and results[2].error_code == 0
+        and results[2].online
+        and results[2].enabled is not False
     )
     xarm_ready = (
         isinstance(results[0], XarmStatusResponse)
@@ -342,5 +257,6 @@ async def get_robot_system_status() -> dict:
         "message": message,
         "xarm": results[0],
         "igus": results[1],
-        "symovo": results[2]
+        "symovo": results[2],
+        "age_s": status_aggregator.ages(),
     }
@@ -0,0 +1,122 @@
+"""
+Named robot sequences defined as data (core/robot_sequences.json).
+
+Each sequence is a list of steps:
+
+    {"name": "lift_up", "type": "lift", "position_cm": 40, "velocity_scale": 1.0, "after": []}
+    {"name": "arm_pose", "type": "arm_pose"}
+    {"name": "arm_to_box", "type": "arm", "poses": ["TRANSPORT_STEP_1", ...], "skip_if_at": "...", "after": [...]}
+    {"name": "lift_checked", "type": "check_lift", "position_cm": 40, "tolerance_cm": 0.25, "after": [...]}
+
+lift / arm steps may also declare "preconditions":
+[{"type": "lift_at", "position_cm": 40, "tolerance_cm": 0.25}, {"type": "lift_above", "position_cm": 20}].
+
+Sequences are compiled once into MotionPlans: pose names are resolved to
+joint dicts and the DAG is validated at load time, so a bad definition
+fails on startup and not in the middle of a motion.
+"""
+
+import copy
+import json
+from typing import Dict, List, Optional
+
+import drivers.xarm_driver.xarm_positions as xarm_positions
+from application.motion_plan import (
+    MotionPlan, MotionStep, PlanReport, Precondition,
+    lift_move, arm_move, arm_pose, check_step, lift_at, lift_above,
+)
+from core.configuration import robot_sequences_path
+from core.logger import server_logger
+
+DEFAULT_LIFT_TOLERANCE_CM = 0.25
+
+_plans: Optional[Dict[str, MotionPlan]] = None
+_descriptions: Dict[str, str] = {}
+
+
+def _precondition(data: dict) -> Precondition:
+    if data["type"] == "lift_at":
+        return lift_at(data["position_cm"], data.get("tolerance_cm", DEFAULT_LIFT_TOLERANCE_CM))
+    if data["type"] == "lift_above":
+        return lift_above(data["position_cm"])
+    raise ValueError(f"Unknown precondition type {data['type']}")
+
+
+def _pose(name: str) -> dict:
+    if name not in xarm_positions.poses:
+        raise ValueError(f"Unknown pose {name}")
+    # Копия: изменения словаря поз в рантайме не меняют скомпилированный план
+    return copy.deepcopy(xarm_positions.poses[name])
+
+
+def _compile_step(data: dict) -> MotionStep:
+    name = data["name"]
+    after = tuple(data.get("after", ()))
+    preconditions = tuple(_precondition(p) for p in data.get("preconditions", ()))
+    step_type = data["type"]
+    if step_type == "lift":
+        return lift_move(name, data["position_cm"], data.get("velocity_scale", 1.0), after, preconditions)
+    if step_type == "arm":
+        points = [_pose(pose) for pose in data["poses"]]
+        return arm_move(name, points, data.get("velocity_scale", 1.0), after, preconditions, data.get("skip_if_at"))
+    if step_type == "arm_pose":
+        return arm_pose(name)
+    if step_type == "check_lift":
+        return check_step(name, lift_at(data["position_cm"], data.get("tolerance_cm", DEFAULT_LIFT_TOLERANCE_CM)), after)
+    raise ValueError(f"Unknown step type {step_type}")
+
+
+def compile_sequences(definitions: dict) -> Dict[str, MotionPlan]:
+    plans = {}
+    for name, definition in definitions.items():
+        try:
+            plans[name] = MotionPlan([_compile_step(step) for step in definition["steps"]])
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Sequence {name}: {e}")
+    return plans
+
+
+def load_sequences(path: str = robot_sequences_path) -> Dict[str, MotionPlan]:
+    global _plans, _descriptions
+    with open(path, encoding="utf-8") as f:
+        definitions = json.load(f)
+    _plans = compile_sequences(definitions)
+    _descriptions = {name: definition.get("description", "") for name, definition in definitions.items()}
+    server_logger.log_event("info", f"Robot sequences loaded: {', '.join(_plans)}")
+    return _plans
+
+
+def get_sequence(name: str) -> Optional[MotionPlan]:
+    if _plans is None:
+        load_sequences()
+    return _plans.get(name)
+
+
+def list_sequences() -> List[dict]:
+    if _plans is None:
+        load_sequences()
+    return [
+        {"name": name, "description": _descriptions.get(name, ""), "steps": plan.order}
+        for name, plan in _plans.items()
+    ]
+
+
+async def run_sequence(name: str, velocity: float) -> PlanReport:
+    """Run a named sequence; raises KeyError for an unknown name."""
+    from core.state import devices
+    plan = get_sequence(name)
+    if plan is None:
+        raise KeyError(name)
+    async with devices:
+        return await plan.run({"velocity": velocity})
+
+
+async def run_sequence_command(name: str, velocity: float) -> dict:
+    report = await run_sequence(name, velocity)
+    return {
+        "success": report.success,
+        "sequence": name,
+        "results": {step: report.result(step) for step in report.steps},
+        "message": report.message,
+        "timing": report.timing(),
+    }
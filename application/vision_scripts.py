@@ -0,0 +1,125 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from core.state import depth_service, camera_model
+from drivers.realsense_driver.depth_aggregation import TemporalAggregator
+from drivers.realsense_driver.DepthSegmenter import DepthSegmenter
+
+# Результаты измерений по (seq кадра, параметры): одновременные запросы
+# к одному кадру ждут одно и то же вычисление
+_measurements: "OrderedDict[tuple, asyncio.Future]" = OrderedDict()
+MEASUREMENT_CACHE_SIZE = 64
+# Ширина кольца вокруг объекта для оценки опорной плоскости (px)
+PLANE_RING_PX = 12
+
+
+def _number(value) -> Optional[float]:
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _elevation(depth_image: np.ndarray, rect) -> Optional[float]:
+    """Median height (mm) of the box above the plane fitted to a ring of pixels around it."""
+    x, y, w, h = rect
+    x0, y0 = max(0, x - PLANE_RING_PX), max(0, y - PLANE_RING_PX)
+    x1 = min(depth_image.shape[1], x + w + PLANE_RING_PX)
+    y1 = min(depth_image.shape[0], y + h + PLANE_RING_PX)
+    ring = camera_model.deproject_roi(depth_image, (x0, y0, x1 - x0, y1 - y0))
+    ring[y - y0:y - y0 + h, x - x0:x - x0 + w] = np.nan
+    try:
+        plane = camera_model.fit_plane(ring)
+    except ValueError:
+        return None
+    return _number(np.nanmedian(camera_model.height_above_plane(depth_image, rect, plane)))
+
+
+def _measure(first_frame, x: int, y: int, frames: int, variance_threshold: Optional[float]) -> dict:
+    """Segment the object under (x, y) on first_frame and the following frames (blocking)."""
+    started = time.perf_counter()
+    segmenter = DepthSegmenter()
+    aggregator = TemporalAggregator(frames, key=6, variance_threshold=variance_threshold)
+
+    def add(image) -> bool:
+        data = segmenter.segment(image, x, y)
+        return data is not None and aggregator.add(data)
+
+    # first_frame - уже проверенная копия (measure_object); следующие копируем так же
+    first_image = first_frame.image
+    if not add(first_image) and frames > 1:
+        after = first_frame.seq
+        for _ in range(frames * 3):
+            frame = depth_service.copy_frame(depth_service.wait_frame(after))
+            after = frame.seq
+            if add(frame.image):
+                break
+    if not aggregator.count:
+        raise RuntimeError(f"No object found at ({x}, {y})")
+
+    rect_x, rect_y, w, h, depth, width_mm, height_mm = aggregator.result().tolist()
+    offset_x = rect_x + w / 2 - camera_model.ppx
+    offset_y = rect_y + h / 2 - camera_model.ppy
+    # depth - сырое значение сенсора, для перевода в мм нужна глубина в мм
+    depth_mm = float(camera_model.depth_mm(depth))
+    offset_x_mm, offset_y_mm = camera_model.pixels_to_mm(offset_x, offset_y, depth_mm)
+    rect = (int(rect_x), int(rect_y), int(round(w)), int(round(h)))
+    return {
+        "success": True,
+        "frame_seq": first_frame.seq,
+        "frames_used": aggregator.count,
+        "x": rect_x,
+        "y": rect_y,
+        "w": w,
+        "h": h,
+        "depth": depth,
+        "depth_mm": depth_mm,
+        "width_mm": _number(width_mm),
+        "height_mm": _number(height_mm),
+        "center_offset_px": [offset_x, offset_y],
+        "center_offset_mm": [offset_x_mm, offset_y_mm],
+        "elevation_mm": _elevation(first_image, rect),
+        "compute_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+async def measure_object(x: int = 320, y: int = 240, frames: int = 1, max_age: float = 0.5,
+                         variance_threshold: Optional[float] = None) -> dict:
+    """
+    Measure the object under pixel (x, y) on the shared depth frame cache.
+
+    Uses the latest frame if it is younger than max_age, otherwise waits for
+    a new one. Results are memoised per frame sequence number and parameters,
+    so concurrent callers asking about the same frame share one computation.
+    """
+    loop = asyncio.get_running_loop()
+    frame = depth_service.latest_frame(max_age)
+    if frame is None:
+        frame = await loop.run_in_executor(None, depth_service.wait_frame, depth_service.seq)
+    # Буфер кольца переиспользуется через кадр: копируем сразу, с проверкой поколения.
+    # Ключ кэша - seq копии (при порванной копии берётся более новый кадр)
+    frame = depth_service.copy_frame(frame)
+
+    key = (frame.seq, x, y, frames, variance_threshold)
+    future = _measurements.get(key)
+    shared = future is not None
+    if future is None:
+        future = loop.run_in_executor(None, _measure, frame, x, y, frames, variance_threshold)
+        _measurements[key] = future
+        while len(_measurements) > MEASUREMENT_CACHE_SIZE:
+            _measurements.popitem(last=False)
+    try:
+        result = await asyncio.shield(future)
+    except Exception:
+        # Ошибки не кэшируем
+        if _measurements.get(key) is future:
+            del _measurements[key]
+        raise
+    return {**result, "frame_age_s": round(time.time() - frame.timestamp, 3), "shared": shared}
+
+
+def get_depth_stream_metrics() -> dict:
+    return depth_service.get_metrics()
@@ -1,68 +1,152 @@
 # xarm_backend.py
 
 import asyncio
-from typing import Callable, Dict
-from core.state import xarm_manager
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional
+from core.logger import server_logger
+from core.state import xarm_manager, xarm_executor, xarm_teleop
+from drivers.xarm_driver.XArmCommandExecutor import PRIORITY_STOP, PRIORITY_MOTION, PRIORITY_TELEMETRY
 
 manipulator_lock = asyncio.Lock()
+# Цикл сервера, на котором живёт manipulator_lock (задаётся в main.lifespan)
+_server_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def bind_server_loop(loop: asyncio.AbstractEventLoop):
+    global _server_loop
+    _server_loop = loop
 
 async def guarded_manipulator_command(func: Callable, *args, **kwargs):
     if manipulator_lock.locked():
         raise RuntimeError("Manipulator_lock is busy")
+    if xarm_teleop.active:
+        raise RuntimeError("Teleoperation is active")
     async with manipulator_lock:
         return await _execute_manipulator_command(func, *args, **kwargs)
 
-async def _execute_manipulator_command(func: Callable, *args, **kwargs):
-    loop = asyncio.get_event_loop()
+def run_guarded_threadsafe(func: Callable, *args, timeout: float, priority: int = PRIORITY_MOTION, **kwargs):
+    """
+    guarded_manipulator_command for synchronous callers in worker threads: the
+    same teleop check and manipulator_lock as the REST path, result awaited
+    for at most timeout seconds. Must not be called on the server loop itself.
+    On timeout the command is cancelled (a motion is also stopped, so the
+    lock is released and the arm does not keep moving) and TimeoutError is raised.
+    """
+    loop = _server_loop
+    if loop is None or not loop.is_running():
+        # Сервер в этом процессе не запущен - REST-команд нет, остаётся проверка teleop
+        if xarm_teleop.active:
+            raise RuntimeError("Teleoperation is active")
+        future = xarm_executor.submit(func, args, kwargs, priority=priority)
+    else:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("run_guarded_threadsafe called on the server event loop")
+        coro = guarded_manipulator_command(func, *args, priority=priority, **kwargs)
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        if priority == PRIORITY_MOTION:
+            _abort_motion(timeout)
+        raise
+
+def _abort_motion(timeout: float):
+    """Stop the arm after a timed-out motion (drops queued motions, interrupts the running one)."""
+    def _stop():
+        return xarm_manager.get_instance().stop()
+    try:
+        xarm_executor.submit(_stop, priority=PRIORITY_STOP).result(timeout)
+    except Exception as e:
+        # Наружу уходит таймаут команды, а не ошибка стопа
+        server_logger.log_event("error", f"xArm stop after command timeout failed: {e}")
+
+async def _execute_manipulator_command(func: Callable, *args, priority: int = PRIORITY_MOTION, **kwargs):
     try:
-        result = await loop.run_in_executor(None, lambda: func(*args, **kwargs))
-        if hasattr(result, "result") and hasattr(result, "done"):
-            result = result.result(timeout=10)
-        return result
+        return await xarm_executor.run(func, args, kwargs, priority=priority)
     except Exception as e:
         raise RuntimeError(f"{func.__name__} failed: {e}")
 
+def _motion(method: str) -> Callable:
+    """Motion command run on the executor; a requested fault reset (recover()) runs there too, not on the loop."""
+    def command(params):
+        robot_main = xarm_manager.get_instance(reset=params.reset_faults)
+        return getattr(robot_main, method)(params)
+    command.__name__ = method
+    return command
+
 async def complex_move_with_joints(params):
-    robot_main = xarm_manager.get_instance(reset=params.reset_faults)
-    return await guarded_manipulator_command(robot_main.complex_move_with_joints, params)
+    return await guarded_manipulator_command(_motion("complex_move_with_joints"), params)
 
 async def move_with_joints(params):
-    robot_main = xarm_manager.get_instance(reset=params.reset_faults)
-    return await guarded_manipulator_command(robot_main.move_with_joints, params)
+    return await guarded_manipulator_command(_motion("move_with_joints"), params)
 
 async def move_to_pose(params):
-    robot_main = xarm_manager.get_instance(reset=params.reset_faults)
-    return await guarded_manipulator_command(robot_main.move_to_pose, params)
+    return await guarded_manipulator_command(_motion("move_to_pose"), params)
 
 async def move_tool_position(params):
-    robot_main = xarm_manager.get_instance(reset=params.reset_faults)
-    return await guarded_manipulator_command(robot_main.move_tool_position, params)
+    return await guarded_manipulator_command(_motion("move_tool_position"), params)
+
+async def stop_manipulator():
+    robot_main = xarm_manager.get_instance()
+
+    def _stop():
+        if xarm_teleop.active:
+            xarm_teleop.stop()
+        return robot_main.stop()
 
-def gripper_drop():
+    return await _execute_manipulator_command(_stop, priority=PRIORITY_STOP)
+
+async def gripper_drop():
     robot_main = xarm_manager.get_instance()
-    return robot_main.drop()
+    return await _execute_manipulator_command(robot_main.drop)
 
-def gripper_take():
+async def gripper_take():
     robot_main = xarm_manager.get_instance()
-    return robot_main.take()
+    return await _execute_manipulator_command(robot_main.take)
+
+async def reset_faults():
+    return await _execute_manipulator_command(xarm_manager.reset_faults)
 
-def reset_faults():
-    xarm_manager._create_new_instance()
+def get_connection_state():
+    return xarm_manager.get_connection_state()
+
+def get_executor_metrics():
+    return xarm_executor.get_metrics()
+
+async def get_manipulator_status():
     robot_main = xarm_manager.get_instance()
-    return robot_main.get_status()
+    return await _execute_manipulator_command(robot_main.get_status, priority=PRIORITY_TELEMETRY)
 
-def get_manipulator_status():
+async def get_current_position():
     robot_main = xarm_manager.get_instance()
-    return robot_main.get_status()
+    return await _execute_manipulator_command(robot_main.get_current_position, priority=PRIORITY_TELEMETRY)
 
-def get_current_position():
+async def get_joints_position():
     robot_main = xarm_manager.get_instance()
-    return robot_main.get_current_position()
+    return await _execute_manipulator_command(robot_main.get_joints_position, priority=PRIORITY_TELEMETRY)
 
-def get_joints_position():
+async def joystick_control(stream_data: Dict):
+    if xarm_teleop.active:
+        # Servo-режим: только обновляем целевую скорость, без get_status()
+        status = xarm_teleop.handle_joystick_stream(stream_data)
+        if status["gripper"] is not None:
+            # Захват - блокирующий вызов SDK, выполняем на исполнителе, а не на цикле
+            robot_main = xarm_manager.get_instance()
+            await _execute_manipulator_command(getattr(robot_main, status["gripper"]))
+        return status
     robot_main = xarm_manager.get_instance()
-    return robot_main.get_joints_position()
+    return await _execute_manipulator_command(robot_main.handle_joystick_stream, stream_data)
 
-def joystick_control(stream_data: Dict):
+async def teleop_start():
     robot_main = xarm_manager.get_instance()
-    return robot_main.handle_joystick_stream(stream_data)
+    return await guarded_manipulator_command(xarm_teleop.start, robot_main)
+
+async def teleop_stop():
+    return await _execute_manipulator_command(xarm_teleop.stop, priority=PRIORITY_STOP)
+
+def get_teleop_status():
+    return xarm_teleop.get_status()
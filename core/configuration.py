@@ -1,7 +1,12 @@
 """Central configuration module."""
 
+import os
+
 from .connection_config import *
 from .robot_params import *
 
 # Database configuration
 database_path = "database.db"
+
+# Declarative robot sequences (application/sequence_scripts)
+robot_sequences_path = os.path.join(os.path.dirname(__file__), "robot_sequences.json")
@@ -14,9 +14,45 @@ igus_motor_port = 512
 igus_ws_host = "0.0.0.0"
 igus_ws_port = 8020
 
+# Robot sequences: "inprocess" calls the device layers directly, "http" goes through the API clients
+device_facade_mode = "inprocess"
+
 web_server_host = "0.0.0.0"
 web_server_port = 8000
 
+# HTTP API clients (XarmClient / IgusClient): pooled session, timeouts in seconds
+api_client_pool_limit = 16
+api_client_keepalive_s = 30
+api_client_connect_timeout_s = 2.0
+api_client_status_timeout_s = 3.0
+api_client_command_timeout_s = 10.0
+api_client_motion_timeout_s = 120.0
+# Max wait (s) for a command of the sync xarm_command_operator entry point
+xarm_command_timeout_s = 120.0
+
+# Symovo AGV REST client: keep-alive pool and per-endpoint timeouts (s)
+agv_pool_limit = 8
+agv_keepalive_s = 30
+agv_status_timeout_s = 2.0
+agv_query_timeout_s = 10.0
+agv_command_timeout_s = 30.0
+agv_wait_timeout_s = 60.0
+# Подключение к AGV для long-poll: отдельно от ожидания ответа, чтобы недоступный AGV не считался пустым long-poll
+agv_connect_timeout_s = 5.0
+# Максимальное ожидание транспорта блокирующими вызовами (move_to, wait_transport)
+agv_transport_timeout_s = 600.0
+# Кэш jobs / stations / maps AGV: время жизни (s), после него - условный запрос (ETag)
+agv_metadata_ttl_s = 300.0
+# Фоновый опрос состояния AGV (s): часто во время движения, редко в простое
+agv_poll_moving_s = 0.5
+agv_poll_idle_s = 5.0
+
+# Background status refresh intervals (s) for /api/v1/robot/status
+status_refresh_xarm_s = 1.0
+status_refresh_igus_s = 1.0
+# AGV status is read from the poller snapshot (no request), so it can be copied often
+status_refresh_symovo_s = 0.5
+
 realsense_color_host = "0.0.0.0"
 realsense_color_port = 9998
 realsense_depth_host = "0.0.0.0"
@@ -15,7 +15,27 @@ tcp_acceleration = 5000
 angle_speed = 20
 angle_acceleration = 500
 
+# move_robot_to_product: pre-positioning while the AGV is still driving.
+# Enable per device only if the cell is safe for it (RobotMoveRequest.preposition requests it).
+product_preposition_lift = False
+product_preposition_arm = False              # xArm to READY_SECTION_CENTER
+product_preposition_after_steps = 0          # transport steps finished before pre-positioning starts
+product_preposition_max_lift_cm = None       # lift height limit while driving (None: target height)
+
+# Servo-mode joystick teleoperation
+teleop_control_rate = 100        # Hz
+teleop_watchdog_timeout = 0.3    # s without input before the arm stops
+teleop_linear_speed = 100        # mm/s
+teleop_angular_speed = 30        # deg/s
+
 # Camera/stream parameters
 camera_width = 640
 camera_height = 480
 camera_fps = 15
+
+# Depth camera intrinsics (RealSense depth stream, 640x480)
+camera_fx = 380.4253845214844
+camera_fy = 380.4253845214844
+camera_ppx = 320.0
+camera_ppy = 240.0
+camera_depth_scale = 0.9    # raw depth units -> mm
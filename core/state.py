@@ -3,23 +3,52 @@ from typing import Optional
 from models.task_manager import TaskManager
 from drivers.igus_driver.IgusMotorManager import IgusMotorManager
 from drivers.xarm_driver.XArmManager import XArmManager
+from drivers.xarm_driver.XArmCommandExecutor import XArmCommandExecutor
+from drivers.xarm_driver.XArmTeleop import XArmTeleop
+from drivers.realsense_driver.DepthFrameService import DepthFrameService
+from drivers.realsense_driver.CameraModel import CameraModel
 from core.logger import server_logger
 from typing import Dict
 
 from core.configuration import symovo_car_ip, symovo_car_number, igus_motor_ip, igus_motor_port, xarm_manipulator_ip
+from core.configuration import camera_depth_ws_url, camera_width, camera_height
+from core.configuration import device_facade_mode
+from core.configuration import status_refresh_xarm_s, status_refresh_igus_s, status_refresh_symovo_s
+from core.configuration import teleop_control_rate, teleop_watchdog_timeout, teleop_linear_speed, teleop_angular_speed
 
 from services.robot_clients import XarmClient
 from services.robot_clients import IgusClient
 from services.symovo_lib import AgvClient
+from services.device_facade import create_device_facade
+from services.status_aggregator import StatusAggregator
 
 task_manager = TaskManager()
 igus_manager = IgusMotorManager(ip_address=igus_motor_ip, port=igus_motor_port)
 xarm_manager = XArmManager(ip_address=xarm_manipulator_ip)
+xarm_executor = XArmCommandExecutor()
+xarm_teleop = XArmTeleop(
+    control_rate=teleop_control_rate,
+    watchdog_timeout=teleop_watchdog_timeout,
+    linear_speed=teleop_linear_speed,
+    angular_speed=teleop_angular_speed,
+)
+
+# Одна подписка на depth-камеру для всех измерений (подключается лениво)
+depth_service = DepthFrameService(camera_depth_ws_url, width=camera_width, height=camera_height)
+camera_model = CameraModel.from_config()
 
-# symovo_car.start_polling(interval=10)
 xarm_client = XarmClient()
 igus_client = IgusClient()
 symovo_client = AgvClient(ip=symovo_car_ip, robot_number=symovo_car_number)
+# Устройства для сценариев robot_scripts (без HTTP-петли на свой же сервер)
+devices = create_device_facade(device_facade_mode, xarm_client, igus_client)
+
+# Статусы подсистем обновляются в фоне (запуск в main.lifespan), /robot/status читает из памяти
+status_aggregator = StatusAggregator()
+status_aggregator.add("xarm", devices.manipulator.get_status, status_refresh_xarm_s)
+status_aggregator.add("igus", devices.lift.get_status, status_refresh_igus_s)
+# AGV: читаем снимок фонового опроса symovo_client (запуск опроса в main.lifespan)
+status_aggregator.add("symovo", symovo_client.get_state_status_async, status_refresh_symovo_s)
 
 
 virtual_joysticks: Dict[str, dict] = {}
@@ -0,0 +1,114 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class CameraModel:
+    """
+    Pinhole model of the depth camera.
+
+    Intrinsics are given once; per-pixel ray tables (x - ppx) / fx and
+    (y - ppy) / fy are precomputed, so deprojecting a whole ROI is a
+    multiplication of the depth values with two broadcast table slices:
+
+        X = depth * ray_x[x],  Y = depth * ray_y[y],  Z = depth
+
+    All lengths are in mm; raw depth is converted with depth_scale.
+    """
+
+    def __init__(
+        self,
+        fx: float,
+        fy: float,
+        ppx: Optional[float] = None,
+        ppy: Optional[float] = None,
+        width: int = 640,
+        height: int = 480,
+        depth_scale: float = 1.0,
+    ):
+        self.fx = fx
+        self.fy = fy
+        self.ppx = width / 2 if ppx is None else ppx
+        self.ppy = height / 2 if ppy is None else ppy
+        self.width = width
+        self.height = height
+        self.depth_scale = depth_scale
+
+        # Таблицы лучей: строка для X, столбец для Y (раскладываются по ROI без копий)
+        self.ray_x = ((np.arange(width) - self.ppx) / fx).reshape(1, width)
+        self.ray_y = ((np.arange(height) - self.ppy) / fy).reshape(height, 1)
+        for table in (self.ray_x, self.ray_y):
+            table.flags.writeable = False
+
+    @classmethod
+    def from_config(cls) -> "CameraModel":
+        from core.robot_params import (
+            camera_fx, camera_fy, camera_ppx, camera_ppy,
+            camera_width, camera_height, camera_depth_scale,
+        )
+        return cls(camera_fx, camera_fy, camera_ppx, camera_ppy, camera_width, camera_height, camera_depth_scale)
+
+    # ------------- DEPROJECTION -------------
+    def depth_mm(self, raw_depth):
+        return np.asarray(raw_depth, dtype=np.float64) * self.depth_scale
+
+    def deproject(self, x, y, raw_depth) -> np.ndarray:
+        """Pixel(s) + raw depth -> points (..., 3) in mm. Accepts scalars or arrays."""
+        z = self.depth_mm(raw_depth)
+        x = np.asarray(x)
+        y = np.asarray(y)
+        return np.stack([z * self.ray_x[0, x], z * self.ray_y[y, 0], z], axis=-1)
+
+    def deproject_roi(self, depth_image: np.ndarray, rect: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """
+        Deproject a rectangle of the depth image (whole frame if rect is None)
+        into an (h, w, 3) point grid in mm. Pixels without depth become NaN.
+        """
+        x, y, w, h = rect if rect is not None else (0, 0, depth_image.shape[1], depth_image.shape[0])
+        z = self.depth_mm(depth_image[y:y + h, x:x + w])
+        z[z == 0] = np.nan
+        points = np.empty(z.shape + (3,))
+        np.multiply(z, self.ray_x[:, x:x + w], out=points[..., 0])
+        np.multiply(z, self.ray_y[y:y + h, :], out=points[..., 1])
+        points[..., 2] = z
+        return points
+
+    # ------------- PIXEL <-> MM AT A DEPTH -------------
+    def pixels_to_mm(self, dx_px, dy_px, depth):
+        """Pixel offsets at the given depth -> offsets in mm (lateral, same units as depth)."""
+        return dx_px * depth / self.fx, dy_px * depth / self.fy
+
+    def mm_to_pixels(self, dx_mm, dy_mm, depth):
+        return dx_mm * self.fx / depth, dy_mm * self.fy / depth
+
+    def object_size(self, w_px, h_px, depth_mm):
+        """Size in mm of a w x h pixel box lying at depth_mm."""
+        return self.pixels_to_mm(w_px, h_px, depth_mm)
+
+    # ------------- POINT CLOUD MEASUREMENTS -------------
+    def distance(self, p1, p2, depth_image: np.ndarray) -> float:
+        """3D distance in mm between pixels p1=(x, y) and p2=(x, y)."""
+        (x1, y1), (x2, y2) = p1, p2
+        points = self.deproject([x1, x2], [y1, y2], depth_image[[y1, y2], [x1, x2]])
+        return float(np.linalg.norm(points[1] - points[0]))
+
+    @staticmethod
+    def fit_plane(points: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Least-squares plane through points (..., 3), NaNs ignored.
+        Returns (unit normal pointing towards the camera, offset d) with n.p + d = 0.
+        """
+        points = points.reshape(-1, 3)
+        points = points[~np.isnan(points).any(axis=1)]
+        if len(points) < 3:
+            raise ValueError("Not enough points to fit a plane")
+        centroid = points.mean(axis=0)
+        normal = np.linalg.svd(points - centroid, full_matrices=False)[2][2]
+        if normal[2] > 0:
+            normal = -normal
+        return normal, float(-normal @ centroid)
+
+    def height_above_plane(self, depth_image: np.ndarray, rect, plane) -> np.ndarray:
+        """Per-pixel height (mm) of a rectangle above a plane from fit_plane (NaN where no depth)."""
+        normal, d = plane
+        return self.deproject_roi(depth_image, rect) @ normal + d
@@ -0,0 +1,211 @@
+import base64
+import threading
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+from websocket import create_connection
+
+from core.logger import server_logger
+from drivers.realsense_driver import depth_codec
+
+
+class DepthFrame(NamedTuple):
+    seq: int
+    timestamp: float
+    image: np.ndarray
+
+
+class DepthFrameService:
+    """
+    Single upstream subscription to the depth camera WebSocket.
+
+    Frames are decoded into a small ring of preallocated uint16 buffers
+    (double-buffered by default), so all consumers share one decode.
+    latest_frame() / wait_frame() return read-only views; a view stays
+    valid until `buffers - 1` newer frames have arrived. copy_frame() and
+    next_frames() hand out copies checked against the ring generation, so
+    slow consumers never see a frame that is being overwritten.
+
+    The binary subprotocol is offered on every connect; if the handshake
+    completes without it (the base64 camera server) that connection is read
+    as base64. Connection errors are retried and never change the format.
+    """
+
+    def __init__(
+        self,
+        ws_url: str,
+        width: int = 640,
+        height: int = 480,
+        buffers: int = 2,
+        reconnect_interval: float = 2.0,
+        binary: bool = True,
+    ):
+        self.ws_url = ws_url
+        # Предлагаем бинарный формат; base64 остаётся запасным вариантом
+        self.binary = binary
+        self.width = width
+        self.height = height
+        self.frame_bytes = width * height * 2
+        # Длина base64-сообщения для кадра uint16
+        self.message_length = 4 * ((self.frame_bytes + 2) // 3)
+        self._reconnect_interval = reconnect_interval
+
+        self._buffers: List[np.ndarray] = [np.empty((height, width), dtype=np.uint16) for _ in range(buffers)]
+        for buffer in self._buffers:
+            buffer.flags.writeable = False
+        self._latest: Optional[DepthFrame] = None
+        self._seq = 0
+
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._connected = False
+        self._last_error = None
+        self._decode_ms = 0.0
+        self._dropped = 0
+        self._protocol = None
+
+    # ------------- LIFECYCLE -------------
+    def start(self) -> None:
+        """Start the upstream reader (idempotent, called lazily by consumers)."""
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._reader_loop, name="depth-frames", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+
+    def _connect(self):
+        if not self.binary:
+            self._protocol = None
+            return create_connection(self.ws_url, timeout=5)
+        # Подпротокол передаём заголовком, а не subprotocols=: websocket-client обрывает
+        # рукопожатие без него общей ошибкой, неотличимой от прочих. Так сервер без
+        # бинарного формата просто не вернёт заголовок, и соединение читается как base64
+        websocket = create_connection(
+            self.ws_url, timeout=5, header=[f"Sec-WebSocket-Protocol: {depth_codec.DEPTH_BINARY_SUBPROTOCOL}"]
+        )
+        protocol = (websocket.getheaders() or {}).get("sec-websocket-protocol")
+        self._protocol = protocol if protocol == depth_codec.DEPTH_BINARY_SUBPROTOCOL else None
+        return websocket
+
+    def _reader_loop(self) -> None:
+        while not self._stop_event.is_set():
+            websocket = None
+            try:
+                websocket = self._connect()
+                self._connected = True
+                self._last_error = None
+                server_logger.log_event(
+                    "info",
+                    f"Depth stream connected -> {self.ws_url} ({self._protocol or 'base64'})",
+                )
+                while not self._stop_event.is_set():
+                    self._on_message(websocket.recv())
+            except Exception as e:
+                self._last_error = str(e)
+                server_logger.log_event("error", f"Depth stream error: {e}")
+            finally:
+                self._connected = False
+                if websocket is not None:
+                    try:
+                        websocket.close()
+                    except Exception:
+                        pass
+            self._stop_event.wait(self._reconnect_interval)
+
+    def _on_message(self, message) -> None:
+        started = time.perf_counter()
+        if depth_codec.is_binary_frame(message):
+            header = depth_codec.decode_header(message)
+            if (header.width, header.height) != (self.width, self.height):
+                self._dropped += 1
+                return
+            decoded = depth_codec.decode_payload(message, header)
+        elif len(message) == self.message_length:
+            decoded = np.frombuffer(base64.b64decode(message), dtype=np.uint16)
+        else:
+            self._dropped += 1
+            return
+        buffer = self._buffers[(self._seq + 1) % len(self._buffers)]
+        # Пишем в задний буфер, читатели видят только передний
+        buffer.flags.writeable = True
+        np.copyto(buffer.reshape(-1), decoded)
+        buffer.flags.writeable = False
+        self._publish(buffer, started)
+
+    def _publish(self, buffer: np.ndarray, started: float) -> None:
+        with self._cond:
+            self._seq += 1
+            self._latest = DepthFrame(self._seq, time.time(), buffer)
+            self._decode_ms = (time.perf_counter() - started) * 1000
+            self._cond.notify_all()
+
+    # ------------- CONSUMER API -------------
+    @property
+    def seq(self) -> int:
+        """Sequence number of the latest frame (0 before the first one)."""
+        frame = self._latest
+        return frame.seq if frame is not None else 0
+
+    def latest_frame(self, max_age: Optional[float] = None) -> Optional[DepthFrame]:
+        """Return the most recent frame, or None if there is none (or it is older than max_age)."""
+        self.start()
+        frame = self._latest
+        if frame is None:
+            return None
+        if max_age is not None and time.time() - frame.timestamp > max_age:
+            return None
+        return frame
+
+    def wait_frame(self, after_seq: int = 0, timeout: float = 2.0) -> DepthFrame:
+        """Block until a frame newer than after_seq is available."""
+        self.start()
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._latest is not None and self._latest.seq > after_seq, timeout
+            ):
+                raise TimeoutError(f"No depth frame within {timeout}s ({self._last_error or 'no data'})")
+            return self._latest
+
+    def copy_frame(self, frame: DepthFrame) -> DepthFrame:
+        """
+        Private copy of a frame from latest_frame() / wait_frame(). The buffer of
+        frame k is rewritten while frame k + buffers is decoded, i.e. after frame
+        k + buffers - 1 was published; a copy is valid if that had not happened
+        when it finished. Otherwise the newest frame is copied instead, so the
+        returned seq may be newer than the one passed in.
+        """
+        while True:
+            image = frame.image.copy()
+            if self._seq <= frame.seq + len(self._buffers) - 2:
+                return frame._replace(image=image)
+            # Копия могла быть порвана записью - берём самый свежий кадр
+            frame = self._latest
+
+    def next_frames(self, n: int, timeout: float = 2.0) -> Iterator[DepthFrame]:
+        """Yield the next n new frames as they arrive (each one a private copy)."""
+        frame = self._latest
+        seq = frame.seq if frame is not None else 0
+        for _ in range(n):
+            frame = self.copy_frame(self.wait_frame(seq, timeout))
+            seq = frame.seq
+            yield frame
+
+    def get_metrics(self) -> Dict[str, Any]:
+        frame = self._latest
+        return {
+            "connected": self._connected,
+            "seq": frame.seq if frame else 0,
+            "age_s": round(time.time() - frame.timestamp, 3) if frame else None,
+            "decode_ms": round(self._decode_ms, 3),
+            "dropped": self._dropped,
+            "protocol": self._protocol or "base64",
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,103 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from drivers.realsense_driver.depth_analysis import calculate_object_size
+
+Rect = Tuple[int, int, int, int]
+
+
+class DepthSegmenter:
+    """
+    Segments the object under a seed pixel of a depth frame.
+
+    The object is the 8-connected region of pixels within +-threshold of the
+    seed depth (same rule as the former full-frame inRange + findContours +
+    pointPolygonTest). Instead of segmenting the whole frame, only a window is
+    labelled with connectedComponentsWithStats:
+
+    - the previous frame's rectangle plus a margin, when tracking;
+    - otherwise a rectangle found on a downsampled copy of the frame.
+
+    If the region touches the window border the window is grown (up to the
+    full frame) so the returned rectangle is never clipped.
+    """
+
+    def __init__(self, threshold: int = 10, downsample: int = 4, margin: int = 16):
+        self.threshold = threshold
+        self.downsample = downsample
+        self.margin = margin
+        self._last_rect: Optional[Rect] = None
+
+    def reset(self) -> None:
+        """Forget the tracked region (next frame starts with a coarse search)."""
+        self._last_rect = None
+
+    def segment(self, depth_image: np.ndarray, x: int, y: int):
+        """
+        :return: (x, y, w, h, depth, width_mm, height_mm) or None if there is no region
+        """
+        depth_value = int(depth_image[y, x])
+        lower_bound = max(0, depth_value - self.threshold)
+        upper_bound = depth_value + self.threshold
+
+        window = self._last_rect or self._coarse_rect(depth_image, x, y, lower_bound, upper_bound)
+        rect = self._segment_window(depth_image, x, y, lower_bound, upper_bound, window)
+        self._last_rect = rect
+        if rect is None:
+            return None
+
+        width_mm, height_mm = calculate_object_size(rect, depth_image)
+        return (*rect, depth_value, width_mm, height_mm)
+
+    def _coarse_rect(self, depth_image, x, y, lower_bound, upper_bound) -> Optional[Rect]:
+        step = self.downsample
+        if step <= 1:
+            return None
+        small = depth_image[::step, ::step]
+        sx = min(x // step, small.shape[1] - 1)
+        sy = min(y // step, small.shape[0] - 1)
+        rect = self._label(small, sx, sy, lower_bound, upper_bound)
+        if rect is None:
+            return None
+        rx, ry, rw, rh = rect
+        return rx * step, ry * step, rw * step, rh * step
+
+    def _segment_window(self, depth_image, x, y, lower_bound, upper_bound, window) -> Optional[Rect]:
+        height, width = depth_image.shape[:2]
+        margin = self.margin
+        if window is None:
+            x0, y0, x1, y1 = 0, 0, width, height
+        else:
+            wx, wy, ww, wh = window
+            x0, y0 = min(wx, x), min(wy, y)
+            x1, y1 = max(wx + ww, x + 1), max(wy + wh, y + 1)
+
+        while True:
+            x0, y0 = max(0, x0 - margin), max(0, y0 - margin)
+            x1, y1 = min(width, x1 + margin), min(height, y1 + margin)
+            rect = self._label(depth_image[y0:y1, x0:x1], x - x0, y - y0, lower_bound, upper_bound)
+            if rect is None:
+                return None
+            rx, ry, rw, rh = rect
+            # Область упирается в край окна (не кадра) - расширяем окно
+            clipped = (
+                (rx == 0 and x0 > 0)
+                or (ry == 0 and y0 > 0)
+                or (rx + rw == x1 - x0 and x1 < width)
+                or (ry + rh == y1 - y0 and y1 < height)
+            )
+            if not clipped:
+                return rx + x0, ry + y0, rw, rh
+            x0, y0, x1, y1 = x0 + rx, y0 + ry, x0 + rx + rw, y0 + ry + rh
+            margin *= 2
+
+    @staticmethod
+    def _label(image, x, y, lower_bound, upper_bound) -> Optional[Rect]:
+        mask = cv2.inRange(image, lower_bound, upper_bound)
+        if not mask[y, x]:
+            return None
+        _, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        rx, ry, rw, rh, _ = stats[labels[y, x]]
+        return int(rx), int(ry), int(rw), int(rh)
@@ -0,0 +1,71 @@
+"""
+Benchmark: vectorised calculate_object_size against the former per-pixel
+implementation (copied below unchanged apart from the name).
+
+    python drivers/realsense_driver/benchmark_depth_analysis.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + "/../.."))
+
+import numpy as np
+from drivers.realsense_driver.depth_analysis import calculate_object_size
+
+
+def legacy_calculate_object_size(rect, depth_image):
+    x, y, w, h = rect
+    fx = 380.4253845214844
+    fy = 380.4253845214844
+    depth_scale = 0.9
+    region = depth_image[y:y + h, x:x + w]
+    max_value = np.max(region)
+    num_ranges = 5
+    range_step = max_value / num_ranges
+    ranges = [(i * range_step, (i + 1) * range_step) for i in range(num_ranges)]
+    range_counts = {range_tuple: 0 for range_tuple in ranges}
+    for value in region.flatten():
+        for range_tuple in ranges:
+            if range_tuple[0] <= value <= range_tuple[1]:
+                range_counts[range_tuple] += 1
+                break
+    max_range = max(range_counts, key=range_counts.get)
+    for _ in range(2):
+        sub_range_step = (max_range[1] - max_range[0]) / 5
+        sub_ranges = [(max_range[0] + i * sub_range_step, max_range[0] + (i + 1) * sub_range_step) for i in range(5)]
+        sub_range_counts = {sub_range: 0 for sub_range in sub_ranges}
+        for value in region.flatten():
+            if max_range[0] <= value < max_range[1]:
+                for sub_range in sub_ranges:
+                    if sub_range[0] <= value < sub_range[1]:
+                        sub_range_counts[sub_range] += 1
+                        break
+        max_range = max(sub_range_counts, key=sub_range_counts.get)
+    values_in_max_sub_range = region[(region >= max_range[0]) & (region < max_range[1])]
+    object_depth = np.mean(values_in_max_sub_range) * depth_scale
+    return (w * object_depth) / fx, (h * object_depth) / fy
+
+
+def synthetic_frame(rng):
+    """640x480 uint16 frame: table at ~900 mm with a box at ~600 mm and noise."""
+    frame = rng.normal(900, 6, size=(480, 640))
+    frame[160:330, 220:430] = rng.normal(600, 4, size=(170, 210))
+    frame[rng.random(frame.shape) < 0.02] = 0
+    return np.clip(frame, 0, 65535).astype(np.uint16)
+
+
+def bench(func, rect, frames):
+    started = time.perf_counter()
+    results = [func(rect, frame) for frame in frames]
+    return (time.perf_counter() - started) / len(frames) * 1000, results
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    frames = [synthetic_frame(rng) for _ in range(10)]
+    for rect in [(220, 160, 210, 170), (0, 0, 640, 480)]:
+        legacy_ms, legacy = bench(legacy_calculate_object_size, rect, frames[:3])
+        vector_ms, vector = bench(calculate_object_size, rect, frames)
+        assert np.allclose(legacy, vector[:3]), (legacy, vector[:3])
+        print(f"rect={rect}: legacy {legacy_ms:.1f} ms/frame, vectorised {vector_ms:.2f} ms/frame "
+              f"({legacy_ms / vector_ms:.0f}x), 10-frame loop {legacy_ms * 10:.0f} ms -> {vector_ms * 10:.1f} ms")
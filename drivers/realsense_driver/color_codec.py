@@ -0,0 +1,38 @@
+"""
+Re-encoding of colour camera frames for bandwidth-limited clients.
+
+Upstream colour frames are JPEG images, sent either as binary messages or
+as base64 text; the output keeps the format of the input.
+"""
+
+import base64
+from typing import Union
+
+import cv2
+import numpy as np
+
+JPEG_MAGIC = b"\xff\xd8"
+
+
+class ColorTranscoder:
+    """Downscales a colour frame and re-encodes it as JPEG with the given quality."""
+
+    def __init__(self, scale: float = 1.0, quality: int = 80):
+        self.scale = scale
+        self.quality = quality
+
+    def __call__(self, message: Union[bytes, str]) -> Union[bytes, str]:
+        text = isinstance(message, str)
+        data = base64.b64decode(message) if text else bytes(message)
+        if not data.startswith(JPEG_MAGIC):
+            # Не JPEG - отдаём как есть
+            return message
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return message
+        if self.scale != 1.0:
+            image = cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return message
+        return base64.b64encode(encoded.tobytes()).decode("ascii") if text else encoded.tobytes()
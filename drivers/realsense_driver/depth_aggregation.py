@@ -0,0 +1,163 @@
+"""
+Temporal aggregation of depth frames or per-frame measurements.
+
+Samples (whole frames, ROIs or measurement rows such as the
+(x, y, w, h, depth, width_mm, height_mm) tuples of mouse_callback) are
+stacked along a new first axis and reduced in one NumPy call.
+"""
+
+import warnings
+from typing import Optional
+
+import numpy as np
+
+METHODS = ("mean", "trimmed_mean", "median", "percentile")
+
+
+def _trimmed_mean(data: np.ndarray, trim: float) -> np.ndarray:
+    """Per-element trimmed mean along axis 0, NaNs (invalid samples) are ignored."""
+    valid = np.sum(~np.isnan(data), axis=0)
+    cut = np.floor(valid * trim).astype(np.intp)
+    # Если после отсечения ничего не остаётся, берём медианный элемент
+    cut = np.where(valid - 2 * cut < 1, (valid - 1) // 2, cut)
+    keep = valid - 2 * cut
+
+    ordered = np.sort(data, axis=0)  # NaN уходят в конец
+    cumsum = np.cumsum(np.nan_to_num(ordered), axis=0)
+    cumsum = np.concatenate([np.zeros((1,) + data.shape[1:]), cumsum], axis=0)
+    upper = np.take_along_axis(cumsum, (cut + keep)[np.newaxis], axis=0)[0]
+    lower = np.take_along_axis(cumsum, cut[np.newaxis], axis=0)[0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(keep > 0, (upper - lower) / keep, np.nan)
+
+
+def aggregate(
+    samples,
+    method: str = "trimmed_mean",
+    trim: float = 0.2,
+    q: float = 50.0,
+    key: Optional[int] = None,
+    invalid: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Reduce a stack of samples along axis 0.
+
+    :param samples: Array-like of shape (n, ...) - frames, ROIs or measurement rows
+    :param method: mean, trimmed_mean, median or percentile
+    :param trim: Fraction cut from each end for trimmed_mean
+    :param q: Percentile for method="percentile"
+    :param key: For 2D measurement rows: rank whole rows by this column when
+                trimming, so every column of a kept row comes from the same frame
+    :param invalid: Sample value that means "no data" (0 for depth pixels)
+    :return: Aggregated sample, shape samples.shape[1:]
+    """
+    data = np.array(samples, dtype=np.float64)
+    if data.shape[0] == 0:
+        raise ValueError("No samples to aggregate")
+    if invalid is not None:
+        data[data == invalid] = np.nan
+    # Пиксели без единого валидного значения дают NaN без предупреждений
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return _reduce(data, method, trim, q, key)
+
+
+def _reduce(data: np.ndarray, method: str, trim: float, q: float, key: Optional[int]) -> np.ndarray:
+    if method == "mean":
+        return np.nanmean(data, axis=0)
+    if method == "median":
+        return np.nanmedian(data, axis=0)
+    if method == "percentile":
+        return np.nanpercentile(data, q, axis=0)
+    if method != "trimmed_mean":
+        raise ValueError(f"Unknown aggregation method: {method}")
+
+    if key is None:
+        return _trimmed_mean(data, trim)
+    n = data.shape[0]
+    cut = int(n * trim)
+    if n - 2 * cut < 1:
+        cut = (n - 1) // 2
+    order = np.argsort(data[:, key], kind="stable")
+    return np.nanmean(data[order[cut:n - cut]], axis=0)
+
+
+class TemporalAggregator:
+    """
+    Collects up to max_samples samples into a preallocated stack and reports
+    when enough have been seen: after min_samples, once the variance across
+    samples falls under variance_threshold (of the key column for measurement
+    rows, mean per-element variance otherwise).
+
+    Usage:
+        aggregator = TemporalAggregator(10, key=6, variance_threshold=0.25)
+        for frame in frames:
+            if aggregator.add(measure(frame)):
+                break
+        result = aggregator.result()
+    """
+
+    def __init__(
+        self,
+        max_samples: int,
+        method: str = "trimmed_mean",
+        trim: float = 0.2,
+        q: float = 50.0,
+        key: Optional[int] = None,
+        invalid: Optional[float] = None,
+        min_samples: int = 3,
+        variance_threshold: Optional[float] = None,
+        dtype=np.float64,
+    ):
+        if method not in METHODS:
+            raise ValueError(f"Unknown aggregation method: {method}")
+        self.max_samples = max_samples
+        self.method = method
+        self.trim = trim
+        self.q = q
+        self.key = key
+        self.invalid = invalid
+        self.min_samples = min(min_samples, max_samples)
+        self.variance_threshold = variance_threshold
+        self.dtype = dtype
+        self._stack: Optional[np.ndarray] = None
+        self.count = 0
+
+    def reset(self) -> None:
+        self.count = 0
+
+    def add(self, sample) -> bool:
+        """Add one sample; returns True once no more samples are needed."""
+        sample = np.asarray(sample)
+        if self._stack is None or self._stack.shape[1:] != sample.shape:
+            self._stack = np.empty((self.max_samples,) + sample.shape, dtype=self.dtype)
+            self.count = 0
+        if self.count < self.max_samples:
+            self._stack[self.count] = sample
+            self.count += 1
+        return self.done
+
+    @property
+    def samples(self) -> np.ndarray:
+        return self._stack[:self.count] if self._stack is not None else np.empty((0,))
+
+    @property
+    def done(self) -> bool:
+        if self.count >= self.max_samples:
+            return True
+        if self.variance_threshold is None or self.count < self.min_samples:
+            return False
+        return self.variance() <= self.variance_threshold
+
+    def variance(self) -> float:
+        data = np.array(self.samples, dtype=np.float64)
+        if self.invalid is not None:
+            data[data == self.invalid] = np.nan
+        if self.key is not None:
+            data = data[:, self.key]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return float(np.nanmean(np.nanvar(data, axis=0)))
+
+    def result(self) -> np.ndarray:
+        return aggregate(self.samples, self.method, self.trim, self.q, self.key, self.invalid)
@@ -0,0 +1,77 @@
+"""Vectorised helpers for analysing RealSense depth frames."""
+
+import numpy as np
+
+from core.robot_params import camera_fx, camera_fy, camera_depth_scale
+
+# Параметры камеры (см. CameraModel для полного набора интринсиков)
+FX = camera_fx
+FY = camera_fy
+DEPTH_SCALE = camera_depth_scale
+
+NUM_RANGES = 5
+
+
+def _coarse_bin(values: np.ndarray, max_value: float):
+    """
+    First level of the mode search: NUM_RANGES closed bins [i*step, (i+1)*step]
+    over 0..max_value, a value on an edge belongs to the lower bin.
+    Returns (low, high) of the most populated bin.
+    """
+    step = max_value / NUM_RANGES
+    upper = np.array([(i + 1) * step for i in range(NUM_RANGES)])
+    # Первая верхняя граница >= value, как в исходном переборе диапазонов
+    idx = np.searchsorted(upper, values, side="left")
+    counts = np.bincount(idx, minlength=NUM_RANGES + 1)[:NUM_RANGES]
+    best = int(np.argmax(counts))
+    return best * step, (best + 1) * step
+
+
+def _fine_bin(values: np.ndarray, low: float, high: float):
+    """
+    Refinement level: only values in [low, high) are split into NUM_RANGES
+    half-open sub-bins. Returns (low, high) of the most populated sub-bin.
+    """
+    step = (high - low) / NUM_RANGES
+    upper = np.array([low + (i + 1) * step for i in range(NUM_RANGES)])
+    inside = values[(values >= low) & (values < high)]
+    idx = np.searchsorted(upper, inside, side="right")
+    counts = np.bincount(idx, minlength=NUM_RANGES + 1)[:NUM_RANGES]
+    best = int(np.argmax(counts))
+    return low + best * step, low + (best + 1) * step
+
+
+def dominant_depth(region: np.ndarray) -> float:
+    """
+    Mean raw depth of the dominant depth band of a region.
+
+    Coarse-to-fine mode search (5 bins, then 5 sub-bins twice) followed by
+    the mean of the values in the winning sub-bin. Same result as the
+    former per-pixel loops, computed with searchsorted/bincount.
+    """
+    values = region.ravel()
+    max_value = float(values.max())
+    low, high = _coarse_bin(values, max_value)
+    low, high = _fine_bin(values, low, high)
+    low, high = _fine_bin(values, low, high)
+    selected = values[(values >= low) & (values < high)]
+    if selected.size == 0:
+        return float("nan")
+    return float(selected.mean())
+
+
+def calculate_object_size(rect, depth_image, fx: float = FX, fy: float = FY, depth_scale: float = DEPTH_SCALE):
+    """
+    Рассчитывает реальные размеры объекта в мм на основе координат прямоугольника и карты глубины.
+
+    :param rect: Координаты прямоугольника (x, y, w, h)
+    :param depth_image: Текущая глубинная карта (numpy array)
+    :return: Ширина и высота объекта в мм
+    """
+    x, y, w, h = rect
+    region = depth_image[y:y + h, x:x + w]
+    object_depth = dominant_depth(region) * depth_scale
+
+    width_mm = (w * object_depth) / fx
+    height_mm = (h * object_depth) / fy
+    return width_mm, height_mm
@@ -0,0 +1,153 @@
+"""
+Depth frame wire formats.
+
+Binary frame (preferred): 28-byte little-endian header followed by the
+payload, optionally zlib or LZ4 compressed.
+
+    magic    4s  b"DPTH"
+    version  B   1
+    dtype    B   1 = uint16
+    codec    B   0 = raw, 1 = zlib, 2 = lz4
+    reserved B
+    seq      I   frame sequence number
+    ts       d   capture timestamp (epoch, s)
+    width    H
+    height   H
+    length   I   payload length in bytes
+
+Legacy text frame (fallback): base64 of the raw uint16 frame.
+The binary format is negotiated with the DEPTH_BINARY_SUBPROTOCOL
+WebSocket subprotocol; decoders accept both formats.
+"""
+
+import base64
+import struct
+import time
+import zlib
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # lz4 is optional
+    lz4_frame = None
+
+DEPTH_BINARY_SUBPROTOCOL = "depth.binary.v1"
+
+MAGIC = b"DPTH"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBBIdHHI")
+
+DTYPES = {1: np.uint16}
+DTYPE_CODES = {np.dtype(np.uint16): 1}
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_LZ4 = 2
+CODECS = {"raw": CODEC_RAW, "zlib": CODEC_ZLIB, "lz4": CODEC_LZ4}
+
+
+def negotiate_codec(name: Optional[str]) -> int:
+    """Map a requested compression name to a codec available here (LZ4 falls back to zlib)."""
+    codec = CODECS.get((name or "raw").lower(), CODEC_RAW)
+    if codec == CODEC_LZ4 and lz4_frame is None:
+        return CODEC_ZLIB
+    return codec
+
+
+class DepthFrameHeader(NamedTuple):
+    seq: int
+    timestamp: float
+    width: int
+    height: int
+    dtype: np.dtype
+    codec: int
+
+
+def is_binary_frame(message: Union[bytes, str]) -> bool:
+    return isinstance(message, (bytes, bytearray, memoryview)) and bytes(message[:4]) == MAGIC
+
+
+def encode_frame(image: np.ndarray, seq: int, timestamp: Optional[float] = None, codec: int = CODEC_RAW) -> bytes:
+    """Encode a depth image into a binary frame."""
+    payload = np.ascontiguousarray(image).tobytes()
+    if codec == CODEC_ZLIB:
+        payload = zlib.compress(payload, 1)
+    elif codec == CODEC_LZ4:
+        if lz4_frame is None:
+            raise RuntimeError("lz4 is not installed")
+        payload = lz4_frame.compress(payload)
+    height, width = image.shape
+    header = HEADER.pack(
+        MAGIC, VERSION, DTYPE_CODES[image.dtype], codec, 0,
+        seq & 0xFFFFFFFF, time.time() if timestamp is None else timestamp,
+        width, height, len(payload),
+    )
+    return header + payload
+
+
+def decode_header(message: bytes) -> DepthFrameHeader:
+    magic, version, dtype, codec, _, seq, ts, width, height, length = HEADER.unpack_from(message)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a depth frame")
+    if len(message) - HEADER.size != length:
+        raise ValueError(f"Truncated depth frame: {len(message) - HEADER.size} of {length} bytes")
+    return DepthFrameHeader(seq, ts, width, height, np.dtype(DTYPES[dtype]), codec)
+
+
+def decode_payload(message: bytes, header: DepthFrameHeader) -> np.ndarray:
+    """Return the frame pixels as a flat array (a view on the message when uncompressed)."""
+    payload = memoryview(message)[HEADER.size:]
+    if header.codec == CODEC_ZLIB:
+        payload = zlib.decompress(payload)
+    elif header.codec == CODEC_LZ4:
+        if lz4_frame is None:
+            raise RuntimeError("lz4 is not installed")
+        payload = lz4_frame.decompress(payload)
+    return np.frombuffer(payload, dtype=header.dtype)
+
+
+def decode_message(message: Union[bytes, str], width: int = 640, height: int = 480) -> np.ndarray:
+    """Decode a binary or legacy base64 message into a (height, width) array."""
+    if is_binary_frame(message):
+        header = decode_header(message)
+        return decode_payload(message, header).reshape((header.height, header.width))
+    return np.frombuffer(base64.b64decode(message), dtype=np.uint16).reshape((height, width))
+
+
+class DepthTranscoder:
+    """
+    Converts upstream depth messages to the format a client negotiated,
+    optionally decimated (every n-th pixel in both directions).
+    Used by the /depth route; messages already in the target format pass through.
+    """
+
+    def __init__(self, binary: bool, codec: int = CODEC_RAW, width: int = 640, height: int = 480, decimation: int = 1):
+        self.binary = binary
+        self.codec = codec
+        self.width = width
+        self.height = height
+        self.decimation = max(1, decimation)
+        self._seq = 0
+
+    def __call__(self, message: Union[bytes, str]) -> Union[bytes, str]:
+        if is_binary_frame(message):
+            header = decode_header(message)
+            if self.binary and header.codec == self.codec and self.decimation == 1:
+                return message
+            image = decode_payload(message, header).reshape((header.height, header.width))
+            seq, timestamp = header.seq, header.timestamp
+        else:
+            if not isinstance(message, str) or len(message) != 4 * ((self.width * self.height * 2 + 2) // 3):
+                return message
+            if not self.binary and self.decimation == 1:
+                return message
+            self._seq += 1
+            image = np.frombuffer(base64.b64decode(message), dtype=np.uint16).reshape((self.height, self.width))
+            seq, timestamp = self._seq, None
+        if self.decimation > 1:
+            image = np.ascontiguousarray(image[::self.decimation, ::self.decimation])
+        if self.binary:
+            return encode_frame(image, seq, timestamp, self.codec)
+        return base64.b64encode(image.tobytes()).decode("ascii")
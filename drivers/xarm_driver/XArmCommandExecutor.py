@@ -0,0 +1,211 @@
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+PRIORITY_STOP = 0
+PRIORITY_MOTION = 1
+PRIORITY_TELEMETRY = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_STOP: "stop",
+    PRIORITY_MOTION: "motion",
+    PRIORITY_TELEMETRY: "telemetry",
+}
+
+
+class XArmCommand:
+    def __init__(
+        self,
+        func: Callable,
+        args: tuple = (),
+        kwargs: dict = None,
+        priority: int = PRIORITY_MOTION,
+        future: Optional[Future] = None,
+    ):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class XArmCommandExecutor:
+    """
+    Single owned worker thread for all xArm SDK calls (same model as
+    IgusMotorManager). Commands are served by priority class
+    stop > motion > telemetry, FIFO inside a class.
+
+    A stop command also cancels queued motion commands, and if the worker
+    is busy with a blocking move it is handed to a separate stop thread so
+    it can interrupt that move. Stop commands never run on the caller's
+    thread (e.g. the event loop) and are serialised among themselves.
+    """
+
+    def __init__(self, latency_window: int = 200):
+        self._cmd_queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._stop_event = threading.Event()
+        self._metrics_lock = threading.Lock()
+        self._running: Optional[XArmCommand] = None
+        # Стопы во время занятого воркера: отдельный поток, не поток вызывающего
+        self._stop_queue: "queue.Queue" = queue.Queue()
+
+        # Метрики по классам приоритета
+        self._pending = {p: 0 for p in PRIORITY_NAMES}
+        self._completed = {p: 0 for p in PRIORITY_NAMES}
+        self._failed = {p: 0 for p in PRIORITY_NAMES}
+        self._wait_ms = {p: deque(maxlen=latency_window) for p in PRIORITY_NAMES}
+        self._exec_ms = {p: deque(maxlen=latency_window) for p in PRIORITY_NAMES}
+
+        self._worker_thread = threading.Thread(target=self._worker, name="xarm-executor", daemon=True)
+        self._worker_thread.start()
+        self._stop_thread = threading.Thread(target=self._stop_worker, name="xarm-stop", daemon=True)
+        self._stop_thread.start()
+
+    def _worker(self):
+        while not self._stop_event.is_set():
+            try:
+                _, _, cmd = self._cmd_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            with self._metrics_lock:
+                self._pending[cmd.priority] -= 1
+            # Пропускаем команды, отменённые вызывающей стороной
+            if not cmd.future.set_running_or_notify_cancel():
+                continue
+            self._running = cmd
+            try:
+                self._execute(cmd)
+            finally:
+                self._running = None
+
+    def _stop_worker(self):
+        while not self._stop_event.is_set():
+            try:
+                cmd = self._stop_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if cmd.future.set_running_or_notify_cancel():
+                self._execute(cmd)
+
+    def _execute(self, cmd: XArmCommand):
+        started = time.monotonic()
+        try:
+            result = cmd.func(*cmd.args, **cmd.kwargs)
+            ok = True
+        except Exception as e:
+            result = e
+            ok = False
+        finished = time.monotonic()
+        with self._metrics_lock:
+            self._wait_ms[cmd.priority].append((started - cmd.enqueued_at) * 1000)
+            self._exec_ms[cmd.priority].append((finished - started) * 1000)
+            if ok:
+                self._completed[cmd.priority] += 1
+            else:
+                self._failed[cmd.priority] += 1
+        if ok:
+            cmd.future.set_result(result)
+        else:
+            cmd.future.set_exception(result)
+
+    def _cancel_pending(self, priority: int, reason: str) -> int:
+        """Drop all queued commands of the given priority class."""
+        kept = []
+        cancelled = 0
+        while True:
+            try:
+                item = self._cmd_queue.get_nowait()
+            except queue.Empty:
+                break
+            cmd = item[2]
+            if cmd.priority == priority:
+                if cmd.future.set_running_or_notify_cancel():
+                    cmd.future.set_exception(RuntimeError(reason))
+                cancelled += 1
+            else:
+                kept.append(item)
+        for item in kept:
+            self._cmd_queue.put(item)
+        with self._metrics_lock:
+            self._pending[priority] -= cancelled
+        return cancelled
+
+    # ------------- PUBLIC API -------------
+    def submit(
+        self,
+        func: Callable,
+        args: tuple = (),
+        kwargs: dict = None,
+        priority: int = PRIORITY_MOTION,
+    ) -> Future:
+        """Queue a command; returns a concurrent.futures.Future with its result."""
+        if self._stop_event.is_set():
+            raise RuntimeError("xArm executor is shut down")
+        future = Future()
+        cmd = XArmCommand(func, args, kwargs, priority=priority, future=future)
+        if priority == PRIORITY_STOP:
+            self._cancel_pending(PRIORITY_MOTION, "Cancelled by stop command")
+            if self._running is not None:
+                # Воркер занят блокирующим движением: стоп выполняет поток стопов
+                self._stop_queue.put(cmd)
+                return future
+        with self._metrics_lock:
+            self._pending[priority] += 1
+        self._cmd_queue.put((priority, next(self._counter), cmd))
+        return future
+
+    async def run(
+        self,
+        func: Callable,
+        args: tuple = (),
+        kwargs: dict = None,
+        priority: int = PRIORITY_MOTION,
+    ) -> Any:
+        """Awaitable version of submit()."""
+        return await asyncio.wrap_future(self.submit(func, args, kwargs, priority))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        def _stats(values):
+            if not values:
+                return {"avg": 0.0, "max": 0.0}
+            return {"avg": round(sum(values) / len(values), 3), "max": round(max(values), 3)}
+
+        running = self._running
+        with self._metrics_lock:
+            return {
+                "queue_depth": self._cmd_queue.qsize(),
+                "running": PRIORITY_NAMES[running.priority] if running else None,
+                "classes": {
+                    name: {
+                        "pending": self._pending[p],
+                        "completed": self._completed[p],
+                        "failed": self._failed[p],
+                        "wait_ms": _stats(self._wait_ms[p]),
+                        "exec_ms": _stats(self._exec_ms[p]),
+                    }
+                    for p, name in PRIORITY_NAMES.items()
+                },
+            }
+
+    def shutdown(self):
+        self._stop_event.set()
+        if self._worker_thread.is_alive():
+            self._worker_thread.join(timeout=2)
+        if self._stop_thread.is_alive():
+            self._stop_thread.join(timeout=2)
+        while True:
+            try:
+                cmd = self._stop_queue.get_nowait()
+            except queue.Empty:
+                break
+            if cmd.future.set_running_or_notify_cancel():
+                cmd.future.set_exception(RuntimeError("xArm executor is shut down"))
+        for priority in PRIORITY_NAMES:
+            self._cancel_pending(priority, "xArm executor is shut down")
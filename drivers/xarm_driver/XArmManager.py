@@ -1,30 +1,169 @@
 from xarm.wrapper import XArmAPI
 import threading
+import time
+from typing import Any, Dict, Optional
 from drivers.xarm_driver.xarm_manipulator import RobotMain
 
+
 class XArmManager:
-    def __init__(self, ip_address):
+    """
+    Owns the single xArm connection.
+
+    The connection is opened lazily by a background monitor thread, which
+    also probes the arm health (from the SDK report data, no extra socket
+    calls) and reconnects the existing XArmAPI object when the socket drops.
+    Callers never wait for a reconnect: get_instance() raises immediately
+    if the arm is not available and the current state is published via
+    get_connection_state().
+    """
+
+    DISCONNECTED = "disconnected"
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    RECOVERING = "recovering"
+    FAULT = "fault"
+
+    def __init__(
+        self,
+        ip_address,
+        health_interval: float = 1.0,
+        reconnect_interval: float = 5.0,
+        auto_recover: bool = False,
+    ):
         self.ip_address = ip_address
-        self._lock = threading.RLock()    # <--- исправлено!
-        self._instance = None
-        self._create_new_instance()
+        self._lock = threading.RLock()
+        self._status_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wakeup_event = threading.Event()
+        self._instance: Optional[RobotMain] = None
+        self._monitor_thread = None
+
+        # Connection management parameters
+        self._health_interval = health_interval
+        self._reconnect_interval = reconnect_interval
+        self._auto_recover = auto_recover
+
+        # Published connection state
+        self._state = self.DISCONNECTED
+        self._error_code = 0
+        self._last_error = None
+        self._last_check = None
+        self._reconnects = 0
+
+        self._start_monitor_thread()
+
+    # ------------- CONNECTION MONITOR -------------
+    def _start_monitor_thread(self) -> None:
+        """Launch the background connection/health monitor."""
+        if self._monitor_thread and self._monitor_thread.is_alive():
+            return
+        self._monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
+        self._monitor_thread.start()
 
-    def get_instance(self, reset: bool = False):
+    def _monitor_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self._check_health()
+            except Exception as e:
+                self._publish(self.DISCONNECTED, last_error=str(e))
+            interval = (
+                self._health_interval
+                if self.state in (self.CONNECTED, self.FAULT)
+                else self._reconnect_interval
+            )
+            self._wakeup_event.wait(interval)
+            self._wakeup_event.clear()
+
+    def _check_health(self) -> None:
+        instance = self._instance
+        if instance is None:
+            self._publish(self.CONNECTING)
+            # Первое подключение: создаём XArmAPI и RobotMain один раз
+            arm = XArmAPI(self.ip_address, baud_checkset=False)
+            instance = RobotMain(arm)
+            with self._lock:
+                self._instance = instance
+        elif not instance.arm.connected:
+            self._publish(self.CONNECTING)
+            # Переподключаем тот же XArmAPI, колбэки и gripper сохраняются
+            instance.arm.connect()
+            with self._status_lock:
+                self._reconnects += 1
+            instance.recover()
+
+        arm = instance.arm
+        if arm.error_code != 0:
+            if self._auto_recover:
+                self.reset_faults()
+                return
+            self._publish(self.FAULT, error_code=arm.error_code)
+        else:
+            self._publish(self.CONNECTED)
+
+    def _publish(self, state: str, error_code: int = 0, last_error: Optional[str] = None) -> None:
+        with self._status_lock:
+            self._state = state
+            self._error_code = error_code
+            if last_error is not None or state == self.CONNECTED:
+                self._last_error = last_error
+            self._last_check = time.time()
+
+    # ------------- PUBLIC API -------------
+    @property
+    def state(self) -> str:
+        with self._status_lock:
+            return self._state
+
+    def get_connection_state(self) -> Dict[str, Any]:
+        with self._status_lock:
+            return {
+                "state": self._state,
+                "connected": self._state in (self.CONNECTED, self.FAULT, self.RECOVERING),
+                "error_code": self._error_code,
+                "last_error": self._last_error,
+                "last_check": self._last_check,
+                "reconnects": self._reconnects,
+            }
+
+    def get_instance(self, reset: bool = False) -> RobotMain:
+        """
+        Return the connected RobotMain without blocking.
+        With reset=True faults are cleared on the existing connection.
+        """
+        instance = self._instance
+        if instance is None or not instance.arm.connected:
+            # Будим монитор, но не ждём переподключения
+            self._wakeup_event.set()
+            raise RuntimeError(f"xArm is not connected (state={self.state})")
+        if reset:
+            self.reset_faults()
+        return instance
+
+    def reset_faults(self) -> Dict[str, Any]:
+        """Clean errors and re-enable motion over the current socket."""
+        instance = self._instance
+        if instance is None or not instance.arm.connected:
+            self._wakeup_event.set()
+            raise RuntimeError(f"xArm is not connected (state={self.state})")
         with self._lock:
-            if (
-                not reset
-                and self._instance is not None
-                and self._instance._arm.connected
-            ):
-                return self._instance
-            self._create_new_instance()
-            return self._instance
-
-    def _create_new_instance(self):
+            self._publish(self.RECOVERING)
+            try:
+                instance.recover()
+            finally:
+                arm = instance.arm
+                if arm.error_code != 0:
+                    self._publish(self.FAULT, error_code=arm.error_code)
+                else:
+                    self._publish(self.CONNECTED)
+        return instance.get_status()
+
+    def shutdown(self):
+        self._stop_event.set()
+        self._wakeup_event.set()
+        if self._monitor_thread and self._monitor_thread.is_alive():
+            self._monitor_thread.join(timeout=2)
         self._disconnect_instance()
-        arm = XArmAPI(self.ip_address, baud_checkset=False)
-        arm.get_robot_sn()
-        self._instance = RobotMain(arm)
+        self._publish(self.DISCONNECTED)
 
     def _disconnect_instance(self):
         with self._lock:
@@ -0,0 +1,211 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from core.logger import server_logger
+
+SERVO_MODE = 1
+POSITION_MODE = 0
+STATE_READY = 0
+STATE_STOP = 4
+
+AXES = ("x", "y", "z", "roll", "pitch", "yaw")
+
+
+class XArmTeleop:
+    """
+    Servo-mode (mode 1) Cartesian teleoperation.
+
+    Joystick packets only update a target velocity in the tool frame (the
+    same frame the former set_tool_position(relative=True) jog used). A
+    dedicated control thread turns it into a per-tick increment at a fixed
+    rate and streams it with set_servo_cartesian(is_tool_coord=True). If no
+    input arrives for watchdog_timeout seconds the velocity is zeroed, no
+    increments are sent and the arm holds its position.
+    """
+
+    def __init__(
+        self,
+        control_rate: float = 100.0,
+        watchdog_timeout: float = 0.3,
+        linear_speed: float = 100.0,
+        angular_speed: float = 30.0,
+        deadzone: float = 0.05,
+    ):
+        self.control_rate = control_rate
+        self.watchdog_timeout = watchdog_timeout
+        self.linear_speed = linear_speed      # mm/s
+        self.angular_speed = angular_speed    # deg/s
+        self.deadzone = deadzone
+
+        self._robot = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._velocity = [0.0] * 6
+        self._last_input = 0.0
+        # Суммарное смещение в системе инструмента с момента старта (для статуса)
+        self._offset: List[float] = [0.0] * 6
+        self._stale = True
+        self._ticks = 0
+        self._overruns = 0
+        self._last_error = None
+        self._gripper_pressed = None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ------------- LIFECYCLE -------------
+    def start(self, robot_main) -> bool:
+        """Switch the arm into servo mode and start streaming tool-frame increments."""
+        if self.active:
+            return True
+        arm = robot_main.arm
+        if not arm.connected or arm.error_code != 0:
+            raise RuntimeError("manipulator is not alive")
+        arm.set_mode(SERVO_MODE)
+        arm.set_state(STATE_READY)
+
+        with self._lock:
+            self._robot = robot_main
+            self._offset = [0.0] * 6
+            self._velocity = [0.0] * 6
+            self._last_input = 0.0
+            self._stale = True
+            self._ticks = 0
+            self._overruns = 0
+            self._last_error = None
+            self._gripper_pressed = None
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._control_loop, name="xarm-teleop", daemon=True)
+        self._thread.start()
+        server_logger.log_event("info", f"xArm teleop started at {self.control_rate:.0f} Hz")
+        return True
+
+    def stop(self) -> bool:
+        """Stop streaming and return the arm to position mode."""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+        self._restore_position_mode()
+        server_logger.log_event("info", "xArm teleop stopped")
+        return True
+
+    def _restore_position_mode(self):
+        robot = self._robot
+        if robot is not None and robot.arm.connected:
+            robot.arm.set_mode(POSITION_MODE)
+            robot.arm.set_state(STATE_READY)
+
+    # ------------- INPUT -------------
+    def set_velocity(self, velocity: List[float]) -> None:
+        """Set target velocity [mm/s x3, deg/s x3] in the tool frame."""
+        with self._lock:
+            self._velocity = [float(v) for v in velocity]
+            self._last_input = time.monotonic()
+
+    def handle_joystick_stream(self, stream_data: Dict) -> Dict[str, Any]:
+        """
+        Map a joystick packet (same format as RobotMain.handle_joystick_stream) to a velocity.
+        Does not move the gripper: a new gripper button press is returned as
+        status["gripper"] = "take" / "drop" for the caller to run on the executor.
+        """
+        ts = stream_data.get("ts")
+        if ts is not None and time.time() - ts > self.watchdog_timeout:
+            return {**self.get_status(), "gripper": None}
+
+        axes = stream_data.get("axes", {})
+        buttons = stream_data.get("buttons", {})
+
+        def axis(name):
+            value = float(axes.get(name, 0.0) or 0.0)
+            return value if abs(value) > self.deadzone else 0.0
+
+        def pressed(name):
+            state = buttons.get(name)
+            if isinstance(state, dict):
+                return bool(state.get("pressed"))
+            return bool(state)
+
+        vx = (pressed("tool_up") - pressed("tool_down")) * self.linear_speed
+        vy = (pressed("tool_right") - pressed("tool_left")) * self.linear_speed
+        vz = (pressed("tool_forward") - pressed("tool_backward")) * self.linear_speed
+        self.set_velocity([
+            vx, vy, vz,
+            -axis("roll") * self.angular_speed,
+            -axis("pitch") * self.angular_speed,
+            0.0,
+        ])
+
+        gripper = "take" if pressed("gripper_close") else "drop" if pressed("gripper_open") else None
+        with self._lock:
+            # Только по нажатию: удержание кнопки не ставит команду в каждом пакете
+            action = gripper if gripper != self._gripper_pressed else None
+            self._gripper_pressed = gripper
+        return {**self.get_status(), "gripper": action}
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self.active,
+                "stale": self._stale,
+                "tool_offset": dict(zip(AXES, (round(v, 3) for v in self._offset))),
+                "velocity": dict(zip(AXES, self._velocity)),
+                "control_rate": self.control_rate,
+                "ticks": self._ticks,
+                "overruns": self._overruns,
+                "last_error": self._last_error,
+            }
+
+    # ------------- CONTROL LOOP -------------
+    def _control_loop(self):
+        period = 1.0 / self.control_rate
+        arm = self._robot.arm
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            with self._lock:
+                stale = now - self._last_input > self.watchdog_timeout
+                if stale:
+                    # Watchdog: нет свежего ввода — приращений нет, рука стоит
+                    self._velocity = [0.0] * 6
+                self._stale = stale
+                step = [v * period for v in self._velocity]
+                for i in range(6):
+                    self._offset[i] += step[i]
+                self._ticks += 1
+
+            if arm.error_code != 0 or not arm.connected:
+                self._fail(f"arm error_code={arm.error_code}, connected={arm.connected}")
+                return
+            # Приращение относительно текущей позы инструмента, как прежний jog
+            code = arm.set_servo_cartesian(step, is_radian=False, is_tool_coord=True) if any(step) else 0
+            if code != 0:
+                arm.set_state(STATE_STOP)
+                self._fail(f"set_servo_cartesian, code:{code}")
+                return
+
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Не догоняем пропущенные такты, а сдвигаем расписание
+                with self._lock:
+                    self._overruns += 1
+                next_tick = time.monotonic()
+
+    def _fail(self, message: str):
+        with self._lock:
+            self._last_error = message
+            self._velocity = [0.0] * 6
+        server_logger.log_event("error", f"xArm teleop stopped: {message}")
+        self._stop_event.set()
+        # Как в stop(): без возврата в position mode следующая команда движения отклоняется
+        try:
+            self._restore_position_mode()
+        except Exception as e:
+            server_logger.log_event("error", f"xArm teleop: failed to restore position mode: {e}")
@@ -0,0 +1,139 @@
+import math
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from core.state import xarm_manager, xarm_executor, depth_service, camera_model
+from core.logger import server_logger
+from drivers.realsense_driver.depth_aggregation import TemporalAggregator
+from drivers.xarm_driver import measure_xy
+
+class CameraAlignment:
+    """
+    In-process camera-to-object alignment for the wrist depth camera.
+
+    Each iteration measures the object under the image centre over several
+    depth frames, converts the pixel offset of its centre to millimetres
+    and corrects the tool with the shared RobotMain.move_tool_position
+    (through the xArm executor). Latency of every stage is reported per
+    iteration.
+    """
+
+    def __init__(
+        self,
+        frames_per_iteration: int = 10,
+        velocity: float = 20,
+        image_center=None,
+        variance_threshold: float = 0.25,
+    ):
+        self.frames_per_iteration = frames_per_iteration
+        # Дисперсия высоты объекта (мм^2), после которой кадров достаточно
+        self.variance_threshold = variance_threshold
+        self.velocity = velocity
+        # По умолчанию - главная точка камеры
+        self.image_center = image_center or (int(camera_model.ppx), int(camera_model.ppy))
+
+    def _capture(self) -> List[float]:
+        """
+        Measure the centre object on new frames from the shared depth service
+        until the measurements settle (or frames_per_iteration are collected)
+        and return their trimmed mean.
+        """
+        aggregator = TemporalAggregator(
+            self.frames_per_iteration,
+            key=6,
+            min_samples=5,
+            variance_threshold=self.variance_threshold,
+        )
+        # Не больше 3x кадров на случай, если объект в центре не находится
+        for frame in depth_service.next_frames(self.frames_per_iteration * 3):
+            data = measure_xy.mouse_callback(frame.image, *self.image_center)
+            if data is not None and aggregator.add(data):
+                break
+        if not aggregator.count:
+            raise RuntimeError("No object found under the image centre")
+        return aggregator.result().tolist()
+
+    def _move_tool(self, x_offset: float, y_offset: float) -> bool:
+        robot_main = xarm_manager.get_instance()
+        params = SimpleNamespace(x_offset=x_offset, y_offset=y_offset, z_offset=0, velocity=self.velocity)
+        return xarm_executor.submit(robot_main.move_tool_position, (params,)).result()
+
+    def align(
+        self,
+        max_corrections: int = 3,
+        tolerance_mm: float = 2.0,
+        verify: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Closed-loop alignment.
+
+        :param max_corrections: Maximum number of tool moves (0 = measure only)
+        :param tolerance_mm: Stop once the centre offset is below this value
+        :param verify: Re-measure after the last move; if False the final
+                       measurement is predicted from the camera shift
+        :return: dict with success, converged (only if a measurement was
+                 within tolerance), predicted, measurement and per-iteration timings
+        """
+        iterations = []
+        measurement: Optional[list] = None
+        converged = False
+        predicted = False
+        corrections = 0
+        while True:
+            started = time.perf_counter()
+            measurement = self._capture()
+            captured = time.perf_counter()
+
+            x, y, w, h = measurement[:4]
+            center_x = x + w / 2
+            center_y = y + h / 2
+            delta_x_mm, delta_y_mm = camera_model.pixels_to_mm(
+                center_x - self.image_center[0], center_y - self.image_center[1], measurement[4]
+            )
+            error_mm = math.hypot(delta_x_mm, delta_y_mm)
+            computed = time.perf_counter()
+
+            iteration = {
+                "iteration": len(iterations),
+                "offset_mm": [round(delta_x_mm, 2), round(delta_y_mm, 2)],
+                "error_mm": round(error_mm, 2),
+                "capture_ms": round((captured - started) * 1000, 1),
+                "compute_ms": round((computed - captured) * 1000, 1),
+                "move_ms": 0.0,
+            }
+            iterations.append(iteration)
+
+            if error_mm <= tolerance_mm:
+                converged = True
+                break
+            if corrections >= max_corrections:
+                break
+
+            if not self._move_tool(-delta_y_mm, delta_x_mm):
+                raise RuntimeError("move_tool_position failed")
+            corrections += 1
+            iteration["move_ms"] = round((time.perf_counter() - computed) * 1000, 1)
+
+            if not verify and corrections >= max_corrections:
+                # Прогноз положения рамки после сдвига камеры
+                shift_x, shift_y = camera_model.mm_to_pixels(delta_x_mm, delta_y_mm, measurement[4])
+                measurement[0] -= int(shift_x)
+                measurement[1] -= int(shift_y)
+                # Не перемерено - сходимость не подтверждена
+                predicted = True
+                break
+
+        server_logger.log_event(
+            "info",
+            f"Camera alignment: {len(iterations)} iteration(s), converged={converged}, predicted={predicted}",
+            {"iterations": iterations},
+        )
+        return {
+            "success": True,
+            "converged": converged,
+            "predicted": predicted,
+            "corrections": corrections,
+            "measurement": measurement,
+            "iterations": iterations,
+        }
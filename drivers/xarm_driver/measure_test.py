@@ -1,10 +1,15 @@
+import sys
+import os
 import asyncio
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + "/../.."))
+
 import websockets
 import base64
 import numpy as np
 import cv2
 import socket
 import subprocess
+from drivers.realsense_driver.CameraModel import CameraModel
 
 # Глобальные переменные
 current_depth_image = None
@@ -13,8 +18,12 @@ object_text = ""  # Текст аннотации
 window_name = "Depth Stream"
 ws_url = f"ws://{socket.gethostname()}:9999"
 center_coordinates = None  # Координаты центра квадрата
+camera_model = CameraModel.from_config()
+image_center = (int(camera_model.ppx), int(camera_model.ppy))
+# Длина base64-сообщения с кадром uint16
+frame_message_length = 4 * ((camera_model.width * camera_model.height * 2 + 2) // 3)
 
-def calculate_camera_shift(center_x, center_y, object_x, object_y, depth_image, fx, fy):
+def calculate_camera_shift(center_x, center_y, object_x, object_y, depth_image):
     """
     Рассчитывает, на сколько нужно переместить объектив камеры по x и y,
     чтобы выровнять центр изображения с центром объекта.
@@ -23,20 +32,15 @@ def calculate_camera_shift(center_x, center_y, object_x, object_y, depth_image,
     :param center_y: Y-координата центра изображения (пиксели)
     :param object_x: X-координата центра объекта (пиксели)
     :param object_y: Y-координата центра объекта (пиксели)
-    :param object_depth: Глубина объекта (мм)
-    :param fx: Фокусное расстояние по оси X
-    :param fy: Фокусное расстояние по оси Y
+    :param depth_image: Глубинное изображение
     :return: Смещение камеры по осям X и Y в мм
     """
     # Вычисляем смещение в пикселях
     delta_x_pixels = object_x - center_x
     delta_y_pixels = object_y - center_y
-    depth_value = int(depth_image[object_y, object_x])
+    depth_mm = camera_model.depth_mm(depth_image[object_y, object_x])
     # Переводим смещение из пикселей в миллиметры
-    delta_x_mm = (delta_x_pixels * depth_value) / fx
-    delta_y_mm = (delta_y_pixels * depth_value) / fy
-
-    return delta_x_mm, delta_y_mm
+    return camera_model.pixels_to_mm(delta_x_pixels, delta_y_pixels, depth_mm)
 
 def calculate_distance_between_points(x1, y1, x2, y2, depth_image):
     """
@@ -47,29 +51,8 @@ def calculate_distance_between_points(x1, y1, x2, y2, depth_image):
     :param depth_image: Глубинное изображение
     :return: Расстояние между точками в мм
     """
-    # Масштаб глубины (для перевода в миллиметры)
-    depth_scale = 0.9  # Подгоните в зависимости от вашей камеры
-    
-    # Фокусное расстояние (подберите под параметры вашей камеры)
-    fx = 380.4253845214844
-    fy = 380.4253845214844
-
-    # Извлекаем глубину для каждой точки
-    z1 = depth_image[y1, x1] * depth_scale
-    z2 = depth_image[y2, x2] * depth_scale
-
-    # Переводим координаты пикселей в 3D-пространство
-    x1_world = (x1 * z1) / fx
-    y1_world = (y1 * z1) / fy
-    x2_world = (x2 * z2) / fx
-    y2_world = (y2 * z2) / fy
-
-    # Рассчитываем евклидово расстояние между точками в 3D
-    distance = np.sqrt((x2_world - x1_world) ** 2 +
-                       (y2_world - y1_world) ** 2 +
-                       (z2 - z1) ** 2)
-
-    return distance
+    # Депроекция через общую модель камеры (интринсики из core.robot_params)
+    return camera_model.distance((x1, y1), (x2, y2), depth_image)
 
 
 def calculate_object_size(rect, depth_image):
@@ -82,19 +65,12 @@ def calculate_object_size(rect, depth_image):
     """
     x, y, w, h = rect
     distances = depth_image[y:y + h, x:x + w]
-    depth_scale = 0.9
-    object_depth = np.mean(distances) * depth_scale
-    
-    # focal = 380.4253845214844
-    focal = 400
-    fx, fy = 380.4253845214844, 380.4253845214844
+    object_depth = camera_model.depth_mm(np.mean(distances))
 
     # Рассчитываем размеры объекта
-    width_mm = (w * object_depth) / fx
-    height_mm = (h * object_depth) / fy
-    return width_mm, height_mm
+    return camera_model.object_size(w, h, object_depth)
 
-def update_rectangle_position(rect, delta_x_mm, delta_y_mm,depth_image, fx, fy):
+def update_rectangle_position(rect, delta_x_mm, delta_y_mm, depth_image):
     global highlighted_rectangle, center_coordinates
     """
     Обновляет координаты рамки объекта после перемещения камеры.
@@ -102,20 +78,16 @@ def update_rectangle_position(rect, delta_x_mm, delta_y_mm,depth_image, fx, fy):
     :param rect: Координаты рамки (x, y, w, h)
     :param delta_x_mm: Смещение камеры по X в мм
     :param delta_y_mm: Смещение камеры по Y в мм
-    :param object_depth: Глубина объекта (мм)
-    :param fx: Фокусное расстояние по оси X
-    :param fy: Фокусное расстояние по оси Y
+    :param depth_image: Глубинное изображение
     :return: Новые координаты рамки (x, y, w, h)
     """
     x, y, w, h = rect
     distances = depth_image[y:y + h, x:x + w]
-    depth_scale = 0.9
-    object_depth = np.mean(distances) * depth_scale
-
+    object_depth = camera_model.depth_mm(np.mean(distances))
 
     # Переводим смещение камеры из мм в пиксели
-    delta_x_pixels = int((delta_x_mm * fx) / object_depth)
-    delta_y_pixels = int((delta_y_mm * fy) / object_depth)
+    delta_x_pixels, delta_y_pixels = camera_model.mm_to_pixels(delta_x_mm, delta_y_mm, object_depth)
+    delta_x_pixels, delta_y_pixels = int(delta_x_pixels), int(delta_y_pixels)
 
     # Обновляем координаты рамки
     new_x = x - delta_x_pixels
@@ -181,7 +153,7 @@ async def stream_depth_frames(ws_url):
             try:
                 # Получаем сообщение с глубинными данными
                 message = await websocket.recv()
-                if len(message) != 819200:
+                if len(message) != frame_message_length:
                     continue
 
                 # Декодируем данные из Base64
@@ -191,7 +163,7 @@ async def stream_depth_frames(ws_url):
                 depth_array = np.frombuffer(depth_bytes, dtype=np.uint16)
 
                 # Изменяем размер массива
-                depth_image = depth_array.reshape((480, 640))
+                depth_image = depth_array.reshape((camera_model.height, camera_model.width))
 
                 # Сохраняем текущее глубинное изображение
                 current_depth_image = depth_image
@@ -202,7 +174,7 @@ async def stream_depth_frames(ws_url):
                 )
 
                 # Если есть выделенный прямоугольник, рисуем его и текст
-                cv2.circle(depth_colormap, (320, 240), 5, (0, 0, 255), -1)
+                cv2.circle(depth_colormap, image_center, 5, (0, 0, 255), -1)
                 if highlighted_rectangle is not None:
                     x, y, w, h = highlighted_rectangle
                     cv2.rectangle(depth_colormap, (x, y), (x + w, y + h), (0, 0, 255), 2)
@@ -217,7 +189,7 @@ async def stream_depth_frames(ws_url):
                         if start_flag == False:
                             start_flag = True
 
-                            delta_x_mm, delta_y_mm = calculate_camera_shift(320, 240, center_coordinates[0], center_coordinates[1], depth_image, 380.4253845214844, 380.4253845214844)
+                            delta_x_mm, delta_y_mm = calculate_camera_shift(*image_center, center_coordinates[0], center_coordinates[1], depth_image)
                             print(f"Смещение камеры по X: {delta_x_mm:.2f} мм, по Y: {delta_y_mm:.2f} мм")
                             script_path = '/home/boris/web_server/xarm/xarm_scripts/move_tool_position.py'
                             try: 
@@ -230,7 +202,7 @@ async def stream_depth_frames(ws_url):
                                 )
                             except:
                                 continue
-                            update_rectangle_position(highlighted_rectangle,delta_x_mm,delta_y_mm, depth_image, 380.4253845214844, 380.4253845214844)
+                            update_rectangle_position(highlighted_rectangle,delta_x_mm,delta_y_mm, depth_image)
                             
                     cv2.putText(
                         depth_colormap,
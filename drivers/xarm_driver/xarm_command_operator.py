@@ -1,20 +1,108 @@
-from xarm.wrapper import XArmAPI
-import arduino_controller.arduino_led_controller as als
-from drivers.xarm_scripts import get_robot_data, take, put, move_to_position, get_position, move_tool_position, move_to_pose
-from core.configuration import xarm_manipulator_ip
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from types import SimpleNamespace
+from typing import Callable, Dict, NamedTuple
+from core.state import xarm_manager, xarm_executor
+from core.configuration import angle_speed, xarm_command_timeout_s
+from application.xarm_scripts import run_guarded_threadsafe
+from drivers.xarm_driver.XArmCommandExecutor import PRIORITY_MOTION, PRIORITY_TELEMETRY
 import logging
 
 logger = logging.getLogger(__name__)
 
-def xarm_command_operator(data):
+
+class RegisteredCommand(NamedTuple):
+    handler: Callable
+    priority: int
+
+
+# Реестр команд: имя -> обработчик(robot_main, data)
+COMMANDS: Dict[str, RegisteredCommand] = {}
+
+
+def register_command(name: str, priority: int = PRIORITY_MOTION):
+    """Register a handler for xarm_command_operator under the given command name."""
+    def decorator(func):
+        COMMANDS[name] = RegisteredCommand(func, priority)
+        return func
+    return decorator
+
+
+@register_command("move_to_position")
+def _move_to_position(robot_main, data):
+    points = [SimpleNamespace(**p) for p in data["positions"] if p is not None]
+    params = SimpleNamespace(points=points, velocity=data.get("angle_speed", angle_speed))
+    return robot_main.complex_move_with_joints(params)
+
+
+@register_command("move_tool_position")
+def _move_tool_position(robot_main, data):
+    params = SimpleNamespace(
+        x_offset=data["x"],
+        y_offset=data["y"],
+        z_offset=data["z"],
+        velocity=data.get("velocity", angle_speed),
+    )
+    return robot_main.move_tool_position(params)
+
+
+@register_command("move_to_pose")
+def _move_to_pose(robot_main, data):
+    params = SimpleNamespace(pose_name=data["pose_name"], velocity=data.get("velocity", angle_speed))
+    return robot_main.move_to_pose(params)
+
+
+# Ответ захвата на успешную команду (как в прежних take.py / put.py)
+GRIPPER_OK = [1, 8, 0, 1, 0, 0, 41, 1, 0, 0, 220]
+
+
+def _gripper_command(robot_main, activate: bool) -> str:
+    """Run the gripper directly (RobotMain.take/drop are stubs); 'success' or 'error' like the old scripts."""
+    gripper = getattr(robot_main, "gripper", None)
+    if gripper is None:
+        raise RuntimeError("Gripper is not available")
+    try:
+        code = gripper.activate() if activate else gripper.deactivate()
+    except Exception as e:
+        logger.error(f"XARM Operator: gripper error: {e}")
+        return "error"
+    return "success" if code == GRIPPER_OK else "error"
+
+
+@register_command("take")
+def _take(robot_main, data):
+    return _gripper_command(robot_main, activate=True)
+
+
+@register_command("put")
+def _put(robot_main, data):
+    return _gripper_command(robot_main, activate=False)
+
+
+@register_command("get_current_position", priority=PRIORITY_TELEMETRY)
+def _get_current_position(robot_main, data):
+    return robot_main.get_current_position()
+
+
+@register_command("get_data", priority=PRIORITY_TELEMETRY)
+def _get_data(robot_main, data):
+    return robot_main.get_status()
+
+
+def xarm_command_operator(data, timeout: float = xarm_command_timeout_s):
     """
-    Execute xArm robot commands.
-    
+    Execute xArm robot commands on the long-lived XArmManager connection.
+
+    Motion commands take the same manipulator_lock and teleop guard as the
+    REST API; every command waits at most timeout seconds. A motion that
+    times out is cancelled and the arm is stopped before 504 is returned.
+    Call from a worker thread or a script, not from the server event loop.
+
     Args:
         data: Dictionary containing:
-            - command: Command type (measure, move_to_position, take_to_box, take, put, get_current_position)
+            - command: Command name registered in COMMANDS (move_to_position,
+              move_tool_position, move_to_pose, take, put, get_current_position, get_data)
             - Additional command-specific parameters
-            
+
     Returns:
         Dict containing:
             - success: bool indicating operation success
@@ -22,55 +110,45 @@ def xarm_command_operator(data):
             - error: Error message if failed, None if successful
             - error_code: Error code if failed, 0 if successful
     """
-    arm = None
-    robot_main = None
-    
+    command = COMMANDS.get(data.get("command"))
+    if command is None:
+        return {
+            "success": False,
+            "result": None,
+            "error": f"Command {data.get('command')} not found",
+            "error_code": 400
+        }
+
     try:
-        # Connect to xArm
-        arm = XArmAPI(xarm_manipulator_ip, baud_checkset=False)
-        if not arm.connected:
-            return {
-                "success": False,
-                "result": None,
-                "error": "Failed to connect to xArm",
-                "error_code": 500
-            }
-            
-        # Create appropriate RobotMain instance based on command
-        # if data["command"] == "measure":
-        #     robot_main = measure.RobotMain(arm)
-        if data["command"] == "move_to_position":
-            robot_main = move_to_position.RobotMain(arm)
-        elif data["command"] == "move_tool_position":
-            robot_main = move_tool_position.RobotMain(arm)
-        elif data["command"] == "move_to_pose":
-            robot_main = move_to_pose.RobotMain(arm)
-        elif data["command"] == "take":
-            robot_main = take.RobotMain(arm)
-        elif data["command"] == "put":
-            robot_main = put.RobotMain(arm)
-        elif data["command"] == "get_current_position":
-            robot_main = get_position.RobotMain(arm)
-        elif data["command"] == "get_data":
-            robot_main = get_robot_data.RobotMain(arm)
+        robot_main = xarm_manager.get_instance()
+    except Exception as e:
+        return {
+            "success": False,
+            "result": None,
+            "error": f"Failed to connect to xArm: {e}",
+            "error_code": 500
+        }
+
+    try:
+        # Выполняется в потоке исполнителя xArm, как и команды API
+        if command.priority == PRIORITY_MOTION:
+            result = run_guarded_threadsafe(command.handler, robot_main, data, timeout=timeout)
         else:
-            return {
-                "success": False,
-                "result": None,
-                "error": f"Command {data['command']} not found",
-                "error_code": 400
-            }
-            
-        # Execute command
-        result = robot_main.run(data)
-        
+            result = xarm_executor.submit(command.handler, (robot_main, data), priority=command.priority).result(timeout)
         return {
             "success": True,
             "result": result,
             "error": None,
             "error_code": 0
         }
-        
+    except FutureTimeoutError:
+        logger.error(f"XARM Operator: {data.get('command')} timed out after {timeout} s")
+        return {
+            "success": False,
+            "result": None,
+            "error": f"Command timed out after {timeout} s",
+            "error_code": 504
+        }
     except Exception as e:
         logger.error(f"XARM Operator error: {type(e).__name__}: {e}")
         return {
@@ -79,13 +157,9 @@ def xarm_command_operator(data):
             "error": str(e),
             "error_code": 500
         }
-    finally:
-        if arm is not None:
-            arm.disconnect()
 
 # data= {}
 # data["command"] = "move_to_pose"
 # data["pose_name"] = "READY_SECTION_CENTER"
 
 # result = xarm_command_operator(data)
-# #
\ No newline at end of file
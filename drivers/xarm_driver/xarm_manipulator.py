@@ -60,17 +60,46 @@ class RobotMain(object):
             print("Gripper is not available")
 
     def _robot_init(self):
+        self._enable_motion()
+        self._register_callbacks()
+
+    def _enable_motion(self, timeout=1.0):
+        """Clear errors and enable motion, waiting until the arm reports ready."""
         self._arm.clean_warn()
         self._arm.clean_error()
         self._arm.motion_enable(True)
         self._arm.set_mode(0)
         self._arm.set_state(0)
-        time.sleep(1)
+        # Ждём state==2 вместо фиксированного sleep(1)
+        deadline = time.time() + timeout
+        while self._arm.state != 2 and time.time() < deadline:
+            time.sleep(0.05)
+        return self._arm.state == 2
+
+    def _register_callbacks(self):
         self._arm.register_error_warn_changed_callback(self._error_warn_changed_callback)
         self._arm.register_state_changed_callback(self._state_changed_callback)
         if hasattr(self._arm, 'register_count_changed_callback'):
             self._arm.register_count_changed_callback(self._count_changed_callback)
 
+    def _release_callbacks(self):
+        self._arm.release_error_warn_changed_callback(self._error_warn_changed_callback)
+        self._arm.release_state_changed_callback(self._state_changed_callback)
+        if hasattr(self._arm, 'release_count_changed_callback'):
+            self._arm.release_count_changed_callback(self._count_changed_callback)
+
+    def recover(self):
+        """
+        Reset faults on the existing connection (clean_error/motion_enable)
+        and re-arm the error/state callbacks. The XArmAPI socket is reused.
+        """
+        ready = self._enable_motion()
+        self._release_callbacks()
+        self._register_callbacks()
+        self.alive = ready
+        self._failures = 0
+        return ready
+
     def _error_warn_changed_callback(self, data):
         if data and data['error_code'] != 0:
             self.alive = False
@@ -235,6 +264,11 @@ class RobotMain(object):
             self._arm.release_count_changed_callback(self._count_changed_callback)
         raise RuntimeError(f"move_tool_position failed: {_error}")
 
+    def stop(self):
+        """Stop the current motion and flush the controller motion queue."""
+        code = self._arm.set_state(4)
+        return code == 0
+
     def drop(self):
         return True
         _error = None
@@ -435,13 +469,7 @@ class RobotMain(object):
         try:
             if self._arm.state in (3, 4, 5):
                 print("Trying auto-recover ...")
-                self._arm.clean_error()
-                self._arm.motion_enable(True)
-                self._arm.set_mode(0)
-                self._arm.set_state(0)
-                time.sleep(1)
-                if self._arm.state == 2:
-                    result = True
+                result = self.recover()
         finally:
             return result
 
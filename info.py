@@ -40,6 +40,13 @@ openapi_tags = [
             "Support fetching maps, starting jobs and monitoring state."
         ),
     },
+    {
+        "name": "Vision",
+        "description": (
+            "Depth camera measurements on the shared frame cache: object size and "
+            "offset from the image centre, blocking or as an async task."
+        ),
+    },
     {
         "name": "misc",
         "description": "Utility endpoints: serving static files, trajectories and helper functions.",
@@ -26,23 +26,43 @@ async def lifespan(app: FastAPI):
     init_trajectory_table()
     init_regals_table()
 
-    from routes.api import igus, symovo, xarm, robot, misc
+    from routes.api import igus, symovo, xarm, robot, misc, vision
     from routes.websocket import ws
     app.include_router(igus.router)
     app.include_router(symovo.router)
     app.include_router(xarm.router)
     app.include_router(robot.router)
+    app.include_router(vision.router)
     app.include_router(ws.router)
     app.include_router(misc.router)
 
+    import asyncio
+    from application.xarm_scripts import bind_server_loop
+    bind_server_loop(asyncio.get_running_loop())
+
+    from core.state import status_aggregator, symovo_client
+    symovo_client.start_polling()
+    status_aggregator.start()
+
     server_logger.log_event("info", "Startup OK.")
 
     yield
     server_logger.log_event("info", "Shutdown initiated")
 
+    await status_aggregator.stop()
+
     await xarm_client.__aexit__(None, None, None)
     await igus_client.__aexit__(None, None, None)
 
+    from utils.ws_hub import close_hubs
+    await close_hubs()
+
+    from core.state import xarm_manager, xarm_executor, depth_service, symovo_client
+    symovo_client.close()
+    depth_service.stop()
+    xarm_executor.shutdown()
+    xarm_manager.shutdown()
+
 app = FastAPI(
     title="AE.01 API",
     version="1.0.0",
@@ -31,6 +31,7 @@ class RobotMoveRequest(BaseModel):
     velocity_percent: float = Field(..., ge=1, le=100, description="Speed (%)", example=20)
     reset_faults: bool = Field(False, description="Reset errors and reinitialize before move", example=False)
     blocking: bool = Field(True, description="Wait for completion", example=True)
+    preposition: bool = Field(False, description="Move lift / arm ready pose while the AGV is driving, for the devices enabled in the cell configuration", example=False)
 
 # --------- ОТВЕТЫ НА ДВИЖЕНИЕ ---------
 class SymovoMoveResult(BaseModel):
@@ -57,12 +58,14 @@ class RobotMoveResult(BaseModel):
     lift_result: Optional[IgusMoveResult] = Field(None, description="Igus lift movement result")
     manipulator_result: Optional[XarmMoveResult] = Field(None, description="xArm manipulator movement result")
     message: Optional[str] = Field(None, description="General error or info message")
+    timing: Optional[dict] = Field(None, description="Per-phase start/duration (s), total time and which devices were pre-positioned")
 
 class RobotMoveBoxResult(BaseModel):
     success: bool = Field(..., description="True if the robot placed product in Box 1")
     igus_result: Optional[IgusMoveResult] = Field(None, description="Igus lift movement details")
     manipulator_result: Optional[XarmMoveResult] = Field(None, description="xArm manipulator movement details")
     message: Optional[str] = Field(None, description="Additional information or error message")
+    timing: Optional[dict] = Field(None, description="Motion plan timing: per-step start/duration, elapsed, serial and critical-path time (s)")
 
 class RobotTransportPositionResult(BaseModel):
     success: bool = Field(..., description="True if robot moved to transport (stowed) position")
@@ -70,6 +73,25 @@ class RobotTransportPositionResult(BaseModel):
     igus_final_result: Optional[IgusMoveResult] = Field(None, description="Igus lift final move details")
     manipulator_result: Optional[XarmMoveResult] = Field(None, description="xArm manipulator movement details")
     message: Optional[str] = Field(None, description="Additional information or error message")
+    timing: Optional[dict] = Field(None, description="Motion plan timing: per-step start/duration, elapsed, serial and critical-path time (s)")
+
+class RobotSequenceResult(BaseModel):
+    """Result of a named declarative sequence."""
+    success: bool = Field(..., description="True if every step of the sequence succeeded", example=True)
+    sequence: str = Field(..., description="Sequence name", example="box_1")
+    results: Dict[str, Optional[dict]] = Field(..., description="Result of each step (None if the step did not run)")
+    message: Optional[str] = Field(None, description="Failed step and its error, empty on success", example="")
+    timing: dict = Field(..., description="Per-step start/duration, elapsed, serial and critical-path time (s)")
+
+class RobotSequenceInfo(BaseModel):
+    name: str = Field(..., description="Sequence name", example="box_1")
+    description: str = Field("", description="What the sequence does")
+    steps: List[str] = Field(..., description="Step names in dependency order", example=["lift_up", "lift_checked", "arm_to_box", "lift_down"])
+
+class RobotAsyncResponse(BaseModel):
+    """Response for async robot sequences."""
+    success: bool = Field(..., description="True if the sequence started successfully", example=True)
+    task_id: str = Field(..., description="Async task identifier (UUID)", example="123e4567-e89b-12d3-a456-426614174000")
 
 # --------- СТАТУСЫ ПОДСИСТЕМ ---------
 
@@ -171,6 +193,16 @@ class SymovoStatusResponse(BaseModel):
     last_update_epoch: Optional[float] = Field(None, description="Last update time (epoch)", example=1710000000.0)
     attributes: Optional[Any] = Field(None, description="Additional attributes (object, optional)")
     planned_path_edges: Optional[Any] = Field(None, description="Currently planned path edges (object/list, optional)")
+
+class SymovoStateResponse(BaseModel):
+    """Snapshot of the background AGV poller."""
+    version: int = Field(..., description="Snapshot version, increases with every poll", example=42)
+    online: bool = Field(..., description="True if the last poll succeeded", example=True)
+    moving: bool = Field(..., description="True if the AGV had a non-zero velocity at the last poll", example=False)
+    age_s: float = Field(..., description="Age of the snapshot (s)", example=0.3)
+    poll_interval_s: float = Field(..., description="Current polling interval (s): short while moving, long while idle", example=5.0)
+    error: Optional[str] = Field(None, description="Error of the last poll, if it failed")
+    status: Optional[SymovoStatusResponse] = Field(None, description="Last known AGV status")
 # --- Статус и результат универсальных команд ---
 
 class NewJobResponse(BaseModel):
@@ -271,6 +303,15 @@ class XarmStatusResponse(BaseModel):
     has_warn: bool = Field(..., description="True if warnings are present", example=True)
     error_code: int = Field(..., description="Current error code (0 means no error)", example=0)
 
+class XarmConnectionResponse(BaseModel):
+    """Connection state published by the xArm health monitor."""
+    state: str = Field(..., description="disconnected, connecting, connected, recovering or fault", example="connected")
+    connected: bool = Field(..., description="True if the xArm socket is up", example=True)
+    error_code: int = Field(..., description="Controller error code seen by the last probe", example=0)
+    last_error: Optional[str] = Field(None, description="Last connection error message, if any")
+    last_check: Optional[float] = Field(None, description="Time of the last health probe (epoch)", example=1710000000.0)
+    reconnects: int = Field(..., description="Number of socket reconnects since startup", example=0)
+
 class XarmJointsPositionResponse(BaseModel):
     """Current joint angles reported by the manipulator."""
     joints_deg: Dict[str, float] = Field(
@@ -284,3 +325,42 @@ class RobotSystemStatus(BaseModel):
     xarm: Union[XarmStatusResponse, ErrorStatus]
     igus: Union[IgusStatusResponse, ErrorStatus]
     symovo: Union[SymovoStatusResponse, ErrorStatus]
+    age_s: Dict[str, Optional[float]] = Field(
+        default_factory=dict, description="Age of each subsystem status (s)", example={"xarm": 0.4, "igus": 0.2, "symovo": 1.1}
+    )
+
+class VisionMeasureParams(BaseModel):
+    """Parameters for measuring the object under a pixel of the depth camera."""
+    x: int = Field(320, ge=0, description="Seed pixel X (object under this pixel is measured), below the camera width", example=320)
+    y: int = Field(240, ge=0, description="Seed pixel Y, below the camera height", example=240)
+    frames: int = Field(1, ge=1, le=30, description="Number of depth frames to aggregate", example=5)
+    max_age_s: float = Field(0.5, ge=0, le=10, description="Maximum age of the cached frame to start from (s)", example=0.5)
+    variance_threshold: Optional[float] = Field(
+        None, ge=0, description="Stop early once the variance of the object height (mm^2) is below this value", example=0.25
+    )
+    blocking: bool = Field(True, description="Wait for completion", example=True)
+
+class VisionMeasureResponse(BaseModel):
+    """Object measured on the depth camera frames."""
+    success: bool = Field(..., description="True if the object was measured", example=True)
+    frame_seq: int = Field(..., description="Sequence number of the first frame used", example=1024)
+    frame_age_s: float = Field(..., description="Age of the first frame when the result was returned (s)", example=0.012)
+    frames_used: int = Field(..., description="Number of frames aggregated", example=5)
+    x: float = Field(..., description="Bounding box X (px)", example=260)
+    y: float = Field(..., description="Bounding box Y (px)", example=190)
+    w: float = Field(..., description="Bounding box width (px)", example=120)
+    h: float = Field(..., description="Bounding box height (px)", example=100)
+    depth: float = Field(..., description="Raw depth value at the seed pixel (camera depth units)", example=600)
+    depth_mm: float = Field(..., description="Depth at the seed pixel (mm, raw depth * depth scale)", example=600)
+    width_mm: Optional[float] = Field(None, description="Object width (mm)", example=170.4)
+    height_mm: Optional[float] = Field(None, description="Object height (mm)", example=142.0)
+    center_offset_px: List[float] = Field(..., description="Object centre offset from the image centre (px)", example=[0, 0])
+    center_offset_mm: List[float] = Field(..., description="Object centre offset from the image centre (mm)", example=[0, 0])
+    elevation_mm: Optional[float] = Field(None, description="Object height above the surrounding surface plane (mm)", example=85.0)
+    compute_ms: float = Field(..., description="Computation time (ms)", example=2.1)
+    shared: bool = Field(..., description="True if the result was shared with a concurrent request for the same frame", example=False)
+
+class VisionAsyncResponse(BaseModel):
+    """Response for async vision measurements."""
+    success: bool = Field(..., description="True if the measurement started successfully", example=True)
+    task_id: str = Field(..., description="Async task identifier (UUID)", example="123e4567-e89b-12d3-a456-426614174000")
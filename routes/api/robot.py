@@ -1,9 +1,12 @@
-from fastapi import APIRouter, HTTPException
-from core.state import xarm_client, igus_client, symovo_client
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional, Union
 from core.logger import server_logger
+from core.state import task_manager
 from models.api_types import DefaultMoveRequest,RobotMoveRequest,RobotTransportPositionResult,RobotMoveResult,RobotMoveBoxResult,RobotSystemStatus
+from models.api_types import RobotSequenceResult,RobotSequenceInfo,RobotAsyncResponse,TaskStatusResponse
 from application.robot_scripts import *
-import drivers.xarm_driver.xarm_positions as xarm_positions
+from application.sequence_scripts import get_sequence, list_sequences, run_sequence_command
+from utils.api import wrap_async_task
 
 router = APIRouter(prefix="/api/v1/robot", tags=["Robot AE.01"])
 
@@ -23,12 +26,15 @@ All movements are coordinated. If any subsystem fails, execution halts and an er
 - `velocity`: Movement speed in percent (1-100).
 - `reset_faults`: If true, resets errors and reinitializes before movement.
 - `blocking`: If true, waits until movement completes before returning.
+- `preposition`: If true, the lift and/or the arm ready pose start while the AGV is driving (only devices enabled in the cell configuration).
 
 **Typical workflow:**  
 1. Move AGV to target location  
 2. Raise/lower lift  
 3. Move manipulator to specified offsets
 
+The response `timing` holds start/duration of every phase, to compare cycle times with and without pre-positioning.
+
 If the robot is busy or a device fails, the call returns an error (status 423/500).
 
 """,
@@ -44,14 +50,12 @@ If the robot is busy or a device fails, the call returns an error (status 423/50
 )
 async def move_to_product(params: RobotMoveRequest) -> RobotMoveResult:
     server_logger.log_event("info", f"POST /api/system/move_to_product {params}")
-    result = await move_robot_to_product(
-        symovo_client, igus_client, xarm_client, xarm_positions, params
-    )
+    result = await move_robot_to_product(params)
     if not result.get("success", False):
         server_logger.log_event("error", f"System move_to_product failed: {result.get('message', '')}")
         raise HTTPException(status_code=500, detail=result.get("message", "Unknown error"))
     server_logger.log_event("info", "System move_to_product executed successfully")
-    return MoveResult(**result)
+    return RobotMoveResult(**result)
 
 @router.post(
     "/move/to_box_1",
@@ -242,18 +246,66 @@ If any subsystem fails, the operation halts and an error is returned.
     }
 )
 async def transport_position(params: DefaultMoveRequest) -> RobotTransportPositionResult:
-    result = await move_to_transport_position(
-        igus_client, xarm_client, xarm_positions, params.velocity
-    )
-    return TransportPositionResult(**result)
+    result = await move_to_transport_position(params.velocity_percent)
+    return RobotTransportPositionResult(**result)
 
 @router.get(
     "/status",
     response_model=RobotSystemStatus,
     summary="Get robot system status",
-    description="Returns full status of all robot subsystems. Response is always a flat structure with 'ready' and 'message' in root.",
+    description="Returns full status of all robot subsystems. Response is always a flat structure with 'ready' and 'message' in root. Statuses are refreshed in the background; `age_s` gives the age of each one.",
     response_description="Full status of the robot cell."
 )
-async def check_devices_ready() -> RobotSystemStatus:
-    result = await get_robot_system_status()
+async def check_devices_ready(
+    max_age: Optional[float] = Query(None, ge=0, description="Refresh subsystem statuses older than this (s); default serves the cached ones")
+) -> RobotSystemStatus:
+    result = await get_robot_system_status(max_age)
     return RobotSystemStatus(**result)
+
+@router.get(
+    "/sequences",
+    response_model=List[RobotSequenceInfo],
+    summary="List declarative robot sequences",
+)
+async def sequences() -> List[RobotSequenceInfo]:
+    return [RobotSequenceInfo(**info) for info in list_sequences()]
+
+@router.post(
+    "/sequence/{name}",
+    response_model=Union[RobotSequenceResult, RobotAsyncResponse],
+    summary="Run a named robot sequence",
+    description="""
+Runs a sequence defined in `core/robot_sequences.json` (lift / arm steps with dependencies
+and safety checks). Independent steps run in parallel; the response contains each step's
+result and timing, the total elapsed time and the critical path.
+
+**Parameters:**
+- `name`: Sequence name (see `GET /api/v1/robot/sequences`).
+- `velocity_percent`: Movement speed in percent (1-100); steps may scale it.
+- `blocking`: If false, returns a task_id; poll `/api/v1/robot/task_status/{task_id}`.
+
+""",
+    response_description="Per-step results and timing",
+    responses={
+        404: {"description": "Unknown sequence"},
+        500: {"description": "A step failed; detail names the step and its error"},
+    }
+)
+async def run_named_sequence(name: str, params: DefaultMoveRequest):
+    if get_sequence(name) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown sequence {name}")
+    server_logger.log_event("info", f"POST /api/v1/robot/sequence/{name} {params}")
+    if not params.blocking:
+        return await wrap_async_task(lambda: run_sequence_command(name, params.velocity_percent), RobotAsyncResponse)
+    result = await run_sequence_command(name, params.velocity_percent)
+    if not result["success"]:
+        server_logger.log_event("error", f"Sequence {name} failed: {result['message']}")
+        raise HTTPException(status_code=500, detail=result["message"])
+    return RobotSequenceResult(**result)
+
+@router.get(
+    "/task_status/{task_id}",
+    response_model=TaskStatusResponse,
+)
+async def get_robot_task_status(task_id: str):
+    return task_manager.get_status(task_id)
@@ -2,10 +2,10 @@
 
 import asyncio
 from fastapi import APIRouter, HTTPException, Query
-from typing import Any, List, Dict
-from core.state import symovo_client
+from typing import Any, List, Dict, Optional
+from core.state import symovo_client, task_manager
 from core.logger import server_logger
-from models.api_types import (ErrorStatus, SymovoVelocity, SymovoPose, SymovoStatusResponse,NewJobResponse,GenericResult,MoveToPoseRequest)
+from models.api_types import (ErrorStatus, SymovoVelocity, SymovoPose, SymovoStatusResponse,NewJobResponse,GenericResult,MoveToPoseRequest,SymovoStateResponse)
 from typing import Union
 from utils.api import endpoint_with_lock_guard, endpoint_guard
 
@@ -19,16 +19,40 @@ router = APIRouter(
 
 symovo_car_lock = asyncio.Lock()
 
-# @router.get(
-#     "/status",
-#     response_model=Union[SymovoStatusResponse, ErrorStatus],
-#     summary="Get current Symovo AGV state",
-#     description="Returns all current state information about the Symovo AGV.",
-# )
-# @endpoint_guard()
-# async def get_status() -> Union[SymovoStatusResponse, ErrorStatus]:
-#     data = symovo_client.get_status()
-#     return data
+@router.get(
+    "/status",
+    response_model=Union[SymovoStatusResponse, ErrorStatus],
+    summary="Get current Symovo AGV state",
+    description=(
+        "Returns all current state information about the Symovo AGV, from the background poller "
+        "snapshot (a direct request if polling is not running)."
+    ),
+)
+@endpoint_guard()
+async def get_status() -> Union[SymovoStatusResponse, ErrorStatus]:
+    data = await symovo_client.get_state_status_async()
+    return data
+
+@router.get(
+    "/state",
+    response_model=SymovoStateResponse,
+    summary="Get AGV poller snapshot",
+    description="Versioned snapshot of the background AGV poller with its age and the current polling interval.",
+    responses={404: {"description": "No poll has completed yet"}},
+)
+async def get_state() -> SymovoStateResponse:
+    state = symovo_client.snapshot
+    if state is None:
+        raise HTTPException(status_code=404, detail="AGV state not polled yet")
+    return SymovoStateResponse(
+        version=state.version,
+        online=state.online,
+        moving=state.moving,
+        age_s=round(state.age, 3),
+        poll_interval_s=symovo_client.poller.interval,
+        error=state.error,
+        status=state.status,
+    )
 
 
 
@@ -38,9 +62,9 @@ symovo_car_lock = asyncio.Lock()
     summary="Get active jobs",
     description="Get a list of all current jobs on Symovo AGV.",
 )
-def get_symovo_car_jobs() -> List[Dict[str, Any]]:
+async def get_symovo_car_jobs() -> List[Dict[str, Any]]:
     """Get current Symovo car jobs."""
-    jobs = symovo_client.get_jobs()
+    jobs = await symovo_client.get_jobs_async()
     return jobs
 
 @router.get(
@@ -49,8 +73,8 @@ def get_symovo_car_jobs() -> List[Dict[str, Any]]:
     summary="Create new job by position name",
     description="Starts a new job to move AGV to the specified named position.",
 )
-def create_new_job(name: str = Query(..., description="Target position name")) -> NewJobResponse:
-    result = symovo_client.go_to_position(name, True, True)
+async def create_new_job(name: str = Query(..., description="Target position name")) -> NewJobResponse:
+    result = await symovo_client.go_to_position_async(name, True, True)
     return NewJobResponse(status="ok", message=f"Going to position {name}", result=result)
 
 @router.get(
@@ -59,25 +83,103 @@ def create_new_job(name: str = Query(..., description="Target position name")) -
     summary="Get available maps",
     description="Returns a list of available maps for the AGV.",
 )
-def get_maps() -> List[str]:
+async def get_maps() -> List[str]:
     server_logger.log_event("info", "GET /api/symovo_car/maps")
-    maps = symovo_client.get_maps()
+    maps = await symovo_client.get_maps_async()
     if maps is None:
         raise HTTPException(status_code=500, detail="Failed to get maps")
     return maps
 
+@router.get(
+    "/metadata",
+    response_model=GenericResult,
+    summary="Metadata cache state",
+    description="Age, version, size and revalidation counters of the cached jobs, stations and maps.",
+)
+async def get_metadata() -> GenericResult:
+    return GenericResult(status="ok", result=symovo_client.get_metadata_metrics())
+
+@router.post(
+    "/metadata/invalidate",
+    response_model=GenericResult,
+    summary="Invalidate metadata cache",
+    description="Next read of jobs / stations / maps (or only `kind`) is revalidated with the AGV.",
+)
+async def invalidate_metadata(
+    kind: Optional[str] = Query(None, description="jobs, stations or maps; all if omitted"),
+) -> GenericResult:
+    if kind is not None and kind not in ("jobs", "stations", "maps"):
+        raise HTTPException(status_code=400, detail=f"Unknown metadata kind {kind}")
+    symovo_client.invalidate_metadata(kind)
+    return GenericResult(status="ok", result=symovo_client.get_metadata_metrics())
+
 @router.post(
     "/go_to_pose",
     response_model=GenericResult,
     summary="Send AGV to pose",
-    description="Send the AGV to an arbitrary pose on the specified map.",
+    description=(
+        "Send the AGV to an arbitrary pose on the specified map. With wait=false the transport is "
+        "created and tracked in the background: the result holds transport_id (progress: "
+        "GET /transports/{transport_id}) and task_id (arrival: GET /move_status/{task_id})."
+    ),
     response_description="Result of the go_to_pose command.",
 )
-def go_to_pose(req: MoveToPoseRequest) -> GenericResult:
-    result = symovo_client.move_to(req.x, req.y, req.theta, req.map_id, req.max_speed)
-    if result is None:
+async def go_to_pose(
+    req: MoveToPoseRequest,
+    wait: bool = Query(True, description="Wait until the transport is finished"),
+) -> GenericResult:
+    try:
+        if wait:
+            result = await symovo_client.move_to_async(req.x_m, req.y_m, req.theta_rad, req.map_id, req.max_speed_m_s)
+            return GenericResult(status="ok", result=result)
+        transport = await symovo_client.start_transport_async(
+            req.x_m, req.y_m, req.theta_rad, req.map_id, req.max_speed_m_s
+        )
+    except Exception as e:
+        server_logger.log_event("error", f"go_to_pose failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to send move command")
-    return GenericResult(status="ok", result=result)
+    task_id = task_manager.create_task(symovo_client.wait_transport_async(transport["id"]))
+    return GenericResult(status="started", result={"transport_id": transport["id"], "task_id": task_id})
+
+@router.get(
+    "/move_status/{task_id}",
+    response_model=GenericResult,
+    summary="Get status of a non-blocking go_to_pose",
+    description="Status of the task waiting for a transport started by go_to_pose with wait=false.",
+)
+async def move_status(task_id: str) -> GenericResult:
+    status = task_manager.get_status(task_id)
+    return GenericResult(status=status["status"], result=status.get("result"))
+
+@router.get(
+    "/transports",
+    response_model=GenericResult,
+    summary="Tracked transports",
+    description="Transports followed by the tracker (active and recently finished) and AGV client counters.",
+)
+async def get_transports() -> GenericResult:
+    return GenericResult(status="ok", result=symovo_client.get_transport_metrics())
+
+@router.get(
+    "/transports/{transport_id}",
+    response_model=GenericResult,
+    summary="Progress of a transport",
+    description="Progress of a tracked transport (started here, or registered with POST /transports/{transport_id}/track).",
+)
+async def get_transport(transport_id: str) -> GenericResult:
+    summary = symovo_client.get_transport_summary(transport_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Transport {transport_id} is not tracked")
+    return GenericResult(status="ok", result=summary)
+
+@router.post(
+    "/transports/{transport_id}/track",
+    response_model=GenericResult,
+    summary="Track a transport",
+    description="Start tracking an existing AGV transport (idempotent); progress is then available via GET /transports/{transport_id}.",
+)
+async def track_transport(transport_id: str) -> GenericResult:
+    return GenericResult(status="ok", result=await symovo_client.track_transport_async(transport_id))
 
 @router.post(
     "/check_pose",
@@ -86,8 +188,8 @@ def go_to_pose(req: MoveToPoseRequest) -> GenericResult:
     description="Check if a given pose is reachable by the AGV.",
     response_description="Reachability result.",
 )
-def check_pose(req: MoveToPoseRequest) -> GenericResult:
-    result = symovo_client.check_reachability(req.x, req.y, req.theta, req.map_id)
+async def check_pose(req: MoveToPoseRequest) -> GenericResult:
+    result = await symovo_client.check_reachability_async(req.x_m, req.y_m, req.theta_rad, req.map_id)
     if result is None:
         raise HTTPException(status_code=500, detail="Failed to check pose")
     return GenericResult(status="ok", result=result)
@@ -98,8 +200,8 @@ def check_pose(req: MoveToPoseRequest) -> GenericResult:
     summary="Get status of a task",
     description="Returns the status of a running task by its ID.",
 )
-def task_status(task_id: str = Query(..., description="Task ID")) -> GenericResult:
-    result = symovo_client.get_task_status(task_id)
+async def task_status(task_id: str = Query(..., description="Task ID")) -> GenericResult:
+    result = await symovo_client.get_task_status_async(task_id)
     if result is None:
         raise HTTPException(status_code=500, detail="Failed to get task status")
     server_logger.log_event("info", "Symovo task status fetched")
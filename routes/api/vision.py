@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException
+from typing import Union
+from application.vision_scripts import measure_object, get_depth_stream_metrics
+from core.state import task_manager, camera_model
+from models.api_types import (
+    VisionMeasureParams, VisionMeasureResponse, VisionAsyncResponse, TaskStatusResponse
+)
+from utils.api import endpoint_guard, wrap_async_task
+
+router = APIRouter(prefix="/api/v1/vision", tags=["Vision"])
+
+@router.post(
+    "/measure",
+    response_model=Union[VisionMeasureResponse, VisionAsyncResponse],
+)
+async def measure(params: VisionMeasureParams):
+    """Measure the object under a pixel on the shared depth frame cache."""
+    # Границы кадра берём из модели камеры, а не из схемы запроса
+    if params.x >= camera_model.width or params.y >= camera_model.height:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Seed pixel ({params.x}, {params.y}) is outside the {camera_model.width}x{camera_model.height} frame",
+        )
+    return await _measure(params)
+
+@endpoint_guard()
+async def _measure(params: VisionMeasureParams):
+    def run():
+        return measure_object(
+            x=params.x,
+            y=params.y,
+            frames=params.frames,
+            max_age=params.max_age_s,
+            variance_threshold=params.variance_threshold,
+        )
+    if params.blocking:
+        return VisionMeasureResponse(**await run())
+    return await wrap_async_task(run, VisionAsyncResponse)
+
+@router.get(
+    "/task_status/{task_id}",
+    response_model=TaskStatusResponse,
+)
+async def get_vision_task_status(task_id: str):
+    return task_manager.get_status(task_id)
+
+@router.get("/depth_stream")
+@endpoint_guard()
+async def depth_stream_metrics():
+    """Shared depth stream state: sequence, frame age, decode time, drops."""
+    return get_depth_stream_metrics()
@@ -5,7 +5,8 @@ from core.state import task_manager
 from models.api_types import (
     XarmMoveWithJointsDictParams, XarmMoveWithJointsParams, XarmMoveWithPoseParams,
     XarmMoveWithToolParams, XarmCommandResponse, XarmAsyncResponse,
-    XarmStatusResponse, XarmJointsPositionResponse, TaskStatusResponse,ErrorStatus
+    XarmStatusResponse, XarmJointsPositionResponse, TaskStatusResponse,ErrorStatus,
+    XarmConnectionResponse
 )
 from utils.api import endpoint_guard, endpoint_with_lock_guard
 
@@ -85,7 +86,7 @@ async def change_tool_position(params: XarmMoveWithToolParams):
 )
 @endpoint_guard()
 async def api_gripper_drop():
-    result = gripper_drop()
+    result = await gripper_drop()
     return XarmCommandResponse(success=result)
 
 @router.post(
@@ -94,7 +95,16 @@ async def api_gripper_drop():
 )
 @endpoint_guard()
 async def api_gripper_take():
-    result = gripper_take()
+    result = await gripper_take()
+    return XarmCommandResponse(success=result)
+
+@router.post(
+    "/manipulator/stop",
+    response_model=XarmCommandResponse,
+)
+@endpoint_guard()
+async def api_stop_manipulator():
+    result = await stop_manipulator()
     return XarmCommandResponse(success=result)
 
 @router.get(
@@ -103,7 +113,23 @@ async def api_gripper_take():
 )
 @endpoint_with_lock_guard(manipulator_lock, XarmStatusResponse)
 async def api_reset_faults():
-    return reset_faults()
+    return await reset_faults()
+
+@router.get(
+    "/manipulator/connection",
+    response_model=XarmConnectionResponse,
+)
+@endpoint_guard(XarmConnectionResponse)
+async def api_get_connection_state():
+    return get_connection_state()
+
+@router.get(
+    "/manipulator/executor_metrics",
+    response_model=Dict,
+)
+@endpoint_guard()
+async def api_get_executor_metrics():
+    return get_executor_metrics()
 
 # @router.get(
 #     "/manipulator/status",
@@ -124,7 +150,7 @@ async def api_reset_faults():
 )
 @endpoint_guard()
 async def api_get_current_position():
-    result = get_current_position()
+    result = await get_current_position()
     return {"pose_name": result[0], "points": result[1]}
 
 @router.get(
@@ -133,11 +159,38 @@ async def api_get_current_position():
 )
 @endpoint_guard(XarmJointsPositionResponse)
 async def api_get_manipulator_joints_position():
-    result = get_joints_position()
+    result = await get_joints_position()
     return {"joints": result[1]}
 
 @router.post("/joystick")
-@endpoint_guard(manipulator_lock)
+@endpoint_guard()
 async def api_joystick_control(stream_data: Dict):
-    result = joystick_control(stream_data)
+    result = await joystick_control(stream_data)
     return result
+
+
+@router.post(
+    "/joystick/teleop/start",
+    response_model=XarmCommandResponse,
+)
+@endpoint_with_lock_guard(manipulator_lock)
+async def api_teleop_start():
+    result = await teleop_start()
+    return XarmCommandResponse(success=result)
+
+@router.post(
+    "/joystick/teleop/stop",
+    response_model=XarmCommandResponse,
+)
+@endpoint_guard()
+async def api_teleop_stop():
+    result = await teleop_stop()
+    return XarmCommandResponse(success=result)
+
+@router.get(
+    "/joystick/teleop/status",
+    response_model=Dict,
+)
+@endpoint_guard()
+async def api_teleop_status():
+    return get_teleop_status()
@@ -4,9 +4,17 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 import asyncio
 from typing import Dict
 import time
-from utils.ws_proxy import proxy_websocket
+from utils.ws_proxy import proxy_websocket, get_proxy_metrics
+from utils.ws_hub import get_hub, get_hubs_metrics, serve_stream
 from core.logger import server_logger
 from core.state import virtual_joysticks
+from drivers.realsense_driver.color_codec import ColorTranscoder
+from drivers.realsense_driver.depth_codec import (
+    DEPTH_BINARY_SUBPROTOCOL,
+    DepthTranscoder,
+    negotiate_codec,
+)
+from core.robot_params import camera_width, camera_height
 from core.connection_config import (
     camera_depth_ws_url,
     camera_depth_query_ws_url,
@@ -17,11 +25,71 @@ from core.connection_config import (
 
 router = APIRouter(tags=["websockets"])
 
+def _query_number(websocket: WebSocket, name: str, cast, low, high):
+    value = websocket.query_params.get(name)
+    if value is None:
+        return None
+    try:
+        return min(max(cast(value), low), high)
+    except ValueError:
+        return None
+
+def _stream_params(websocket: WebSocket) -> dict:
+    """
+    Per-subscriber stream parameters from the query string:
+    ?fps=<max fps>&scale=<0.1..1>&quality=<JPEG 10..95>&decimation=<1..8>.
+    Scale is rounded to 0.05 so that clients share encoders.
+    """
+    scale = _query_number(websocket, "scale", float, 0.1, 1.0)
+    return {
+        "fps": _query_number(websocket, "fps", float, 0.5, 60.0),
+        "scale": round(scale * 20) / 20 if scale is not None else 1.0,
+        "quality": _query_number(websocket, "quality", int, 10, 95),
+        "decimation": _query_number(websocket, "decimation", int, 1, 8) or 1,
+    }
+
+async def _serve_color(websocket: WebSocket, url: str):
+    params = _stream_params(websocket)
+    hub = get_hub(url)
+    transform = None
+    if params["scale"] != 1.0 or params["quality"] is not None:
+        scale, quality = params["scale"], params["quality"] or 80
+        transform = hub.encoder(("color", scale, quality), lambda: ColorTranscoder(scale, quality))
+    await serve_stream(websocket, hub, transform=transform, max_fps=params["fps"])
+
 @router.websocket("/depth")
 async def depth_ws(websocket: WebSocket):
-    """WebSocket proxy for depth camera"""
+    """
+    Depth camera stream, shared by all clients through one upstream
+    connection (which is offered the binary format).
+
+    Clients get binary frames (see depth_codec) when they request the
+    depth.binary.v1 subprotocol or ?format=binary, optionally with
+    ?compression=zlib|lz4; otherwise legacy base64 text frames.
+    ?fps= and ?decimation= limit the rate and resolution per client.
+    """
     server_logger.log_event("debug", "WS /depth connected")
-    await proxy_websocket(websocket, camera_depth_ws_url)
+    requested = websocket.scope.get("subprotocols", [])
+    binary = (
+        DEPTH_BINARY_SUBPROTOCOL in requested
+        or websocket.query_params.get("format") == "binary"
+    )
+    codec = negotiate_codec(websocket.query_params.get("compression"))
+    params = _stream_params(websocket)
+    decimation = params["decimation"]
+    hub = get_hub(camera_depth_ws_url, subprotocols=[DEPTH_BINARY_SUBPROTOCOL])
+    # Один транскодер на набор параметров, общий для всех клиентов
+    transcoder = hub.encoder(
+        ("depth", binary, codec, decimation),
+        lambda: DepthTranscoder(binary, codec, camera_width, camera_height, decimation),
+    )
+    await serve_stream(
+        websocket,
+        hub,
+        transform=transcoder,
+        subprotocol=DEPTH_BINARY_SUBPROTOCOL if DEPTH_BINARY_SUBPROTOCOL in requested else None,
+        max_fps=params["fps"],
+    )
     server_logger.log_event("error", "WS /depth disconnected")
 
 @router.websocket("/depth_query")
@@ -33,16 +101,19 @@ async def depth_query_ws(websocket: WebSocket):
 
 @router.websocket("/color")
 async def color_ws(websocket: WebSocket):
-    """WebSocket proxy for color camera"""
+    """
+    Color camera stream (one shared upstream connection for all clients).
+    ?fps=, ?scale= and ?quality= re-encode the JPEG frames per parameter set.
+    """
     server_logger.log_event("debug", "WS /color connected")
-    await proxy_websocket(websocket, camera_color_ws_url)
+    await _serve_color(websocket, camera_color_ws_url)
     server_logger.log_event("error", "WS /color disconnected")
 
 @router.websocket("/camera2")
 async def camera2_ws(websocket: WebSocket):
-    """WebSocket proxy for second camera"""
+    """Second camera stream, same parameters as /color"""
     server_logger.log_event("debug", "WS /camera2 connected")
-    await proxy_websocket(websocket, camera2_ws_url)
+    await _serve_color(websocket, camera2_ws_url)
     server_logger.log_event("error", "WS /camera2 disconnected")
 
 @router.websocket("/igus")
@@ -52,6 +123,14 @@ async def igus_ws(websocket: WebSocket):
     await proxy_websocket(websocket, igus_ws_url)
     server_logger.log_event("error", "WS /igus disconnected")
 
+@router.get("/streams")
+async def streams_metrics():
+    """
+    Shared camera stream hubs (upstream state, subscribers, delivered and
+    dropped frames) and proxied connections (per-direction counters)
+    """
+    return {"hubs": get_hubs_metrics(), "proxies": get_proxy_metrics()}
+
 BUTTON_TIMEOUT = 0.2
 
 @router.websocket("/joystick")
@@ -0,0 +1,129 @@
+"""
+Benchmark: sequential-step latency of the HTTP API clients with the pooled
+long-lived session against the former session-per-`async with` behaviour
+(reproduced below by LegacyIgusClient / LegacyXarmClient).
+
+Runs a local aiohttp server that mimics the igus / xArm endpoints and
+replays the robot_scripts step pattern (lift move, lift status, arm
+position, arm move, lift move), each sequence wrapped in `async with`.
+
+    python services/benchmark_robot_clients.py [sequences] [step_delay_ms]
+"""
+import sys
+import os
+import asyncio
+import time
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+import aiohttp
+from aiohttp import web
+
+from core.logger import init_server_logger
+init_server_logger()
+from services.robot_clients import IgusClient, XarmClient
+
+
+class LegacyIgusClient(IgusClient):
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._session:
+            await self._session.close()
+
+
+class LegacyXarmClient(XarmClient):
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+
+def make_app(step_delay: float, peers: set) -> web.Application:
+    async def reply(request, data):
+        peers.add(request.transport.get_extra_info("peername"))
+        if step_delay:
+            await asyncio.sleep(step_delay)
+        return web.json_response(data)
+
+    async def igus_move(request):
+        return await reply(request, {"success": True})
+
+    async def igus_status(request):
+        return await reply(request, {"status_word": 1, "homed": True, "error": False, "connected": True, "position_cm": 40.0})
+
+    async def xarm_position(request):
+        return await reply(request, {"pose_name": "CURRENT", "points": {}})
+
+    async def xarm_move(request):
+        return await reply(request, {"success": True})
+
+    app = web.Application()
+    app.router.add_post("/api/v1/igus/motor/move", igus_move)
+    app.router.add_get("/api/v1/igus/motor/status", igus_status)
+    app.router.add_get("/api/v1/xarm/manipulator/current_position", xarm_position)
+    app.router.add_post("/api/v1/xarm/manipulator/complex_move/with_joints_dict", xarm_move)
+    return app
+
+
+async def run_sequence(igus, xarm, step_times: list):
+    move = {"position_cm": 40, "velocity_percent": 20, "acceleration_percent": 20, "blocking": True}
+    steps = [
+        lambda: igus.move_to_position(move),
+        igus.get_status,
+        xarm.get_current_position,
+        lambda: xarm.complex_move_with_joints_dict([{"j1": 0}], 20),
+        lambda: igus.move_to_position(move),
+    ]
+    async with igus, xarm:
+        for step in steps:
+            started = time.perf_counter()
+            await step()
+            step_times.append(time.perf_counter() - started)
+
+
+async def bench(name, igus, xarm, sequences, peers, lifespan):
+    peers.clear()
+    step_times = []
+    if lifespan:
+        # Как в main.lifespan: клиенты открыты на всё время работы сервера
+        await igus.__aenter__()
+        await xarm.__aenter__()
+    started = time.perf_counter()
+    for _ in range(sequences):
+        await run_sequence(igus, xarm, step_times)
+    total = time.perf_counter() - started
+    if lifespan:
+        await igus.__aexit__(None, None, None)
+        await xarm.__aexit__(None, None, None)
+    step_times.sort()
+    print(f"{name:8s}: {total / sequences * 1000:7.2f} ms/sequence, "
+          f"step mean {sum(step_times) / len(step_times) * 1000:.2f} ms, "
+          f"p95 {step_times[int(len(step_times) * 0.95)] * 1000:.2f} ms, "
+          f"{len(peers)} TCP connections")
+
+
+async def main(sequences: int, step_delay: float):
+    peers = set()
+    runner = web.AppRunner(make_app(step_delay, peers), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base = f"http://127.0.0.1:{port}/api/v1"
+    try:
+        await bench("legacy", LegacyIgusClient(f"{base}/igus/motor"), LegacyXarmClient(f"{base}/xarm"), sequences, peers, False)
+        await bench("pooled", IgusClient(f"{base}/igus/motor"), XarmClient(f"{base}/xarm"), sequences, peers, True)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    sequences = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    step_delay_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    asyncio.run(main(sequences, step_delay_ms / 1000))
@@ -0,0 +1,207 @@
+"""
+Device facade used by the robot sequences (application/robot_scripts).
+
+Two implementations with the same async interface:
+
+- InProcess*: calls the igus / xArm command layers (application.*_scripts)
+  directly, with the same locks and xArm executor as the HTTP routes;
+- Http*: goes through XarmClient / IgusClient, for running the sequences
+  against a remote server.
+
+Results mirror the JSON of the HTTP API: moves return {"success": bool}
+(plus "error" on failure or "task_id" for non-blocking calls), status
+calls return the Pydantic status model or ErrorStatus.
+"""
+
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Union
+
+from models.api_types import ErrorStatus, IgusStatusResponse, XarmStatusResponse
+
+
+def _error_status(e: Exception) -> ErrorStatus:
+    return ErrorStatus(error={"type": type(e).__name__, "msg": str(e)})
+
+
+async def _run(coro_factory, blocking: bool) -> Dict[str, Any]:
+    """Await a command (or start it as a task_manager task) and wrap the result like the API does."""
+    from core.state import task_manager
+    try:
+        if not blocking:
+            return {"success": True, "task_id": task_manager.create_task(coro_factory())}
+        return {"success": bool(await coro_factory())}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+class InProcessLift:
+    """Igus lift through application.igus_scripts."""
+
+    async def move_to_position(self, position_cm: float, velocity_percent: float,
+                               acceleration_percent: Optional[float] = None, blocking: bool = True) -> Dict[str, Any]:
+        from application.igus_scripts import move_motor_command
+        acceleration = velocity_percent if acceleration_percent is None else acceleration_percent
+        return await _run(
+            lambda: move_motor_command(position_cm, velocity_percent, acceleration, True), blocking
+        )
+
+    async def reference(self, blocking: bool = True) -> Dict[str, Any]:
+        from application.igus_scripts import reference_motor_command
+        return await _run(reference_motor_command, blocking)
+
+    async def fault_reset(self, blocking: bool = True) -> Dict[str, Any]:
+        from application.igus_scripts import reset_faults_command
+        return await _run(reset_faults_command, blocking)
+
+    async def get_status(self) -> Union[IgusStatusResponse, ErrorStatus]:
+        from application.igus_scripts import get_motor_status_command
+        try:
+            return IgusStatusResponse(**await get_motor_status_command())
+        except Exception as e:
+            return _error_status(e)
+
+
+class InProcessManipulator:
+    """xArm through application.xarm_scripts (manipulator lock + command executor)."""
+
+    async def complex_move_with_joints_dict(self, points: List[dict], velocity: float = 50,
+                                            blocking: bool = True, reset_faults: bool = False) -> Dict[str, Any]:
+        from application.xarm_scripts import complex_move_with_joints
+        params = SimpleNamespace(
+            points=[SimpleNamespace(**point) for point in points if point is not None],
+            velocity=velocity,
+            reset_faults=reset_faults,
+        )
+        return await _run(lambda: complex_move_with_joints(params), blocking)
+
+    async def move_to_pose(self, pose_name: str, velocity: float = 50,
+                           blocking: bool = True, reset_faults: bool = False) -> Dict[str, Any]:
+        from application.xarm_scripts import move_to_pose
+        params = SimpleNamespace(pose_name=pose_name, velocity=velocity, reset_faults=reset_faults)
+        return await _run(lambda: move_to_pose(params), blocking)
+
+    async def move_tool_position(self, x_offset: float, y_offset: float, z_offset: float, velocity: float = 50,
+                                 blocking: bool = True, reset_faults: bool = False) -> Dict[str, Any]:
+        from application.xarm_scripts import move_tool_position
+        params = SimpleNamespace(
+            x_offset=x_offset, y_offset=y_offset, z_offset=z_offset, velocity=velocity, reset_faults=reset_faults
+        )
+        return await _run(lambda: move_tool_position(params), blocking)
+
+    async def take(self) -> Dict[str, Any]:
+        from application.xarm_scripts import gripper_take
+        return await _run(gripper_take, True)
+
+    async def drop(self) -> Dict[str, Any]:
+        from application.xarm_scripts import gripper_drop
+        return await _run(gripper_drop, True)
+
+    async def get_current_position(self) -> Optional[dict]:
+        from application.xarm_scripts import get_current_position
+        pose_name, points = await get_current_position()
+        return {"pose_name": pose_name, "points": points}
+
+    async def get_status(self) -> Union[XarmStatusResponse, ErrorStatus]:
+        from application.xarm_scripts import get_manipulator_status
+        try:
+            return XarmStatusResponse(**await get_manipulator_status())
+        except Exception as e:
+            return _error_status(e)
+
+
+class HttpLift:
+    """Igus lift through the HTTP API (IgusClient)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def move_to_position(self, position_cm: float, velocity_percent: float,
+                               acceleration_percent: Optional[float] = None, blocking: bool = True) -> Dict[str, Any]:
+        params = {
+            "position_cm": position_cm,
+            "velocity_percent": velocity_percent,
+            "acceleration_percent": velocity_percent if acceleration_percent is None else acceleration_percent,
+            "blocking": blocking,
+        }
+        try:
+            return await self.client.move_to_position(params)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def reference(self, blocking: bool = True) -> Dict[str, Any]:
+        return await self.client.reference(blocking)
+
+    async def fault_reset(self, blocking: bool = True) -> Dict[str, Any]:
+        return await self.client.fault_reset(blocking)
+
+    async def get_status(self) -> Union[IgusStatusResponse, ErrorStatus]:
+        return await self.client.get_status()
+
+
+class HttpManipulator:
+    """xArm through the HTTP API (XarmClient)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def complex_move_with_joints_dict(self, points: List[dict], velocity: float = 50,
+                                            blocking: bool = True, reset_faults: bool = False) -> Dict[str, Any]:
+        result = await self.client.complex_move_with_joints_dict(points, velocity, blocking, reset_faults)
+        return result or {"success": False, "error": "No response"}
+
+    async def move_to_pose(self, pose_name: str, velocity: float = 50,
+                           blocking: bool = True, reset_faults: bool = False) -> Dict[str, Any]:
+        result = await self.client.move_to_pose(pose_name, velocity, blocking, reset_faults)
+        return result or {"success": False, "error": "No response"}
+
+    async def move_tool_position(self, x_offset: float, y_offset: float, z_offset: float, velocity: float = 50,
+                                 blocking: bool = True, reset_faults: bool = False) -> Dict[str, Any]:
+        result = await self.client.move_tool_position(x_offset, y_offset, z_offset, velocity, blocking, reset_faults)
+        return result or {"success": False, "error": "No response"}
+
+    async def take(self) -> Dict[str, Any]:
+        return await self.client.take() or {"success": False, "error": "No response"}
+
+    async def drop(self) -> Dict[str, Any]:
+        return await self.client.drop() or {"success": False, "error": "No response"}
+
+    async def get_current_position(self) -> Optional[dict]:
+        return await self.client.get_current_position()
+
+    async def get_status(self) -> Union[XarmStatusResponse, ErrorStatus]:
+        return await self.client.get_status()
+
+
+class DeviceFacade:
+    """
+    Lift + manipulator for the robot sequences.
+
+    `async with devices:` opens the HTTP client sessions in "http" mode and
+    is a no-op in-process, so sequences are written the same for both.
+    """
+
+    def __init__(self, lift, manipulator, mode: str, clients: tuple = ()):
+        self.lift = lift
+        self.manipulator = manipulator
+        self.mode = mode
+        self._clients = clients
+
+    async def __aenter__(self):
+        for client in self._clients:
+            await client.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        for client in reversed(self._clients):
+            await client.__aexit__(exc_type, exc_val, exc_tb)
+
+
+def create_device_facade(mode: str = "inprocess", xarm_client=None, igus_client=None) -> DeviceFacade:
+    """
+    :param mode: "inprocess" (direct calls) or "http" (through the given API clients)
+    """
+    if mode == "http":
+        return DeviceFacade(HttpLift(igus_client), HttpManipulator(xarm_client), mode, (igus_client, xarm_client))
+    if mode != "inprocess":
+        raise ValueError(f"Unknown device facade mode: {mode}")
+    return DeviceFacade(InProcessLift(), InProcessManipulator(), mode)
@@ -3,27 +3,68 @@ import aiohttp
 from typing import Any, Dict, Optional,List,Union
 from core.logger import server_logger
 from core.connection_config import web_server_ip, web_server_port
+from core.connection_config import (
+    api_client_pool_limit, api_client_keepalive_s, api_client_connect_timeout_s,
+    api_client_status_timeout_s, api_client_command_timeout_s, api_client_motion_timeout_s,
+)
 from models.api_types import IgusMoveParams,XarmJointsPositionResponse,XarmStatusResponse,ErrorStatus,IgusStatusResponse
 
-class XarmClient:
-    def __init__(self, base_url: str | None = None):
-        if base_url is None:
-            self.base_url = f"http://{web_server_ip}:{web_server_port}/api/v1/xarm"
+
+def _timeout(total: float) -> aiohttp.ClientTimeout:
+    return aiohttp.ClientTimeout(total=total, connect=api_client_connect_timeout_s)
+
+
+def _command_timeout(blocking: bool) -> aiohttp.ClientTimeout:
+    # Блокирующий запрос ждёт окончания движения
+    return _timeout(api_client_motion_timeout_s if blocking else api_client_command_timeout_s)
+
+
+class ApiClientBase:
+    """
+    One pooled aiohttp session per client for the process lifetime.
+
+    `async with client` is reentrant and safe for concurrent tasks: the
+    session is created by the first user and closed when the last one
+    exits (the server lifespan holds one for the whole run), so nested
+    sequences reuse the kept-alive connections instead of reconnecting.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
         self._session: Optional[aiohttp.ClientSession] = None
+        self._users = 0
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=api_client_pool_limit,
+                keepalive_timeout=api_client_keepalive_s,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=_timeout(api_client_command_timeout_s)
+            )
+        return self._session
 
     async def __aenter__(self):
-        self._session = aiohttp.ClientSession()
+        self._users += 1
+        self.session
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._session:
-            await self._session.close()
-            self._session = None
+        self._users = max(0, self._users - 1)
+        if not self._users:
+            await self.close()
 
-    async def _post(self, endpoint: str, json: dict) -> Optional[dict]:
+    async def close(self):
+        session, self._session = self._session, None
+        if session is not None:
+            await session.close()
+
+    async def _post(self, endpoint: str, json: dict, timeout: Optional[aiohttp.ClientTimeout] = None) -> Optional[dict]:
         url = f"{self.base_url}{endpoint}"
         try:
-            async with self._session.post(url, json=json) as resp:
+            async with self.session.post(url, json=json, timeout=timeout) as resp:
                 data = await resp.json()
                 if data:
                     return data
@@ -33,15 +74,22 @@ class XarmClient:
             server_logger.log_event("error", f"HTTP POST Exception: {e}")
             return None
 
-    async def _get(self, endpoint: str, params: dict = None) -> Optional[dict]:
+    async def _get(self, endpoint: str, params: dict = None, timeout: Optional[aiohttp.ClientTimeout] = None) -> Optional[dict]:
         url = f"{self.base_url}{endpoint}"
         try:
-            async with self._session.get(url, params=params) as resp:
+            async with self.session.get(url, params=params, timeout=timeout or _timeout(api_client_status_timeout_s)) as resp:
                 return await resp.json()
         except Exception as e:
             server_logger.log_event("error", f"HTTP GET Exception: {e}")
             return None
 
+
+class XarmClient(ApiClientBase):
+    def __init__(self, base_url: str | None = None):
+        if base_url is None:
+            base_url = f"http://{web_server_ip}:{web_server_port}/api/v1/xarm"
+        super().__init__(base_url)
+
     # Универсальный вызов команды
     async def execute_command(self, command: str, **params) -> Optional[dict]:
         return await self._post("/manipulator/command", {"command": command, **params})
@@ -62,10 +110,10 @@ class XarmClient:
         return await self._get("/manipulator/joints_position")
 
     async def take(self) -> Optional[dict]:
-        return await self._post("/manipulator/take", {})
+        return await self._post("/manipulator/take", {}, _command_timeout(True))
 
     async def drop(self) -> Optional[dict]:
-        return await self._post("/manipulator/drop", {})
+        return await self._post("/manipulator/drop", {}, _command_timeout(True))
 
     async def complex_move_with_joints_dict(self, points: List[dict], velocity: float = 50, blocking: bool = True, reset_faults: bool = False) -> Optional[dict]:
         payload = {
@@ -74,22 +122,22 @@ class XarmClient:
             "blocking": blocking,
             "reset_faults": reset_faults
         }
-        return await self._post("/manipulator/complex_move/with_joints_dict", payload)
+        return await self._post("/manipulator/complex_move/with_joints_dict", payload, _command_timeout(blocking))
 
     async def move_with_joints(self, joints: dict, velocity: float = 50, blocking: bool = True, reset_faults: bool = False) -> Optional[dict]:
         payload = {**joints, "velocity": velocity, "blocking": blocking, "reset_faults": reset_faults}
-        return await self._post("/manipulator/move/change_joints", payload)
+        return await self._post("/manipulator/move/change_joints", payload, _command_timeout(blocking))
 
     async def move_to_pose(self, pose_name: str, velocity: float = 50, blocking: bool = True, reset_faults: bool = False) -> Optional[dict]:
         payload = {"pose_name": pose_name, "velocity": velocity, "blocking": blocking, "reset_faults": reset_faults}
-        return await self._post("/manipulator/move/change_pose", payload)
+        return await self._post("/manipulator/move/change_pose", payload, _command_timeout(blocking))
 
     async def move_tool_position(self, x_offset: float, y_offset: float, z_offset: float, velocity: float = 50, blocking: bool = True, reset_faults: bool = False) -> Optional[dict]:
         payload = {
             "x_offset": x_offset, "y_offset": y_offset, "z_offset": z_offset,
             "velocity": velocity, "blocking": blocking, "reset_faults": reset_faults
         }
-        return await self._post("/manipulator/move/change_tool_position", payload)
+        return await self._post("/manipulator/move/change_tool_position", payload, _command_timeout(blocking))
 
     async def get_task_status(self, task_id: str) -> Optional[dict]:
         return await self._get("/manipulator/task_status/" + task_id)
@@ -98,7 +146,7 @@ class XarmClient:
         return await self._post("/joystick", payload)
         
 
-class IgusClient:
+class IgusClient(ApiClientBase):
     """
     Async client for the Igus Motor API (FastAPI).
     """
@@ -106,38 +154,7 @@ class IgusClient:
     def __init__(self, base_url: Optional[str] = None):
         if base_url is None:
             base_url = f"http://{web_server_ip}:{web_server_port}/api/v1/igus/motor"
-        self.base_url = base_url.rstrip("/")
-        self._session: Optional[aiohttp.ClientSession] = None
-
-    async def __aenter__(self):
-        self._session = aiohttp.ClientSession()
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._session:
-            await self._session.close()
-
-    async def _post(self, endpoint: str, json: dict) -> Optional[dict]:
-        url = f"{self.base_url}{endpoint}"
-        try:
-            async with self._session.post(url, json=json) as resp:
-                data = await resp.json()
-                if data:
-                    return data
-                else:
-                    raise Exception(f"Server error")
-        except Exception as e:
-            server_logger.log_event("error", f"HTTP POST Exception: {e}")
-            return None
-
-    async def _get(self, endpoint: str, params: dict = None) -> Optional[dict]:
-        url = f"{self.base_url}{endpoint}"
-        try:
-            async with self._session.get(url, params=params) as resp:
-                return await resp.json()
-        except Exception as e:
-            server_logger.log_event("error", f"HTTP GET Exception: {e}")
-            return None
+        super().__init__(base_url)
         
     async def move_to_position(
         self,
@@ -147,7 +164,8 @@ class IgusClient:
         Move motor to absolute position. Returns immediate result or task_id for async mode.
         """
         url = f"{self.base_url}/move"
-        async with self._session.post(url, json=params) as resp:
+        timeout = _command_timeout(params.get("blocking", True))
+        async with self.session.post(url, json=params, timeout=timeout) as resp:
             data = await resp.json()
             if resp.status != 200:
                 raise Exception(f"Move error: {data}")
@@ -158,8 +176,8 @@ class IgusClient:
         Start homing/reference procedure.
         """
         url = f"{self.base_url}/reference"
-        params = {"blocking": blocking}
-        async with self._session.post(url, params=params) as resp:
+        params = {"blocking": str(blocking).lower()}
+        async with self.session.post(url, params=params, timeout=_command_timeout(blocking)) as resp:
             data = await resp.json()
             if resp.status != 200:
                 raise Exception(f"Reference error: {data}")
@@ -170,32 +188,26 @@ class IgusClient:
         Reset motor errors.
         """
         url = f"{self.base_url}/fault_reset"
-        params = {"blocking": blocking}
-        async with self._session.post(url, params=params) as resp:
+        params = {"blocking": str(blocking).lower()}
+        async with self.session.post(url, params=params, timeout=_command_timeout(blocking)) as resp:
             data = await resp.json()
             if resp.status != 200:
                 raise Exception(f"Fault reset error: {data}")
             return data
 
-    async def get_status(self) -> Dict[str, Any]:
+    async def get_status(self) -> Union[IgusStatusResponse, ErrorStatus]:
         try:
             result = await self._get("/status")
             return IgusStatusResponse(**result)
         except:
             return ErrorStatus(**result)
-        url = f"{self.base_url}/status"
-        async with self._session.get(url) as resp:
-            data = await resp.json()
-            if resp.status != 200:
-                raise Exception(f"Status error: {data}")
-            return data
 
     async def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """
         Get status/result for an async task.
         """
         url = f"{self.base_url}/task_status/{task_id}"
-        async with self._session.get(url) as resp:
+        async with self.session.get(url, timeout=_timeout(api_client_status_timeout_s)) as resp:
             data = await resp.json()
             if resp.status != 200:
                 raise Exception(f"Task status error: {data}")
@@ -207,6 +219,6 @@ class IgusClient:
         Simple health check.
         """
         url = f"{self.base_url}/health"
-        async with self._session.get(url) as resp:
+        async with self.session.get(url, timeout=_timeout(api_client_status_timeout_s)) as resp:
             data = await resp.json()
             return data.get("status") == "ok"
@@ -0,0 +1,125 @@
+"""
+Background aggregator of subsystem statuses.
+
+Every subsystem is refreshed by its own task at its own interval; readers
+get the last value from memory together with its age. A refresh that is
+already running is shared: concurrent readers asking for a fresh value
+wait for the same upstream call instead of issuing their own.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from core.logger import server_logger
+from models.api_types import ErrorStatus
+
+
+def error_status(e: Exception) -> ErrorStatus:
+    return ErrorStatus(error={"type": type(e).__name__, "msg": str(e.args[0]) if e.args else ""})
+
+
+class SubsystemStatus:
+    def __init__(self, name: str, fetch: Callable[[], Awaitable], interval: float):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.value = None
+        self.updated: Optional[float] = None
+        self.refreshes = 0
+        self.errors = 0
+        self._refresh: Optional[asyncio.Future] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self.updated is None else time.monotonic() - self.updated
+
+    def refresh_future(self) -> asyncio.Future:
+        """Running refresh, or a new one if none is in progress."""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._fetch())
+        return self._refresh
+
+    async def refresh(self):
+        return await asyncio.shield(self.refresh_future())
+
+    async def _fetch(self):
+        try:
+            value = await self.fetch()
+        except Exception as e:
+            value = error_status(e)
+        if isinstance(value, ErrorStatus):
+            self.errors += 1
+        self.value = value
+        self.updated = time.monotonic()
+        self.refreshes += 1
+        return value
+
+
+class StatusAggregator:
+    def __init__(self):
+        self.subsystems: Dict[str, SubsystemStatus] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def add(self, name: str, fetch: Callable[[], Awaitable], interval: float) -> None:
+        self.subsystems[name] = SubsystemStatus(name, fetch, interval)
+
+    # ------------- BACKGROUND REFRESH -------------
+    def start(self) -> None:
+        for name, subsystem in self.subsystems.items():
+            if name not in self._tasks or self._tasks[name].done():
+                self._tasks[name] = asyncio.create_task(self._run(subsystem))
+
+    async def _run(self, subsystem: SubsystemStatus) -> None:
+        while True:
+            try:
+                await subsystem.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                server_logger.log_event("error", f"Status refresh {subsystem.name}: {e}")
+            await asyncio.sleep(subsystem.interval)
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        for task in self._tasks.values():
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks.clear()
+
+    # ------------- READ -------------
+    async def get(self, max_age: Optional[float] = None) -> Dict[str, object]:
+        """
+        Last value of every subsystem. Subsystems never fetched, or older than
+        max_age (if given), are refreshed first, concurrently.
+        """
+        stale = [
+            subsystem for subsystem in self.subsystems.values()
+            if subsystem.updated is None or (max_age is not None and subsystem.age > max_age)
+        ]
+        if stale:
+            # Фьючерсы берём сразу, а не в задачах gather: иначе завершившийся
+            # до их старта запрос был бы повторён
+            await asyncio.gather(*(asyncio.shield(subsystem.refresh_future()) for subsystem in stale))
+        return {name: subsystem.value for name, subsystem in self.subsystems.items()}
+
+    def ages(self) -> Dict[str, Optional[float]]:
+        return {
+            name: None if subsystem.age is None else round(subsystem.age, 3)
+            for name, subsystem in self.subsystems.items()
+        }
+
+    def get_metrics(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "interval_s": subsystem.interval,
+                "age_s": None if subsystem.age is None else round(subsystem.age, 3),
+                "refreshes": subsystem.refreshes,
+                "errors": subsystem.errors,
+                "running": name in self._tasks and not self._tasks[name].done(),
+            }
+            for name, subsystem in self.subsystems.items()
+        }
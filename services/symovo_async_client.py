@@ -0,0 +1,150 @@
+"""
+Async client of the Symovo AGV REST API.
+
+One aiohttp session (HTTP/1.1 keep-alive pool, TLS without certificate
+verification like the AGV's self-signed setup requires) per client and
+per-endpoint timeouts. Methods return the decoded JSON or raise AgvError.
+
+The session belongs to the event loop it was created on; services.symovo_lib.AgvClient
+runs this client on its own loop thread and exposes it both sync and async.
+"""
+
+import asyncio
+from typing import Any, Optional
+
+import aiohttp
+
+from core.connection_config import (
+    agv_pool_limit, agv_keepalive_s, agv_status_timeout_s, agv_query_timeout_s,
+    agv_command_timeout_s, agv_wait_timeout_s, agv_connect_timeout_s,
+)
+
+
+class AgvError(Exception):
+    """AGV request failed (connection, HTTP status or invalid JSON)."""
+
+
+# Таймауты по типу запроса (с)
+TIMEOUTS = {
+    "status": agv_status_timeout_s,
+    "query": agv_query_timeout_s,
+    "command": agv_command_timeout_s,
+    "wait": agv_wait_timeout_s,
+}
+
+
+class AsyncAgvClient:
+    def __init__(self, ip: str, robot_number):
+        self.ip = ip
+        self.robot_number = robot_number
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.requests = 0
+        self.errors = 0
+
+    # ------------- URLS -------------
+    @property
+    def base_url(self) -> str:
+        return f"https://{self.ip}"
+
+    # ------------- SESSION -------------
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(ssl=False, limit=agv_pool_limit, keepalive_timeout=agv_keepalive_s)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self) -> None:
+        session, self._session = self._session, None
+        if session is not None:
+            await session.close()
+
+    @staticmethod
+    def _timeout(kind: str) -> aiohttp.ClientTimeout:
+        if kind == "wait":
+            # Long-poll: истечение ожидания ответа - SocketTimeoutError,
+            # недоступный AGV - ConnectionTimeoutError
+            return aiohttp.ClientTimeout(total=None, connect=agv_connect_timeout_s, sock_read=TIMEOUTS[kind])
+        return aiohttp.ClientTimeout(total=TIMEOUTS[kind])
+
+    async def request(self, method: str, path: str, kind: str = "query", **kwargs) -> Any:
+        """HTTP request to the AGV; kind selects the timeout (status/query/command/wait)."""
+        self.requests += 1
+        timeout = self._timeout(kind)
+        try:
+            async with self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.errors += 1
+            raise AgvError(f"{method} {path}: {type(e).__name__} {e}") from e
+
+    async def get_conditional(self, path: str, validators: dict) -> tuple:
+        """
+        GET with If-None-Match / If-Modified-Since from validators (previous ETag / Last-Modified).
+        Returns (data, validators); data is None if the AGV answered 304 Not Modified.
+        """
+        self.requests += 1
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        timeout = aiohttp.ClientTimeout(total=TIMEOUTS["query"])
+        try:
+            async with self.session.get(f"{self.base_url}{path}", headers=headers, timeout=timeout) as response:
+                if response.status == 304:
+                    return None, validators
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+                return data, {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.errors += 1
+            raise AgvError(f"GET {path}: {type(e).__name__} {e}") from e
+
+    # ------------- ROBOT -------------
+    async def get_robot(self) -> dict:
+        return await self.request("GET", f"/v0/agv/{self.robot_number}", "status")
+
+    async def get_pose(self) -> dict:
+        return (await self.request("GET", f"/v0/agv/{self.robot_number}/pose", "status"))["pose"]
+
+    async def check_reachability(self, payload: dict) -> Any:
+        return await self.request("POST", f"/v1/robots/{self.robot_number}/reachable", json=payload)
+
+    # ------------- METADATA -------------
+    async def get_jobs(self) -> list:
+        return await self.request("GET", "/v0/job")
+
+    async def get_stations(self) -> list:
+        return await self.request("GET", "/v0/station")
+
+    async def get_maps(self) -> list:
+        return await self.request("GET", "/v0/map")
+
+    # ------------- TRANSPORTS -------------
+    async def create_transport(self, payload: dict) -> dict:
+        return await self.request("POST", "/v0/transport", "command", json=payload)
+
+    async def create_transport_from_job(self, job_id) -> dict:
+        return await self.request(
+            "PUT", f"/v0/transport/create_from_job/{job_id}", "command",
+            headers={"Content-Type": "application/json"},
+        )
+
+    async def get_transport(self, transport_id) -> dict:
+        return await self.request("GET", f"/v0/transport/{transport_id}")
+
+    async def wait_for_changes(self, transport_id) -> dict:
+        """
+        Long-poll: returns when the transport changes (or the AGV's own wait ends).
+        If nothing arrives within agv_wait_timeout_s the AgvError is caused by
+        aiohttp.SocketTimeoutError; a connection timeout is a ConnectionTimeoutError.
+        """
+        return await self.request("GET", f"/v0/transport/{transport_id}/wait_for_changes", "wait")
+
+    def get_metrics(self) -> dict:
+        return {"requests": self.requests, "errors": self.errors}
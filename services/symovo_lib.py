@@ -1,386 +1,577 @@
-import requests
-import time
-import threading
-from datetime import datetime
-import asyncio
-import math
-from core.logger import server_logger
-requests.packages.urllib3.disable_warnings()
-from typing import Union
-from models.api_types import (
-    SymovoStatusResponse,SymovoPose,SymovoVelocity,ErrorStatus
-)
-# import services.igus_lib as igus_lib
-from core.connection_config import symovo_car_ip, symovo_car_number
-
-symovo_car_lock = asyncio.Lock()
-
-def get_job_from_name(list,name):
-    for job in list:
-        if name == job['name']:
-            return job
-        
-class AgvClient:
-    def __init__(self, ip="", robot_number=""):
-        self.ip = ip
-        self.robot_number = robot_number
-
-        # Поля, которые будем обновлять при каждом успешном запросе
-        self.id = None
-        self.name = None
-        self.pose_x = None
-        self.pose_y = None
-        self.pose_theta = None
-        self.pose_map_id = None
-        self.velocity_x = None
-        self.velocity_y = None
-        self.velocity_theta = None
-        self.state = None
-        self.battery_level = None
-        self.state_flags = {}
-        self.robot_ip = None
-        self.replication_port = None
-        self.api_port = None
-        self.iot_port = None
-        self.last_seen = None
-        self.enabled = None
-        self.last_update = None
-        self.attributes = {}
-        self.planned_path_edges = []
-
-        # Дополнительные переменные
-        self.last_update_time = None  # Время последнего опроса
-        self.online = False           # Статус подключения
-
-        # Для фонового опроса
-        self._stop_event = threading.Event()
-        self._polling_thread = None
-
-    def _get_robot_url(self):
-        """Generate URL for AGV data request."""
-        return f"https://{self.ip}/v0/agv/{self.robot_number}"
-    
-    def _get_transport_url(self):
-        """Generate URL for transport requests."""
-        return f"https://{self.ip}/v0/transport"
-    
-    def _get_job_url(self):
-        """Generate URL for job requests."""
-        return f"https://{self.ip}/v0/job"
-    
-    def _get_wait_transport_url(self,id):
-        """Generate URL for job requests."""
-        return f"https://{self.ip}/v0/transport/{id}/wait_for_changes"
-    
-    def _get_v1_robot_url(self):
-        """Generate base URL for v1 robot requests."""
-        return f"https://{self.ip}/v1/robots/{self.robot_number}"
-
-    def _get_v1_maps_url(self):
-        """Generate URL for v1 maps list."""
-        return f"https://{self.ip}/v0/map"
-    
-    def _get_stations_url(self):
-        """Generate URL for station list requests."""
-        return f"https://{self.ip}/v0/station"
-    
-
-    # def get_status(self)-> Union[SymovoStatusResponse, ErrorStatus]:
-
-    #     url = self._get_robot_url()
-    #     try:
-    #         response = requests.get(url, verify=False, timeout=2)
-    #         response.raise_for_status()
-    #         data = response.json()
-
-    #         velocity = data.get('velocity', {})
-    #         if velocity is not None:
-    #             self.velocity_x = velocity.get('x')
-    #             self.velocity_y = velocity.get('y')
-    #             self.velocity_theta = velocity.get('theta')
-    #         velocity = SymovoVelocity(**velocity)
-    #         pose = SymovoPose(**data.get('pose', {}))
-
-    #         data.append(velocity)
-    #         data.append(pose)
-    #         return SymovoStatusResponse(**data)
-
-    #     except Exception as e:
-    #         error = {"type": type(e.args[0]).__name__, "msg": e.args[0]._message}
-    #         return ErrorStatus(error=error)
-
-    def start_polling(self, interval=5):
-        """
-        Запускает фоновый поток, который каждые interval секунд 
-        вызывает метод poll() для обновления данных о роботе.
-        """
-
-        def polling_loop():
-            while not self._stop_event.is_set():
-                self.poll()
-                time.sleep(interval)
-
-        self._stop_event.clear()
-        self._polling_thread = threading.Thread(target=polling_loop, daemon=True)
-        self._polling_thread.start()
-
-    def stop_polling(self):
-        """Останавливает фоновый опрос."""
-        if self._stop_event:
-            self._stop_event.set()
-        if self._polling_thread:
-            self._polling_thread.join()
-
-    def get_jobs(self):
-        url = self._get_job_url()
-        try:
-            response = requests.get(url, verify=False, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            return data
-        except requests.exceptions.RequestException as e:
-            # Error during request
-            server_logger.log_event("error", f"Error polling AGV: {e}")
-            self.online = False
-            return False
-        except ValueError:
-            # Malformed JSON
-            server_logger.log_event("error", "Error: invalid JSON in response.")
-            self.online = False
-            return False
-
-    def create_transport_from_job(self, job):
-        headers = {
-            "Content-Type": "application/json",
-        }
-        job_id = job.get('id') 
-        if not job_id:
-            server_logger.log_event("error", "Error: job does not contain 'id'.")
-            return False
-        url = self._get_transport_url()
-        put_create_transport_from_job = f"{url}/create_from_job/{job_id}"
-
-        try:
-            response = requests.put(put_create_transport_from_job, headers=headers, verify=False, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            return data
-        except requests.exceptions.RequestException as e:
-            server_logger.log_event("error", f"Error performing PUT request: {e}")
-            return False
-        except ValueError:
-            server_logger.log_event("error", "Error: invalid JSON in response.")
-            return False
-
-    def get_robot_position(self):
-        """Получает текущие координаты робота."""
-        url = self._get_robot_url() +"/pose"
-        try:
-            response = requests.get(url, verify=False, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            return data["pose"]["x"], data["pose"]["y"]
-        except requests.exceptions.RequestException as e:
-            # Error during request
-            server_logger.log_event("error", f"Error polling AGV: {e}")
-            self.online = False
-            return False
-        except ValueError:
-            # Malformed JSON
-            server_logger.log_event("error", "Error: invalid JSON in response.")
-            self.online = False
-            return False
-
-    def get_stations(self):
-        """Получает список станций с их координатами."""
-        url = self._get_stations_url()
-        try:
-            response = requests.get(url, verify=False, timeout=10)
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            # Error during request
-            server_logger.log_event("error", f"Error polling AGV: {e}")
-            self.online = False
-            return False
-        except ValueError:
-            # Malformed JSON
-            server_logger.log_event("error", "Error: invalid JSON in response.")
-            self.online = False
-            return False
-
-    def get_maps(self):
-        """Возвращает список доступных карт."""
-        url = self._get_v1_maps_url()
-        try:
-            response = requests.get(url, verify=False, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            server_logger.log_event("error", f"Error getting maps: {e}")
-            return None
-        except ValueError:
-            server_logger.log_event("error", "Error: invalid JSON in response.")
-            return None
-
-    def move_to(
-        self,
-        x: float,
-        y: float,
-        theta: float = 0,
-        map_id: str | None = None,
-        max_speed: float | None = None,
-        wait = True
-    ):
-        """Отправляет AGV к произвольной координате."""
-        url = self._get_transport_url()
-
-        pose = {"x": x, "y": y, "theta": theta, "map_id": map_id or 0}
-        step = {
-            "poses": [pose],
-            "_type_id": 7,
-            "finished": False,
-            "isNext": False,
-        }
-        state_log_item = {
-            "timestamp": time.time(),
-            "step_idx": 0,
-            "status_code": 0,
-            "status_detail": 1,
-            "level": None,
-        }
-        payload = {
-            "timestamp": time.time(),
-            "id":0,
-            "agv": {"id": int(self.robot_number)},
-            "job": None,
-            "steps": [step],
-            "state_log": [state_log_item],
-            "needed_agv_attributes": {
-                "full_eurobox": False,
-                "half_eurobox_front": False,
-                "half_eurobox_back": False,
-                "gap_charge": False,
-                "charging_contacts": False,
-            },
-            "description": "GoTo Pose",
-            "cancelable": True
-        }
-
-        if max_speed is not None:
-            pose["maxSpeed"] = max_speed
-
-        try:
-            response = requests.post(url, json=payload, verify=False, timeout=15)
-            response.raise_for_status()
-            result = response.json()
-            time.sleep(1.5)
-            if wait:
-                url = self._get_wait_transport_url(result["id"])
-                response = requests.get(url, verify=False, timeout=60)
-                response.raise_for_status()
-                return response.json()
-            return result
-        except requests.exceptions.RequestException as e:
-            server_logger.log_event("error", f"Error moving AGV: {e}")
-            raise Exception("Failed to move AGV")
-        except ValueError:
-            server_logger.log_event("error", "Error: invalid JSON in response.")
-            raise Exception("Failed to move AGV")
-        
-    def check_reachability(self, x: float, y: float, theta: float = 0, map_id: str | None = None):
-        """Проверяет достижимость точки (если поддерживается API)."""
-        url = f"{self._get_v1_robot_url()}/reachable"
-        payload = {"x": x, "y": y, "theta": theta}
-        if map_id is not None:
-            payload["mapId"] = map_id
-        try:
-            response = requests.post(url, json=payload, verify=False, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            server_logger.log_event("error", f"Error checking reachability: {e}")
-            return None
-        except ValueError:
-            server_logger.log_event("error", "Error: invalid JSON in response.")
-            return None
-
-    def get_task_status(self, task_id: str):
-        """Возвращает статус задачи по ID."""
-        url = f"https://{self.ip}/v0/transport/{task_id}"
-        try:
-            response = requests.get(url, verify=False, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            server_logger.log_event("error", f"Error getting task status: {e}")
-            return None
-        except ValueError:
-            server_logger.log_event("error", "Error: invalid JSON in response.")
-            return None
-        
-    def find_nearest_station(self):
-        """
-        Определяет ближайшую станцию к роботу.
-        Возвращает полный словарь данных о ближайшей станции,
-        дополнительно добавляя ключ "distance" с вычисленным расстоянием.
-        """
-        robot_x, robot_y = self.get_robot_position()
-        stations = self.get_stations()
-        
-        if not stations:
-            return None  # Если станций нет, сразу возвращаем None
-
-        nearest_station = None
-        min_distance = float('inf')
-
-        for station in stations:
-            station_x = station["pose"]["x"]
-            station_y = station["pose"]["y"]
-            
-            # Вычисляем евклидово расстояние
-            distance = math.sqrt((robot_x - station_x)**2 + (robot_y - station_y)**2)
-
-            if distance < min_distance:
-                min_distance = distance
-                nearest_station = station
-
-        # Добавим в результат расстояние (при необходимости)
-        if nearest_station is not None:
-            nearest_station = dict(nearest_station)  # Скопируем, если не хотим менять оригинал
-            nearest_station["distance"] = min_distance
-
-        return nearest_station
-    
-
-    def go_to_position(self, name, reconfig=False, wait=False):
-        try:
-            jobs = self.get_jobs()
-            nearest_station = self.find_nearest_station()
-            current_station = None
-
-            # If we successfully determined the nearest station and it is
-            # essentially the same as the requested one (within 5 cm), we can
-            # skip creating a new job.
-            if nearest_station and nearest_station.get("distance", float("inf")) < 0.05:
-                current_station = nearest_station
-
-            if current_station is not None:
-                if current_station.get("name") == name:
-                    return True
-            # if reconfig:
-            #     igus_lib.go_to_position(0, 4000, reconfig, True)
-            if self.create_transport_from_job(get_job_from_name(jobs, name)) != False:
-                return True
-            return False
-
-        except Exception as e:
-            return e
-
-# ================================
-# Пример использования:
-# ================================
-
-if __name__ == "__main__":
-    client = AgvClient(ip=symovo_car_ip, robot_number=symovo_car_number)
-    client.start_polling(interval=10)
-    server_logger.log_event("info", str(client.go_to_position("Test", True, True)))
+import time
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+import asyncio
+from core.logger import server_logger
+from typing import AsyncIterator, Union
+from models.api_types import (
+    SymovoStatusResponse,SymovoPose,SymovoVelocity,ErrorStatus
+)
+# import services.igus_lib as igus_lib
+from core.connection_config import (
+    symovo_car_ip, symovo_car_number, agv_poll_moving_s, agv_poll_idle_s, agv_transport_timeout_s,
+)
+from services.symovo_async_client import AsyncAgvClient, AgvError, TIMEOUTS
+from services.symovo_metadata import AgvMetadataCache
+from services.symovo_poller import AgvPoller, AgvState
+from services.symovo_transport_tracker import TransportTracker, transport_progress
+
+symovo_car_lock = asyncio.Lock()
+# Запас блокирующего вызова сверх таймаута запроса: сначала срабатывает таймаут aiohttp
+SYNC_CALL_MARGIN_S = 1.0
+
+def get_job_from_name(list,name):
+    for job in list:
+        if name == job['name']:
+            return job
+        
+class AgvClient:
+    """
+    Symovo AGV client.
+
+    All HTTP goes through one AsyncAgvClient (one keep-alive pool) running on
+    a dedicated event loop thread. Every operation exists as `xxx_async`
+    (await from any event loop, no worker thread is held while waiting for
+    the AGV) and as the former blocking `xxx` (for threads and scripts).
+
+    Transports are followed by a TransportTracker on the same loop: waiting
+    for arrival is an await on the transport's future, and progress can be
+    streamed with transport_events(). Jobs, stations and maps come from an
+    AgvMetadataCache (TTL + conditional refresh) on the same loop. The
+    AgvPoller keeps a versioned AgvState snapshot that readers get from
+    memory (see snapshot / get_state_status_async).
+    """
+
+    def __init__(self, ip="", robot_number=""):
+        self.ip = ip
+        self.robot_number = robot_number
+        self.aio = AsyncAgvClient(ip, robot_number)
+        self.tracker = TransportTracker(self.aio)
+        self.metadata = AgvMetadataCache(self.aio)
+        self.poller = AgvPoller(
+            self.get_status_async, lambda: bool(self.tracker.active), agv_poll_moving_s, agv_poll_idle_s
+        )
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: threading.Thread | None = None
+        self._loop_lock = threading.Lock()
+
+        # Поля, которые будем обновлять при каждом успешном запросе
+        self.id = None
+        self.name = None
+        self.pose_x = None
+        self.pose_y = None
+        self.pose_theta = None
+        self.pose_map_id = None
+        self.velocity_x = None
+        self.velocity_y = None
+        self.velocity_theta = None
+        self.state = None
+        self.battery_level = None
+        self.state_flags = {}
+        self.robot_ip = None
+        self.replication_port = None
+        self.api_port = None
+        self.iot_port = None
+        self.last_seen = None
+        self.enabled = None
+        self.last_update = None
+        self.attributes = {}
+        self.planned_path_edges = []
+
+        # Дополнительные переменные
+        self.last_update_time = None  # Время последнего опроса
+        self.online = False           # Статус подключения
+
+    # ------------- AGV EVENT LOOP -------------
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name="agv-client", daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    async def call(self, coro):
+        """Await a coroutine of self.aio on the AGV loop from any event loop."""
+        loop = self._get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def _run(self, coro, kind: str = "query", timeout: float | None = None):
+        """
+        Blocking call of an *_async method. Waits at most timeout seconds
+        (default: the timeout of the request kind plus a margin), then cancels
+        the call and raises TimeoutError. Must not be called on the AGV loop.
+        """
+        loop = self._get_loop()
+        if threading.current_thread() is self._loop_thread:
+            coro.close()
+            raise RuntimeError("Blocking AgvClient call on the AGV event loop; await the *_async method instead")
+        if timeout is None:
+            timeout = TIMEOUTS[kind] + SYNC_CALL_MARGIN_S
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"AGV call timed out after {timeout} s") from None
+
+    def close(self):
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.poller.stop(), self._loop).result(timeout=5)
+            asyncio.run_coroutine_threadsafe(self.tracker.close(), self._loop).result(timeout=5)
+            asyncio.run_coroutine_threadsafe(self.aio.close(), self._loop).result(timeout=5)
+        except Exception as e:
+            server_logger.log_event("error", f"AGV client close: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join(timeout=5)
+        self._loop = None
+
+    def _get_robot_url(self):
+        """Generate URL for AGV data request."""
+        return f"https://{self.ip}/v0/agv/{self.robot_number}"
+    
+    def _get_transport_url(self):
+        """Generate URL for transport requests."""
+        return f"https://{self.ip}/v0/transport"
+    
+    def _get_job_url(self):
+        """Generate URL for job requests."""
+        return f"https://{self.ip}/v0/job"
+    
+    def _get_wait_transport_url(self,id):
+        """Generate URL for job requests."""
+        return f"https://{self.ip}/v0/transport/{id}/wait_for_changes"
+    
+    def _get_v1_robot_url(self):
+        """Generate base URL for v1 robot requests."""
+        return f"https://{self.ip}/v1/robots/{self.robot_number}"
+
+    def _get_v1_maps_url(self):
+        """Generate URL for v1 maps list."""
+        return f"https://{self.ip}/v0/map"
+    
+    def _get_stations_url(self):
+        """Generate URL for station list requests."""
+        return f"https://{self.ip}/v0/station"
+    
+    # ------------- STATUS -------------
+    async def get_status_async(self) -> SymovoStatusResponse:
+        """Текущее состояние AGV (обновляет поля клиента). Исключение, если AGV недоступен."""
+        try:
+            data = await self.call(self.aio.get_robot())
+        except AgvError:
+            self.online = False
+            raise
+        self.online = True
+        self.last_update_time = time.time()
+        return self._status_from_data(data)
+
+    def get_status(self) -> SymovoStatusResponse:
+        return self._run(self.get_status_async(), "status")
+
+    def _status_from_data(self, data: dict) -> SymovoStatusResponse:
+        pose = data.get("pose") or {}
+        velocity = data.get("velocity") or {}
+        self.id = data.get("id")
+        self.name = data.get("name")
+        self.pose_x, self.pose_y = pose.get("x"), pose.get("y")
+        self.pose_theta, self.pose_map_id = pose.get("theta"), pose.get("map_id")
+        self.velocity_x, self.velocity_y = velocity.get("x"), velocity.get("y")
+        self.velocity_theta = velocity.get("theta")
+        self.state = data.get("state")
+        self.battery_level = data.get("battery_level")
+        self.state_flags = data.get("state_flags") or {}
+        self.enabled = data.get("enabled")
+        return SymovoStatusResponse(
+            online=self.online,
+            last_update_time=datetime.fromtimestamp(self.last_update_time).isoformat() if self.last_update_time else None,
+            id=None if self.id is None else str(self.id),
+            name=self.name,
+            pose=SymovoPose(
+                x_m=self.pose_x or 0.0,
+                y_m=self.pose_y or 0.0,
+                theta_rad=self.pose_theta or 0.0,
+                map_id=None if self.pose_map_id is None else str(self.pose_map_id),
+            ),
+            velocity=SymovoVelocity(
+                vx_m_s=self.velocity_x or 0.0,
+                vy_m_s=self.velocity_y or 0.0,
+                omega_rad_s=self.velocity_theta or 0.0,
+            ),
+            state=None if self.state is None else str(self.state),
+            battery_level_percent=self.battery_level,
+            state_flags=self.state_flags,
+            robot_ip=data.get("robot_ip"),
+            replication_port=data.get("replication_port"),
+            api_port=data.get("api_port"),
+            iot_port=data.get("iot_port"),
+            last_seen=None if data.get("last_seen") is None else str(data.get("last_seen")),
+            enabled=self.enabled,
+            last_update_epoch=self.last_update_time,
+            attributes=data.get("attributes"),
+            planned_path_edges=data.get("planned_path_edges"),
+        )
+
+    # ------------- POLLING / STATE -------------
+    @property
+    def snapshot(self) -> AgvState | None:
+        """Последний снимок состояния из фонового опроса (None до первого опроса)."""
+        return self.poller.state
+
+    async def poll_async(self) -> AgvState:
+        """Один опрос AGV вне расписания; обновляет снимок состояния."""
+        return await self.call(self.poller.poll())
+
+    def poll(self) -> AgvState:
+        return self._run(self.poll_async(), "status")
+
+    def start_polling(self, interval=None, moving_interval=None):
+        """
+        Запускает фоновый опрос на цикле AGV: раз в interval секунд в простое
+        и раз в moving_interval во время движения (по умолчанию из конфигурации).
+        """
+        if interval is not None:
+            self.poller.idle_interval = interval
+        if moving_interval is not None:
+            self.poller.moving_interval = moving_interval
+        self._get_loop().call_soon_threadsafe(self.poller.start)
+
+    def stop_polling(self):
+        """Останавливает фоновый опрос."""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self.poller.stop(), self._loop).result(timeout=5)
+
+    async def get_state_status_async(self) -> SymovoStatusResponse:
+        """
+        Статус AGV из снимка фонового опроса без запроса к AGV; если опрос не
+        запущен - прямой запрос. Исключение, если AGV недоступен.
+        """
+        state = self.poller.state
+        if not self.poller.running or state is None:
+            return await self.get_status_async()
+        if state.error is not None:
+            raise AgvError(state.error)
+        return state.status
+
+    # ------------- METADATA -------------
+    def invalidate_metadata(self, kind: str | None = None):
+        """Следующее чтение jobs / stations / maps (или всех) перепроверит кэш у AGV."""
+        self.metadata.invalidate(kind)
+
+    def get_metadata_metrics(self) -> dict:
+        return self.metadata.get_metrics()
+
+    async def get_jobs_async(self):
+        try:
+            return await self.call(self.metadata.get("jobs"))
+        except AgvError as e:
+            server_logger.log_event("error", f"Error polling AGV: {e}")
+            self.online = False
+            return False
+
+    def get_jobs(self):
+        return self._run(self.get_jobs_async())
+
+    async def get_stations_async(self):
+        """Получает список станций с их координатами."""
+        try:
+            return await self.call(self.metadata.get("stations"))
+        except AgvError as e:
+            server_logger.log_event("error", f"Error polling AGV: {e}")
+            self.online = False
+            return False
+
+    def get_stations(self):
+        return self._run(self.get_stations_async())
+
+    async def get_maps_async(self):
+        """Возвращает список доступных карт."""
+        try:
+            return await self.call(self.metadata.get("maps"))
+        except AgvError as e:
+            server_logger.log_event("error", f"Error getting maps: {e}")
+            return None
+
+    def get_maps(self):
+        return self._run(self.get_maps_async())
+
+    async def get_robot_position_async(self):
+        """Получает текущие координаты робота."""
+        try:
+            pose = await self.call(self.aio.get_pose())
+            return pose["x"], pose["y"]
+        except (AgvError, KeyError, TypeError) as e:
+            server_logger.log_event("error", f"Error polling AGV: {e}")
+            self.online = False
+            return False
+
+    def get_robot_position(self):
+        return self._run(self.get_robot_position_async(), "status")
+
+    # ------------- TRANSPORTS -------------
+    async def create_transport_from_job_async(self, job):
+        job_id = job.get('id') if job else None
+        if not job_id:
+            server_logger.log_event("error", "Error: job does not contain 'id'.")
+            return False
+        try:
+            return await self.call(self._create_tracked_job_transport(job_id))
+        except AgvError as e:
+            server_logger.log_event("error", f"Error performing PUT request: {e}")
+            return False
+
+    def create_transport_from_job(self, job):
+        return self._run(self.create_transport_from_job_async(job), "command")
+
+    def _transport_payload(self, x, y, theta, map_id, max_speed) -> dict:
+        pose = {"x": x, "y": y, "theta": theta, "map_id": map_id or 0}
+        if max_speed is not None:
+            pose["maxSpeed"] = max_speed
+        step = {
+            "poses": [pose],
+            "_type_id": 7,
+            "finished": False,
+            "isNext": False,
+        }
+        state_log_item = {
+            "timestamp": time.time(),
+            "step_idx": 0,
+            "status_code": 0,
+            "status_detail": 1,
+            "level": None,
+        }
+        return {
+            "timestamp": time.time(),
+            "id":0,
+            "agv": {"id": int(self.robot_number)},
+            "job": None,
+            "steps": [step],
+            "state_log": [state_log_item],
+            "needed_agv_attributes": {
+                "full_eurobox": False,
+                "half_eurobox_front": False,
+                "half_eurobox_back": False,
+                "gap_charge": False,
+                "charging_contacts": False,
+            },
+            "description": "GoTo Pose",
+            "cancelable": True
+        }
+
+    async def _create_tracked_transport(self, payload: dict) -> dict:
+        # Выполняется на цикле AGV: трекер и его future живут там
+        result = await self.aio.create_transport(payload)
+        self.tracker.track(result["id"], result)
+        # AGV начинает движение - переходим на частый опрос сразу
+        self.poller.wake()
+        return result
+
+    async def _create_tracked_job_transport(self, job_id) -> dict:
+        result = await self.aio.create_transport_from_job(job_id)
+        if isinstance(result, dict) and result.get("id") is not None:
+            self.tracker.track(result["id"], result)
+        self.poller.wake()
+        return result
+
+    async def _wait_transport(self, transport_id) -> dict:
+        return await self.tracker.track(transport_id).wait()
+
+    async def start_transport_async(self, x: float, y: float, theta: float = 0,
+                                    map_id: str | None = None, max_speed: float | None = None) -> dict:
+        """Создаёт транспорт к координате и ставит его на отслеживание; не ждёт прибытия."""
+        payload = self._transport_payload(x, y, theta, map_id, max_speed)
+        return await self.call(self._create_tracked_transport(payload))
+
+    async def wait_transport_async(self, transport_id) -> dict:
+        """
+        Ждёт завершения транспорта (без потока на ожидание); возвращает его последний JSON.
+        Отмена ожидания не останавливает отслеживание.
+        """
+        return await self.call(self._wait_transport(transport_id))
+
+    def wait_transport(self, transport_id, timeout: float = agv_transport_timeout_s) -> dict:
+        return self._run(self.wait_transport_async(transport_id), timeout=timeout)
+
+    async def transport_events(self, transport_id) -> AsyncIterator[dict]:
+        """
+        Progress events of a transport (past ones first), usable from any event loop.
+        Ends after the event with finished=True.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def listener(event: dict):
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        async def subscribe():
+            handle = self.tracker.track(transport_id)
+            handle.add_listener(listener)
+            return handle
+
+        handle = await self.call(subscribe())
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["finished"]:
+                    break
+        finally:
+            self._get_loop().call_soon_threadsafe(handle.remove_listener, listener)
+
+    def get_transport_summary(self, transport_id) -> dict | None:
+        handle = self.tracker.get(transport_id)
+        if handle is None:
+            return None
+        return {**handle.summary(), "last_event": handle.events[-1] if handle.events else None}
+
+    async def track_transport_async(self, transport_id) -> dict:
+        """Ставит существующий транспорт на отслеживание (если ещё не отслеживается)."""
+        async def track():
+            self.tracker.track(transport_id)
+        await self.call(track())
+        return self.get_transport_summary(transport_id)
+
+    def get_transport_metrics(self) -> dict:
+        return {"client": self.aio.get_metrics(), **self.tracker.get_metrics()}
+
+    async def move_to_async(
+        self,
+        x: float,
+        y: float,
+        theta: float = 0,
+        map_id: str | None = None,
+        max_speed: float | None = None,
+        wait = True
+    ):
+        """Отправляет AGV к произвольной координате (wait: дождаться завершения транспорта)."""
+        try:
+            result = await self.start_transport_async(x, y, theta, map_id, max_speed)
+            if wait:
+                result = await self.wait_transport_async(result["id"])
+        except (AgvError, KeyError, TypeError, RuntimeError) as e:
+            server_logger.log_event("error", f"Error moving AGV: {e}")
+            raise Exception("Failed to move AGV")
+        if wait and transport_progress(result)["failed"]:
+            server_logger.log_event("error", f"AGV transport {result.get('id')} failed")
+            raise Exception("Failed to move AGV")
+        return result
+
+    def move_to(self, x: float, y: float, theta: float = 0, map_id: str | None = None,
+                max_speed: float | None = None, wait = True, timeout: float | None = None):
+        if timeout is None:
+            timeout = agv_transport_timeout_s if wait else TIMEOUTS["command"] + SYNC_CALL_MARGIN_S
+        return self._run(self.move_to_async(x, y, theta, map_id, max_speed, wait), timeout=timeout)
+
+    async def check_reachability_async(self, x: float, y: float, theta: float = 0, map_id: str | None = None):
+        """Проверяет достижимость точки (если поддерживается API)."""
+        payload = {"x": x, "y": y, "theta": theta}
+        if map_id is not None:
+            payload["mapId"] = map_id
+        try:
+            return await self.call(self.aio.check_reachability(payload))
+        except AgvError as e:
+            server_logger.log_event("error", f"Error checking reachability: {e}")
+            return None
+
+    def check_reachability(self, x: float, y: float, theta: float = 0, map_id: str | None = None):
+        return self._run(self.check_reachability_async(x, y, theta, map_id))
+
+    async def get_task_status_async(self, task_id: str):
+        """Возвращает статус задачи по ID."""
+        try:
+            return await self.call(self.aio.get_transport(task_id))
+        except AgvError as e:
+            server_logger.log_event("error", f"Error getting task status: {e}")
+            return None
+
+    def get_task_status(self, task_id: str):
+        return self._run(self.get_task_status_async(task_id))
+
+    # ------------- STATIONS -------------
+    async def _job(self, name: str):
+        try:
+            return await self.metadata.job(name)
+        except AgvError as e:
+            server_logger.log_event("error", f"Error polling AGV: {e}")
+            self.online = False
+            return None
+
+    async def _nearest_station(self, x: float, y: float):
+        try:
+            return await self.metadata.nearest_station(x, y)
+        except AgvError as e:
+            server_logger.log_event("error", f"Error polling AGV: {e}")
+            self.online = False
+            return None
+
+    async def find_nearest_station_async(self):
+        """
+        Определяет ближайшую станцию к роботу (по индексу станций из кэша).
+        Возвращает полный словарь данных о ближайшей станции,
+        дополнительно добавляя ключ "distance" с вычисленным расстоянием.
+        """
+        position = await self.get_robot_position_async()
+        if not position:
+            return None
+        nearest = await self.call(self._nearest_station(*position))
+        if nearest is None:
+            return None  # Если станций нет, сразу возвращаем None
+        station, distance = nearest
+        # Копия, чтобы не менять закэшированный список
+        return {**station, "distance": distance}
+
+    def find_nearest_station(self):
+        # Поза (status) и, при устаревшем кэше, список станций (query)
+        return self._run(
+            self.find_nearest_station_async(), timeout=TIMEOUTS["status"] + TIMEOUTS["query"] + SYNC_CALL_MARGIN_S
+        )
+
+    async def go_to_position_async(self, name, reconfig=False, wait=False):
+        try:
+            job, nearest_station = await asyncio.gather(
+                self.call(self._job(name)), self.find_nearest_station_async()
+            )
+            current_station = None
+
+            # If we successfully determined the nearest station and it is
+            # essentially the same as the requested one (within 5 cm), we can
+            # skip creating a new job.
+            if nearest_station and nearest_station.get("distance", float("inf")) < 0.05:
+                current_station = nearest_station
+
+            if current_station is not None:
+                if current_station.get("name") == name:
+                    return True
+            # if reconfig:
+            #     igus_lib.go_to_position(0, 4000, reconfig, True)
+            if await self.create_transport_from_job_async(job) != False:
+                return True
+            return False
+
+        except Exception as e:
+            return e
+
+    def go_to_position(self, name, reconfig=False, wait=False):
+        # Job и ближайшая станция параллельно (status + query), затем создание транспорта
+        timeout = TIMEOUTS["status"] + TIMEOUTS["query"] + TIMEOUTS["command"] + SYNC_CALL_MARGIN_S
+        return self._run(self.go_to_position_async(name, reconfig, wait), timeout=timeout)
+
+# ================================
+# Пример использования:
+# ================================
+
+if __name__ == "__main__":
+    client = AgvClient(ip=symovo_car_ip, robot_number=symovo_car_number)
+    client.start_polling(interval=10)
+    time.sleep(1)
+    server_logger.log_event("info", str(client.snapshot))
+    server_logger.log_event("info", str(client.go_to_position("Test", True, True)))
@@ -0,0 +1,138 @@
+"""
+Cache of rarely changing AGV metadata: jobs, stations and maps.
+
+Each list is kept in memory for agv_metadata_ttl_s. After that the next
+reader revalidates it with a conditional GET (ETag / Last-Modified), so an
+unchanged list costs a 304 instead of the full JSON. Concurrent readers
+share one refresh. On every change derived indexes are rebuilt: jobs by
+name and a NumPy array of station coordinates for nearest-station queries.
+
+Must be used from the event loop of the AsyncAgvClient.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.connection_config import agv_metadata_ttl_s
+from services.symovo_async_client import AsyncAgvClient
+
+METADATA_PATHS = {
+    "jobs": "/v0/job",
+    "stations": "/v0/station",
+    "maps": "/v0/map",
+}
+
+
+class MetadataEntry:
+    def __init__(self, kind: str, path: str, ttl: float):
+        self.kind = kind
+        self.path = path
+        self.ttl = ttl
+        self.value: Optional[Any] = None
+        self.validators: dict = {}
+        self.fetched: Optional[float] = None
+        self.version = 0
+        self.refreshes = 0
+        self.not_modified = 0
+        self._refresh: Optional[asyncio.Future] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self.fetched is None else time.monotonic() - self.fetched
+
+    def fresh(self, max_age: Optional[float] = None) -> bool:
+        limit = self.ttl if max_age is None else max_age
+        return self.fetched is not None and self.age <= limit
+
+    def invalidate(self) -> None:
+        # Значение и валидаторы сохраняем: следующий запрос условный
+        self.fetched = None
+
+
+class StationIndex:
+    """Station coordinates as an (N, 2) array; nearest query is one vectorized distance."""
+
+    def __init__(self, stations: List[dict]):
+        self.stations = [s for s in stations if (s.get("pose") or {}).get("x") is not None]
+        self.xy = np.array(
+            [(s["pose"]["x"], s["pose"]["y"]) for s in self.stations], dtype=float
+        ).reshape(-1, 2)
+
+    def nearest(self, x: float, y: float) -> Optional[Tuple[dict, float]]:
+        if not self.stations:
+            return None
+        distances = np.hypot(self.xy[:, 0] - x, self.xy[:, 1] - y)
+        i = int(np.argmin(distances))
+        return self.stations[i], float(distances[i])
+
+
+class AgvMetadataCache:
+    def __init__(self, client: AsyncAgvClient, ttl: float = agv_metadata_ttl_s):
+        self.client = client
+        self.entries: Dict[str, MetadataEntry] = {
+            kind: MetadataEntry(kind, path, ttl) for kind, path in METADATA_PATHS.items()
+        }
+        self.jobs_by_name: Dict[str, dict] = {}
+        self.station_index = StationIndex([])
+
+    async def get(self, kind: str, max_age: Optional[float] = None) -> Any:
+        """Cached list; refreshed (conditionally) if older than max_age or the TTL. Raises AgvError."""
+        entry = self.entries[kind]
+        if entry.fresh(max_age):
+            return entry.value
+        if entry._refresh is None or entry._refresh.done():
+            entry._refresh = asyncio.ensure_future(self._refresh(entry))
+        return await asyncio.shield(entry._refresh)
+
+    async def _refresh(self, entry: MetadataEntry) -> Any:
+        validators = entry.validators if entry.value is not None else {}
+        data, validators = await self.client.get_conditional(entry.path, validators)
+        entry.refreshes += 1
+        entry.fetched = time.monotonic()
+        if data is None:
+            entry.not_modified += 1
+            return entry.value
+        entry.value, entry.validators = data, validators
+        entry.version += 1
+        self._reindex(entry.kind)
+        return data
+
+    def _reindex(self, kind: str) -> None:
+        value = self.entries[kind].value or []
+        if kind == "jobs":
+            self.jobs_by_name = {job.get("name"): job for job in value}
+        elif kind == "stations":
+            self.station_index = StationIndex(value)
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        for entry in self.entries.values() if kind is None else (self.entries[kind],):
+            entry.invalidate()
+
+    # ------------- INDEXES -------------
+    async def job(self, name: str) -> Optional[dict]:
+        """Job by name; an unknown name forces one revalidation (the job may be new)."""
+        await self.get("jobs")
+        if name not in self.jobs_by_name:
+            await self.get("jobs", max_age=0)
+        return self.jobs_by_name.get(name)
+
+    async def nearest_station(self, x: float, y: float) -> Optional[Tuple[dict, float]]:
+        await self.get("stations")
+        return self.station_index.nearest(x, y)
+
+    def get_metrics(self) -> Dict[str, dict]:
+        return {
+            kind: {
+                "ttl_s": entry.ttl,
+                "age_s": None if entry.age is None else round(entry.age, 3),
+                "version": entry.version,
+                "items": None if entry.value is None else len(entry.value),
+                "refreshes": entry.refreshes,
+                "not_modified": entry.not_modified,
+                "etag": entry.validators.get("etag"),
+            }
+            for kind, entry in self.entries.items()
+        }
@@ -0,0 +1,134 @@
+"""
+Background poller of the AGV state with an adaptive rate.
+
+The poller runs on the AGV client's event loop and replaces a frozen,
+versioned AgvState snapshot after every poll. Readers (routes, the robot
+status aggregator) only read the current reference - no request, no lock.
+While the AGV moves (non-zero velocity or a tracked transport) it polls
+every moving_interval, otherwise every idle_interval; wake() makes the next
+poll happen immediately, e.g. right after a transport was created.
+"""
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from core.logger import server_logger
+from models.api_types import SymovoStatusResponse
+
+# Скорость, ниже которой AGV считаем стоящим (м/с, рад/с)
+MOVING_VELOCITY_EPS = 0.01
+
+
+@dataclass(frozen=True)
+class AgvState:
+    version: int
+    online: bool
+    moving: bool
+    updated: float  # time.monotonic()
+    status: Optional[SymovoStatusResponse] = None
+    error: Optional[str] = None
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.updated
+
+
+def is_moving(status: SymovoStatusResponse) -> bool:
+    velocity = status.velocity
+    return (
+        math.hypot(velocity.vx_m_s, velocity.vy_m_s) > MOVING_VELOCITY_EPS
+        or abs(velocity.omega_rad_s) > MOVING_VELOCITY_EPS
+    )
+
+
+class AgvPoller:
+    def __init__(self, fetch: Callable[[], Awaitable[SymovoStatusResponse]], busy: Callable[[], bool],
+                 moving_interval: float, idle_interval: float):
+        self.fetch = fetch
+        self.busy = busy
+        self.moving_interval = moving_interval
+        self.idle_interval = idle_interval
+        self.state: Optional[AgvState] = None
+        self.polls = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def interval(self) -> float:
+        moving = self.state is not None and self.state.moving
+        return self.moving_interval if moving or self.busy() else self.idle_interval
+
+    async def poll(self) -> AgvState:
+        version = 1 if self.state is None else self.state.version + 1
+        self.polls += 1
+        try:
+            status = await self.fetch()
+            state = AgvState(version, status.online, is_moving(status), time.monotonic(), status)
+        except Exception as e:
+            self.errors += 1
+            # Последний известный статус оставляем, но помечаем AGV как недоступный
+            last = None if self.state is None else self.state.status
+            state = AgvState(version, False, False, time.monotonic(), last, f"{type(e).__name__}: {e}")
+        self.state = state
+        return state
+
+    # ------------- BACKGROUND -------------
+    def start(self) -> None:
+        """Must be called on the AGV event loop."""
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def wake(self) -> None:
+        """Poll now (AGV event loop only)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            # Сбрасываем до опроса: wake() во время запроса не теряется
+            self._wake.clear()
+            previous = self.state
+            try:
+                state = await self.poll()
+                # В лог - только переходы online <-> offline, а не каждый неудачный опрос
+                if state.error is not None and (previous is None or previous.error is None):
+                    server_logger.log_event("error", f"AGV polling: {state.error}")
+                elif state.error is None and previous is not None and previous.error is not None:
+                    server_logger.log_event("info", "AGV polling: AGV online again")
+            except Exception as e:
+                server_logger.log_event("error", f"AGV polling: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def get_metrics(self) -> dict:
+        state = self.state
+        return {
+            "running": self.running,
+            "interval_s": self.interval,
+            "polls": self.polls,
+            "errors": self.errors,
+            "version": None if state is None else state.version,
+            "age_s": None if state is None else round(state.age, 3),
+            "moving": None if state is None else state.moving,
+        }
@@ -0,0 +1,180 @@
+"""
+Tracking of AGV transports by long-polling /transport/{id}/wait_for_changes.
+
+Every tracked transport has one poll task on the AGV client's event loop,
+so any number of transports are followed concurrently without threads.
+Each change becomes a progress event (kept in the handle and passed to
+listeners), and the handle's future resolves when the transport finishes.
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+
+from core.logger import server_logger
+from services.symovo_async_client import AsyncAgvClient, AgvError
+
+# Повторы long-poll при ошибках связи (транспорт может ещё не появиться сразу после создания)
+POLL_RETRY_DELAYS_S = (0.5, 1.0, 2.0, 4.0, 8.0)
+# Сколько завершённых транспортов держать для /transports
+FINISHED_HISTORY = 50
+
+
+def transport_progress(data: dict) -> dict:
+    """Progress summary of a transport JSON: finished steps, finished / failed flags."""
+    steps = data.get("steps") or []
+    state_log = data.get("state_log") or []
+    steps_finished = sum(1 for step in steps if step.get("finished"))
+    failed = bool(data.get("cancelled") or data.get("canceled")) or any(
+        (entry or {}).get("level") == "error" for entry in state_log
+    )
+    finished = bool(data.get("finished")) or (bool(steps) and steps_finished == len(steps))
+    return {
+        "steps_total": len(steps),
+        "steps_finished": steps_finished,
+        "finished": finished or failed,
+        "failed": failed,
+    }
+
+
+class TransportHandle:
+    def __init__(self, transport_id):
+        self.id = transport_id
+        self.created = time.time()
+        self.data: Optional[dict] = None
+        self.events: List[dict] = []
+        self.error: Optional[str] = None
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._listeners: List[Callable[[dict], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.future.done()
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """listener(event) is called on the AGV loop for every event (past events are replayed)."""
+        for event in self.events:
+            listener(event)
+        if not self.finished:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[dict], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _publish(self, data: Optional[dict], error: Optional[str] = None) -> dict:
+        if data is not None:
+            self.data = data
+        event = {
+            "transport_id": self.id,
+            "seq": len(self.events),
+            "time": time.time(),
+            **transport_progress(self.data or {}),
+            "error": error,
+        }
+        if error is not None:
+            event["finished"] = event["failed"] = True
+        self.events.append(event)
+        for listener in tuple(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                server_logger.log_event("error", f"Transport {self.id} listener: {e}")
+        return event
+
+    async def wait(self) -> dict:
+        return await asyncio.shield(self.future)
+
+    def summary(self) -> dict:
+        last = self.events[-1] if self.events else {}
+        return {
+            "transport_id": self.id,
+            "age_s": round(time.time() - self.created, 3),
+            "events": len(self.events),
+            "steps_total": last.get("steps_total"),
+            "steps_finished": last.get("steps_finished"),
+            "finished": self.finished or last.get("finished", False),
+            "failed": last.get("failed", False),
+            "error": self.error,
+        }
+
+
+class TransportTracker:
+    """Must be used from the event loop of the AsyncAgvClient."""
+
+    def __init__(self, client: AsyncAgvClient):
+        self.client = client
+        self.active: Dict[str, TransportHandle] = {}
+        self.finished: Dict[str, TransportHandle] = {}
+
+    def get(self, transport_id) -> Optional[TransportHandle]:
+        key = str(transport_id)
+        return self.active.get(key) or self.finished.get(key)
+
+    def track(self, transport_id, data: Optional[dict] = None) -> TransportHandle:
+        """Start following a transport (idempotent); data is its JSON if already known."""
+        handle = self.get(transport_id)
+        if handle is not None:
+            return handle
+        handle = TransportHandle(transport_id)
+        self.active[str(transport_id)] = handle
+        if data is not None:
+            handle._publish(data)
+        handle._task = asyncio.create_task(self._poll(handle))
+        return handle
+
+    async def _poll(self, handle: TransportHandle) -> None:
+        failures = 0
+        try:
+            while not (handle.events and handle.events[-1]["finished"]):
+                try:
+                    data = await self.client.wait_for_changes(handle.id)
+                    failures = 0
+                except AgvError as e:
+                    if isinstance(e.__cause__, aiohttp.SocketTimeoutError):
+                        # Long-poll истёк без изменений (соединение было) - это не ошибка;
+                        # таймаут подключения считается сбоем, как и прочие ошибки связи
+                        continue
+                    if failures >= len(POLL_RETRY_DELAYS_S):
+                        raise
+                    await asyncio.sleep(POLL_RETRY_DELAYS_S[failures])
+                    failures += 1
+                    continue
+                handle._publish(data)
+            handle.future.set_result(handle.data)
+        except asyncio.CancelledError:
+            handle.error = "Tracking cancelled"
+            handle._publish(None, handle.error)
+            handle.future.set_exception(RuntimeError(handle.error))
+            raise
+        except Exception as e:
+            handle.error = str(e)
+            server_logger.log_event("error", f"Transport {handle.id} tracking failed: {e}")
+            handle._publish(None, handle.error)
+            handle.future.set_exception(RuntimeError(f"Transport {handle.id}: {e}"))
+        finally:
+            handle._listeners.clear()
+            self.active.pop(str(handle.id), None)
+            self.finished[str(handle.id)] = handle
+            while len(self.finished) > FINISHED_HISTORY:
+                self.finished.pop(next(iter(self.finished)))
+            # Исключение future забирается тем, кто ждёт; без ожидающих не ругаемся в лог
+            if handle.future.done() and not handle.future.cancelled():
+                handle.future.exception()
+
+    async def close(self) -> None:
+        for handle in list(self.active.values()):
+            if handle._task is not None:
+                handle._task.cancel()
+        await asyncio.gather(
+            *(h._task for h in self.active.values() if h._task is not None), return_exceptions=True
+        )
+
+    def get_metrics(self) -> dict:
+        return {
+            "active": [handle.summary() for handle in self.active.values()],
+            "finished": [handle.summary() for handle in self.finished.values()],
+        }
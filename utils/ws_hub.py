@@ -0,0 +1,243 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import websockets
+from fastapi import WebSocket
+
+from core.logger import server_logger
+
+
+class Subscription:
+    """A subscriber's bounded queue. When full, the oldest frame is dropped."""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.delivered = 0
+        self.dropped = 0
+
+    def offer(self, message) -> None:
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        message = await self.queue.get()
+        self.delivered += 1
+        return message
+
+
+class SharedEncoder:
+    """
+    Per-parameter-set encoder of a hub. Subscribers with the same stream
+    parameters share it, so each upstream frame is encoded once per
+    parameter set (in a worker thread) and not once per client.
+    """
+
+    def __init__(self, encode: Callable):
+        self.encode = encode
+        self._input = None
+        self._output: Optional[asyncio.Future] = None
+        self.encoded = 0
+
+    async def __call__(self, message):
+        if message is not self._input or self._output is None:
+            self._input = message
+            self._output = asyncio.get_running_loop().run_in_executor(None, self.encode, message)
+            self.encoded += 1
+        return await asyncio.shield(self._output)
+
+
+class StreamHub:
+    """
+    Broadcast hub for a camera stream.
+
+    Keeps a single upstream WebSocket connection per source while at least
+    one subscriber is attached, and fans every upstream message out to the
+    subscribers' bounded queues. A slow client only loses its own oldest
+    frames; it never blocks the upstream or the other clients.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        queue_size: int = 2,
+        reconnect_interval: float = 2.0,
+        subprotocols: Optional[List[str]] = None,
+    ):
+        self.url = url
+        self.queue_size = queue_size
+        self.reconnect_interval = reconnect_interval
+        self.subprotocols = subprotocols
+        self._subscribers: Set[Subscription] = set()
+        self._encoders: Dict[tuple, SharedEncoder] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.subprotocol: Optional[str] = None
+        self.messages = 0
+        # Счётчики отписавшихся клиентов
+        self._delivered = 0
+        self._dropped = 0
+        self.last_message = None
+        self.last_error = None
+
+    # ------------- SUBSCRIBERS -------------
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        self._delivered += subscription.delivered
+        self._dropped += subscription.dropped
+        # Последний зритель ушёл - закрываем upstream
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def encoder(self, key: tuple, factory: Callable[[], Callable]) -> SharedEncoder:
+        """Shared encoder for a parameter set; factory creates the encode callable on first use."""
+        encoder = self._encoders.get(key)
+        if encoder is None:
+            encoder = self._encoders[key] = SharedEncoder(factory())
+        return encoder
+
+    # ------------- UPSTREAM -------------
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with websockets.connect(self.url, subprotocols=self.subprotocols) as upstream:
+                    self.connected = True
+                    self.last_error = None
+                    self.subprotocol = upstream.subprotocol
+                    server_logger.log_event("info", f"Stream hub connected -> {self.url}")
+                    try:
+                        async for message in upstream:
+                            self.messages += 1
+                            self.last_message = time.time()
+                            for subscription in tuple(self._subscribers):
+                                subscription.offer(message)
+                    except asyncio.CancelledError:
+                        # Штатное закрытие, а не 1011 при выходе по исключению
+                        await upstream.close()
+                        raise
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                server_logger.log_event("error", f"Stream hub {self.url}: {e}")
+            finally:
+                self.connected = False
+            await asyncio.sleep(self.reconnect_interval)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    def get_metrics(self) -> dict:
+        return {
+            "url": self.url,
+            "connected": self.connected,
+            "subprotocol": self.subprotocol,
+            "subscribers": len(self._subscribers),
+            "messages": self.messages,
+            "age_s": round(time.time() - self.last_message, 3) if self.last_message else None,
+            "delivered": self._delivered + sum(s.delivered for s in self._subscribers),
+            "dropped": self._dropped + sum(s.dropped for s in self._subscribers),
+            "encoders": {str(key): encoder.encoded for key, encoder in self._encoders.items()},
+            "last_error": self.last_error,
+        }
+
+
+# Один хаб на источник (url + предлагаемые подпротоколы)
+_hubs: Dict[Tuple[str, Tuple[str, ...]], StreamHub] = {}
+
+
+def get_hub(url: str, subprotocols: Optional[List[str]] = None, **kwargs) -> StreamHub:
+    key = (url, tuple(subprotocols or ()))
+    hub = _hubs.get(key)
+    if hub is None:
+        hub = _hubs[key] = StreamHub(url, subprotocols=subprotocols, **kwargs)
+    return hub
+
+
+def get_hubs_metrics() -> List[dict]:
+    return [hub.get_metrics() for hub in _hubs.values()]
+
+
+async def close_hubs() -> None:
+    for hub in _hubs.values():
+        await hub.close()
+
+
+async def serve_stream(
+    ws: WebSocket,
+    hub: StreamHub,
+    transform: Optional[Callable] = None,
+    subprotocol: Optional[str] = None,
+    max_fps: Optional[float] = None,
+):
+    """
+    Serve a client from a StreamHub until it disconnects.
+
+    Stream sources are one-way: messages from the client are read only to
+    notice the disconnect. transform (plain or async, e.g. a SharedEncoder)
+    may convert a message or return None to skip it for this client.
+    max_fps drops frames that arrive sooner than 1/max_fps after the last
+    sent one, before they are encoded.
+    """
+    await ws.accept(subprotocol=subprotocol)
+    subscription = hub.subscribe()
+    min_interval = 1.0 / max_fps if max_fps else 0.0
+
+    async def send():
+        last_sent = 0.0
+        while True:
+            message = await subscription.get()
+            if min_interval and time.monotonic() - last_sent < min_interval:
+                continue
+            if transform is not None:
+                message = transform(message)
+                if asyncio.iscoroutine(message):
+                    message = await message
+                if message is None:
+                    continue
+            last_sent = time.monotonic()
+            if isinstance(message, str):
+                await ws.send_text(message)
+            else:
+                await ws.send_bytes(message)
+
+    async def receive():
+        while True:
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                server_logger.log_event("debug", f"Stream {hub.url}: {task.exception()}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(subscription)
+        if ws.client_state.name != "DISCONNECTED":
+            try:
+                await ws.close()
+            except Exception:
+                pass
@@ -1,57 +1,189 @@
 from fastapi import WebSocket
 import websockets
-from typing import Optional
+from typing import Callable, Dict, Union
 import asyncio
+import time
 
-async def forward_messages_fastapi_to_websockets(src_ws: WebSocket, dst_ws: websockets.WebSocketClientProtocol):
+# Итоговые счётчики прокси по целевому URL (включая закрытые соединения)
+proxy_totals: Dict[str, Dict[str, int]] = {}
+# Активные соединения: id -> ProxyStats
+active_proxies: Dict[int, "ProxyStats"] = {}
+
+
+class DirectionStats:
+    """Counters of one proxy direction."""
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+
+    def as_dict(self, elapsed: float) -> dict:
+        return {
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "msg_per_s": round(self.messages / elapsed, 2) if elapsed else 0.0,
+            "bytes_per_s": round(self.bytes / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+class ProxyStats:
+    def __init__(self, target_url: str):
+        self.target_url = target_url
+        self.started = time.monotonic()
+        self.upstream = DirectionStats()    # клиент -> целевой сервер
+        self.downstream = DirectionStats()  # целевой сервер -> клиент
+
+    def as_dict(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        return {
+            "target_url": self.target_url,
+            "age_s": round(elapsed, 1),
+            "upstream": self.upstream.as_dict(elapsed),
+            "downstream": self.downstream.as_dict(elapsed),
+        }
+
+
+def get_proxy_metrics() -> dict:
+    return {
+        "active": [stats.as_dict() for stats in active_proxies.values()],
+        "totals": proxy_totals,
+    }
+
+
+def _message_size(message: Union[str, bytes]) -> int:
+    # Текстовый кадр уходит в сеть в UTF-8
+    return len(message.encode()) if isinstance(message, str) else len(message)
+
+
+async def _pump(receive: Callable, send: Callable, stats: DirectionStats, queue_size: int):
     """
-    Forward messages from FastAPI WebSocket to websockets client
+    Forward messages from receive() to send() through a bounded queue.
+
+    The reader waits for room in the queue, which propagates backpressure
+    to the sender's socket. receive() returns None when its side closes;
+    the None is queued as an end marker, so the writer sends what is left in
+    order and then finishes. Only the writer ever calls send().
     """
-    try:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def reader():
         while True:
-            message = await src_ws.receive()
-            
-            if "text" in message and message["text"] is not None:
-                await dst_ws.send(message["text"])
-            elif "bytes" in message and message["bytes"] is not None:
-                await dst_ws.send_bytes(message["bytes"])
-            else:
-                break
-    except Exception as e:
-        from core.logger import server_logger
-        server_logger.log_event("error", f"fastapi->websockets: {e}")
+            message = await receive()
+            await queue.put(message)
+            if message is None:
+                return
+            stats.queue_depth = queue.qsize()
+            stats.max_queue_depth = max(stats.max_queue_depth, stats.queue_depth)
 
-async def forward_messages_websockets_to_fastapi(src_ws: websockets.WebSocketClientProtocol, dst_ws: WebSocket):
-    """
-    Forward messages from websockets client to FastAPI WebSocket
-    """
+    async def writer():
+        while True:
+            message = await queue.get()
+            stats.queue_depth = queue.qsize()
+            if message is None:
+                return
+            await send(message)
+            stats.messages += 1
+            stats.bytes += _message_size(message)
+
+    reader_task, writer_task = tasks = [asyncio.create_task(reader()), asyncio.create_task(writer())]
     try:
-        async for msg in src_ws:
-            if isinstance(msg, str):
-                await dst_ws.send_text(msg)
-            else:
-                await dst_ws.send_bytes(msg)
-    except Exception as e:
-        from core.logger import server_logger
-        server_logger.log_event("error", f"websockets->fastapi: {e}")
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+        # Источник закрыт: писатель дописывает очередь до маркера конца
+        await writer_task
+    finally:
+        for task in tasks:
+            task.cancel()
+
 
-async def proxy_websocket(ws: WebSocket, target_url: str):
+def _fastapi_receiver(ws: WebSocket) -> Callable:
+    async def receive():
+        message = await ws.receive()
+        if message["type"] == "websocket.disconnect":
+            return None
+        if message.get("text") is not None:
+            return message["text"]
+        return message.get("bytes")
+    return receive
+
+
+def _fastapi_sender(ws: WebSocket) -> Callable:
+    async def send(message):
+        if isinstance(message, str):
+            await ws.send_text(message)
+        else:
+            await ws.send_bytes(message)
+    return send
+
+
+def _websockets_receiver(target_ws) -> Callable:
+    async def receive():
+        try:
+            return await target_ws.recv()
+        except websockets.ConnectionClosed:
+            return None
+    return receive
+
+
+async def proxy_websocket(
+    ws: WebSocket,
+    target_url: str,
+    queue_size: int = 8,
+):
     """
     Proxy WebSocket connection to target URL
+
+    Each direction runs through a bounded queue; when either side closes or
+    fails, the other direction is cancelled and both sockets are closed.
+
+    :param queue_size: Messages buffered per direction
     """
     await ws.accept()
     from core.logger import server_logger
     server_logger.log_event("debug", f"Proxy WS connect -> {target_url}")
+    stats = ProxyStats(target_url)
+    active_proxies[id(stats)] = stats
     try:
         async with websockets.connect(target_url) as target_ws:
-            await asyncio.gather(
-                forward_messages_fastapi_to_websockets(ws, target_ws),
-                forward_messages_websockets_to_fastapi(target_ws, ws)
-            )
+            directions = [
+                asyncio.create_task(_pump(
+                    _fastapi_receiver(ws), target_ws.send, stats.upstream, queue_size
+                )),
+                asyncio.create_task(_pump(
+                    _websockets_receiver(target_ws), _fastapi_sender(ws), stats.downstream, queue_size
+                )),
+            ]
+            try:
+                done, _ = await asyncio.wait(directions, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                # Одна сторона закрылась - останавливаем вторую
+                for task in directions:
+                    task.cancel()
+                await asyncio.gather(*directions, return_exceptions=True)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    server_logger.log_event("debug", f"WebSocket proxy {target_url}: {task.exception()}")
     except Exception as e:
-        from core.logger import server_logger
         server_logger.log_event("debug", f"WebSocket proxy error: {e}")
     finally:
-        if not ws.client_state.name == "DISCONNECTED":
-            await ws.close()
+        active_proxies.pop(id(stats), None)
+        totals = proxy_totals.setdefault(target_url, {
+            "connections": 0, "upstream_messages": 0, "upstream_bytes": 0,
+            "downstream_messages": 0, "downstream_bytes": 0,
+        })
+        totals["connections"] += 1
+        totals["upstream_messages"] += stats.upstream.messages
+        totals["upstream_bytes"] += stats.upstream.bytes
+        totals["downstream_messages"] += stats.downstream.messages
+        totals["downstream_bytes"] += stats.downstream.bytes
+        if ws.client_state.name != "DISCONNECTED":
+            try:
+                await ws.close()
+            except Exception:
+                pass
         server_logger.log_event("debug", f"Proxy WS disconnect -> {target_url}")